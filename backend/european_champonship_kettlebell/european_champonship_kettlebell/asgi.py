@@ -11,6 +11,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "european_champonship_kettlebell.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "european_champonship_kettlebell.settings.prod")
 
 application = get_asgi_application()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 # --- Imports ---
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -158,12 +159,79 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # --- Third-Party Application Settings ---
 
-# Django REST Framework Settings (Example - add your settings here)
-# REST_FRAMEWORK = {
-#     'DEFAULT_PERMISSION_CLASSES': [
-#         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
-#     ]
-# }
+# Django REST Framework Settings
+# Renderery API: JSON kodowany przez orjson (live_results/renderers.py, bez orjson - zwykły JSON) i MessagePack
+# (Accept: application/msgpack, tylko gdy zainstalowany pakiet msgpack). Przeglądarkowe API DRF tylko przy
+# API_BROWSABLE (domyślnie = DEBUG); settings/prod.py wyłącza je niezależnie od DEBUG.
+API_FAST_RENDERERS = os.getenv("API_FAST_RENDERERS", "True").lower() == "true"
+API_BROWSABLE = os.getenv("API_BROWSABLE", str(DEBUG)).lower() == "true"
+if API_FAST_RENDERERS:
+    API_RENDERER_CLASSES = ["live_results.renderers.ORJSONRenderer"]
+    if find_spec("msgpack") is not None:
+        API_RENDERER_CLASSES.append("live_results.renderers.MessagePackRenderer")
+else:
+    API_RENDERER_CLASSES = ["rest_framework.renderers.JSONRenderer"]
+# Stronicowanie kursorem (wyniki kategorii, kluby) - tylko gdy klient poda ?page_size= albo ?cursor=
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": API_RENDERER_CLASSES
+    + (["rest_framework.renderers.BrowsableAPIRenderer"] if API_BROWSABLE else []),
+    # 'DEFAULT_PERMISSION_CLASSES': [
+    #     'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
+    # ]
+}
+
+# --- Live Results Settings ---
+# How category standings are recalculated:
+#   "memory" - one read of the whole category, ranking computed in Python, only changed rows written
+#   "sql"    - discipline positions computed by the database with RANK() OVER (PostgreSQL)
+RANKING_BACKEND = os.getenv("RANKING_BACKEND", "memory")
+# After a single result is saved, shift only the athletes between the old and new rank
+# instead of re-ranking every category of the athlete (falls back to a full recalculation).
+INCREMENTAL_RANKING = os.getenv("INCREMENTAL_RANKING", "True").lower() == "true"
+# "immediate" - przeliczenie zaraz po zapisie; "queue" - zapis oznacza kategorię do przeliczenia,
+# a kolejkę przetwarza `python manage.py run_recalc_worker` (kilka zapisów = jedno przeliczenie)
+RECALC_MODE = os.getenv("RECALC_MODE", "immediate")
+# Blokada doradcza PostgreSQL na kategorię: przeliczenia jednej kategorii nie biegną równolegle,
+# a zbędne (gdy identyczne już czeka na blokadę) są pomijane
+RECALC_ADVISORY_LOCKS = os.getenv("RECALC_ADVISORY_LOCKS", "True").lower() == "true"
+# Cache-Control endpointów kategorii (sekundy): przez max-age odpowiedź jest świeża, przez
+# stale-while-revalidate proxy/przeglądarka podaje starą kopię i odświeża ją w tle (ETag -> 304)
+RESULTS_CACHE_MAX_AGE = int(os.getenv("RESULTS_CACHE_MAX_AGE", "2"))
+RESULTS_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("RESULTS_CACHE_STALE_WHILE_REVALIDATE", "30"))
+# Cache Django dla tabel wyników budowanych na żywo (live_results/results_cache.py):
+#   "locmem" - pamięć procesu (domyślnie), "file" - katalog CACHE_LOCATION wspólny dla procesów jednej maszyny
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+if CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR.parent / ".cache")),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "live-results"}}
+# Wpis tabeli wyników żyje RESULTS_CACHE_TIMEOUT sekund (klucz zawiera rewizję, więc nie wymaga unieważniania);
+# blokada budowania wygasa po RESULTS_CACHE_LOCK_TIMEOUT, a żądanie bez poprzedniej wersji czeka RESULTS_CACHE_WAIT
+RESULTS_CACHE_TIMEOUT = int(os.getenv("RESULTS_CACHE_TIMEOUT", "300"))
+RESULTS_CACHE_LOCK_TIMEOUT = int(os.getenv("RESULTS_CACHE_LOCK_TIMEOUT", "10"))
+RESULTS_CACHE_WAIT = float(os.getenv("RESULTS_CACHE_WAIT", "2.0"))
+# Tabele wyników (migawki, cache) budowane jednym zapytaniem values() z wynikami liczonymi przez bazę
+# zamiast zagnieżdżonych serializerów DRF; ten sam JSON (False - serializery, np. do porównania)
+RESULTS_FAST_SERIALIZATION = os.getenv("RESULTS_FAST_SERIALIZATION", "True").lower() == "true"
+# Ile ostatnich zmian tabeli wyników kategorii jest przechowywanych (?since=<rewizja>);
+# klient z rewizją starszą niż najstarsza z nich dostaje pełną tabelę
+LEADERBOARD_DELTA_HISTORY = int(os.getenv("LEADERBOARD_DELTA_HISTORY", "100"))
+# Strumień SSE (/api/categories/stream/, wymaga ASGI, np. `uvicorn european_champonship_kettlebell.asgi:application`):
+# co ile sekund proces sprawdza rewizje tabel wyników, co ile wysyła heartbeat, ile zdarzeń czeka na wolnego klienta
+LIVE_STREAM_POLL_INTERVAL = float(os.getenv("LIVE_STREAM_POLL_INTERVAL", "1.0"))
+LIVE_STREAM_HEARTBEAT = float(os.getenv("LIVE_STREAM_HEARTBEAT", "15"))
+LIVE_STREAM_QUEUE_SIZE = int(os.getenv("LIVE_STREAM_QUEUE_SIZE", "100"))
+# Statyczna kopia wyników dla nginx (`python manage.py export_static_site`, live_results/exports.py).
+# Ustawiony katalog - kopię odświeża run_recalc_worker po każdej przeliczonej paczce kategorii (tryb "queue"),
+# w trybie "immediate" `export_static_site --interval N`; pusty - tylko ręcznie komendą
+STATIC_EXPORT_DIR = os.getenv("STATIC_EXPORT_DIR") or None
 
 # Django Import Export Settings (Example - add specific settings if needed)
 # IMPORT_EXPORT_USE_TRANSACTIONS = True
@@ -14,6 +14,10 @@ DBBACKUP_PATH = BASE_DIR.parent / "dbbackup"
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
 
+# Ruch publiczny: tylko JSON/MessagePack, bez przeglądarkowego API DRF (chyba że API_BROWSABLE=True)
+if os.getenv("API_BROWSABLE", "False").lower() != "true":
+    REST_FRAMEWORK = {**REST_FRAMEWORK, "DEFAULT_RENDERER_CLASSES": API_RENDERER_CLASSES}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
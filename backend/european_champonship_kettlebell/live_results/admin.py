@@ -1,19 +1,16 @@
 """Admin panel for managing kettlebell competition results"""
 from django.contrib import messages
 
+import logging
 import traceback
 from django.http import HttpResponseRedirect
 from django import forms
 from django.contrib import admin
 from django.db import models
-from django.db.models import Case, F, FloatField, Value, When
-from django.http import HttpResponse
-from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 from import_export.admin import ImportExportModelAdmin
-from .services import update_discipline_positions, update_overall_results_for_category, update_overall_results_for_player
 from .models.tiebreak import PlayerCategoryTiebreak
 
 from .models.category import Category
@@ -29,20 +26,37 @@ from .models.player import Player
 from .models.results import (
     KBSquatResult, # Updated import
     OneKettlebellPressResult,
+    CategoryDisciplineResult,
     CategoryOverallResult,
     SnatchResult,
     TGUResult,
     TwoKettlebellPressResult, # Updated import
 )
 from .models.sport_club import SportClub
+from .exports import (
+    DISCIPLINE_EXPORT_CONFIG,
+    DISCIPLINE_POINTS_FIELDS,
+    DISCIPLINE_RELATED_NAMES,
+    category_results_table,
+    get_player_categories_display,
+    html_export_response,
+    overall_results_table,
+    players_table,
+    stream_category_results_html,
+    stream_overall_results_html,
+    table_export_response,
+)
 from .resources import PlayerExportResource, PlayerImportResource
 from .services import (
+    DISCIPLINE_BY_MODEL,
     create_default_results_for_player_categories,
-    update_discipline_positions,
-    update_overall_results_for_category,
-    update_overall_results_for_player,
+    record_attempt_versions,
+    schedule_category_recalculation,
+    schedule_player_recalculation,
 )
 
+logger = logging.getLogger(__name__)
+
 
 def player_link_display(obj, app_name="live_results"):
     """Helper function to display player link in admin panel"""
@@ -58,15 +72,6 @@ def player_link_display(obj, app_name="live_results"):
     return _("Brak gracza")
 
 
-def get_player_categories_display(obj) -> str:
-    """Helper function to display player categories in admin panel"""
-    player = getattr(obj, "player", None)
-    target_player = obj if isinstance(obj, Player) else player
-    if target_player and hasattr(target_player, "categories") and target_player.categories.exists():
-        return ", ".join([c.name for c in target_player.categories.all()])
-    return "---"
-
-
 class CategoryAdminForm(forms.ModelForm):
     """Django Form for the Category model used in the admin interface."""
 
@@ -108,6 +113,7 @@ class CategoryAdminForm(forms.ModelForm):
 class PlayerAdmin(ImportExportModelAdmin):
     resource_classes = [PlayerImportResource]
     export_resource_classes = [PlayerExportResource]
+    actions = ["export_players_as_csv", "export_players_as_xlsx"]
     list_display = (
         "display_surname_name",
         "weight",
@@ -122,15 +128,14 @@ class PlayerAdmin(ImportExportModelAdmin):
     )
     list_filter = ("club", "categories", ("weight", admin.EmptyFieldListFilter))
     search_fields = ("name", "surname", "club__name", "categories__name")
-    list_select_related = ("club",)
-    list_prefetch_related = (
-        "categories",
+    # Wyniki dyscyplin to odwrotne relacje OneToOne - dołączane JOIN-em razem z klubem
+    list_select_related = (
+        "club",
         "snatch_result",
         "tgu_result",
         "kb_squat_one_result",
         "one_kettlebell_press_result",
         "two_kettlebell_press_one_result",
-        "category_results",
     )
     ordering = ("surname", "name")
 
@@ -142,6 +147,10 @@ class PlayerAdmin(ImportExportModelAdmin):
         TWO_KB_PRESS: "get_tkbp_bw_percentage_display",
     }
 
+    def get_queryset(self, request):
+        # ModelAdmin nie ma opcji list_prefetch_related - kategorie (M2M) pobieramy tutaj jednym zapytaniem
+        return super().get_queryset(request).prefetch_related("categories")
+
     @admin.display(description="Nazwisko, Imię", ordering="surname")
     def display_surname_name(self, obj):
         if obj.surname and obj.name:
@@ -239,6 +248,22 @@ class PlayerAdmin(ImportExportModelAdmin):
     def get_export_resource_classes(self, request=None):
         return [PlayerExportResource]
 
+    @admin.action(description=_("Eksportuj zawodników do CSV"))
+    def export_players_as_csv(self, request, queryset):
+        return self._export_players(request, queryset, "csv")
+
+    @admin.action(description=_("Eksportuj zawodników do XLSX"))
+    def export_players_as_xlsx(self, request, queryset):
+        return self._export_players(request, queryset, "xlsx")
+
+    def _export_players(self, request, queryset, file_format: str):
+        # Kolumny jak w eksporcie django-import-export, ale wiersze czytane i wysyłane porcjami
+        headers, rows = players_table(queryset)
+        try:
+            return table_export_response(headers, rows, file_format, "zawodnicy")
+        except RuntimeError as e: # XLSX bez openpyxl
+            self.message_user(request, str(e), level="ERROR")
+
     def save_model(self, request, obj: Player, form, change):
         """Obsługuje zapis modelu Player BEZ uruchamiania przeliczania."""
         # TYLKO zapisz model główny
@@ -290,7 +315,7 @@ class PlayerAdmin(ImportExportModelAdmin):
         try:
             # Ta funkcja teraz obsługuje zarówno aktualizację DLA AKTUALNYCH kategorii,
             # jak i usuwanie wyników DLA USUNIĘTYCH kategorii.
-            update_overall_results_for_player(player_instance)
+            schedule_player_recalculation(player_instance)
             print(f"[Admin save_related] Zakończono aktualizację/czyszczenie wyników dla gracza {player_instance.id}.")
             # Możesz dodać komunikat sukcesu, ale może być ich za dużo, jeśli edytujesz wielu graczy
             # self.message_user(request, f"Wyniki dla gracza {player_instance} zostały zaktualizowane.", level="INFO")
@@ -318,56 +343,10 @@ class CategoryAdmin(admin.ModelAdmin):
     form = CategoryAdminForm
     list_display = ("name", "get_disciplines_list_display")
     search_fields = ("name",)
-    actions = ["export_results_as_html"]
-
-    # Updated DISCIPLINE_RELATED_NAMES based on comments and changes
-    DISCIPLINE_RELATED_NAMES = {
-        SNATCH: "snatch_result",
-        TGU: "tgu_result",
-        # SEE_SAW_PRESS: "see_saw_press_result", # Commented out
-        KB_SQUAT: "kb_squat_one_result", # Changed related name [cite: 1]
-        # PISTOL_SQUAT: "pistol_squat_result", # Commented out
-        ONE_KB_PRESS: "one_kettlebell_press_result",
-        TWO_KB_PRESS: "two_kettlebell_press_one_result", # Changed related name [cite: 3]
-    }
-    # Updated DISCIPLINE_EXPORT_CONFIG based on comments and changes
-    DISCIPLINE_EXPORT_CONFIG = {
-        SNATCH: {
-            "header": "Snatch (kg x reps / wynik)",
-            "attributes": ["kettlebell_weight", "repetitions", "result"],
-            "template_snippet": "admin/live_results/category/export_snippets/snatch.html",
-        },
-        TGU: {
-            "header": "TGU (max kg / %BW)",
-            "attributes": ["max_result", "bw_percentage", "position"],
-            "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html",
-        },
-        # PISTOL_SQUAT: { # Commented out
-        #     "header": "Pistol (max kg / %BW)",
-        #     "attributes": ["max_result", "bw_percentage", "position"],
-        #     "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html",
-        # },
-        ONE_KB_PRESS: {
-            "header": "OH Press (max kg / %BW)",
-            "attributes": ["max_result", "bw_percentage", "position"],
-            "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html",
-        },
-        # SEE_SAW_PRESS: { # Commented out
-        #     "header": "SeeSaw Press (max kg / %BW)",
-        #     "attributes": ["max_score", "bw_percentage", "position"],
-        #     "template_snippet": "admin/live_results/category/export_snippets/double_attempt.html",
-        # },
-        KB_SQUAT: { # Changed base class implies single attempt logic
-            "header": "KB Squat (max kg / %BW)",
-            "attributes": ["max_result", "bw_percentage", "position"], # Changed attributes
-            "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html", # Changed template
-        },
-        TWO_KB_PRESS: { # Changed base class implies single attempt logic
-            "header": "2KB Press (max kg / %BW)",
-            "attributes": ["max_result", "bw_percentage", "position"], # Changed attributes
-            "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html", # Changed template
-        },
-    }
+    actions = ["export_results_as_html", "export_results_as_csv", "export_results_as_xlsx"]
+
+    DISCIPLINE_RELATED_NAMES = DISCIPLINE_RELATED_NAMES
+    DISCIPLINE_EXPORT_CONFIG = DISCIPLINE_EXPORT_CONFIG
 
     @admin.display(description=_("Dyscypliny"))
     def get_disciplines_list_display(self, obj: Category) -> str:
@@ -382,8 +361,7 @@ class CategoryAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
         print(f"Saved category '{obj.name}'. Triggering results recalculation...")
         try:
-            update_discipline_positions(obj)
-            update_overall_results_for_category(obj)
+            schedule_category_recalculation(obj)
             print(f"Results recalculation for category '{obj.name}' finished.")
             self.message_user(
                 request, f"Results for category '{obj.name}' have been successfully recalculated.", level="INFO"
@@ -404,73 +382,38 @@ class CategoryAdmin(admin.ModelAdmin):
             return
 
         category = queryset.first()
-        disciplines_in_category = sorted(list(category.get_disciplines()))
-
-        discipline_columns = []
-        # Use updated DISCIPLINE_RELATED_NAMES
-        prefetch_related_list = ["player__club"]
-        for code in disciplines_in_category:
-            # Use updated DISCIPLINE_EXPORT_CONFIG and DISCIPLINE_RELATED_NAMES
-            if code in self.DISCIPLINE_EXPORT_CONFIG and code in self.DISCIPLINE_RELATED_NAMES:
-                config = self.DISCIPLINE_EXPORT_CONFIG[code]
-                related_name = self.DISCIPLINE_RELATED_NAMES[code]
-                discipline_columns.append(
-                    {
-                        "code": code,
-                        "header": config["header"],
-                        "attributes": config["attributes"],
-                        "related_name": related_name,
-                        "template_snippet": config.get("template_snippet"),
-                    }
-                )
-                prefetch_related_list.append(f"player__{related_name}")
-            else:
-                print(f"WARNING: Missing export configuration or related_name for discipline '{code}'")
-
-        overall_results = (
-            CategoryOverallResult.objects.filter(player__categories=category)
-            .select_related("player")
-            .prefetch_related(*prefetch_related_list)
-            .order_by("final_position")
-        )
-
-        if not overall_results.exists():
+        if not CategoryOverallResult.objects.filter(category=category).exists():
             self.message_user(
                 request, _("Brak wyników do wyeksportowania dla kategorii: %s") % category.name, level="INFO"
             )
             return
 
-        table_rows = []
-        for overall in overall_results:
-            player = overall.player
-            row_data = {
-                "position": overall.final_position,
-                "player": player,
-                "club_name": player.club.name if player.club else "brak klubu",
-                "total_points": overall.total_points,
-                "discipline_results": {},
-            }
-            for disc_info in discipline_columns:
-                result_obj = getattr(player, disc_info["related_name"], None)
-                row_data["discipline_results"][disc_info["code"]] = result_obj
-
-            table_rows.append(row_data)
+        # Wiersze renderowane i wysyłane porcjami - bez budowania całej tabeli w pamięci
+        return html_export_response(stream_category_results_html(category))
 
-        context = {
-            "category": category,
-            "discipline_columns": discipline_columns,
-            "table_rows": table_rows,
-        }
+    @admin.action(description=_("Eksportuj szczegółowe wyniki kategorii do CSV"))
+    def export_results_as_csv(self, request, queryset):
+        return self._export_results_table(request, queryset, "csv")
 
-        html_content = render_to_string("admin/live_results/category/results_export_detailed.html", context)
+    @admin.action(description=_("Eksportuj szczegółowe wyniki kategorii do XLSX"))
+    def export_results_as_xlsx(self, request, queryset):
+        return self._export_results_table(request, queryset, "xlsx")
 
-        response = HttpResponse(html_content, content_type="text/html; charset=utf-8")
-        return response
+    def _export_results_table(self, request, queryset, file_format: str):
+        headers, rows = category_results_table(queryset.order_by("name"))
+        try:
+            return table_export_response(headers, rows, file_format, "wyniki-kategorii")
+        except RuntimeError as e: # XLSX bez openpyxl
+            self.message_user(request, str(e), level="ERROR")
 
 
 class BaseResultAdminMixin:
     discipline_code = None
 
+    def get_queryset(self, request):
+        # Kolumna "kategorie" na liście wyników - jedno zapytanie zamiast jednego na wiersz
+        return super().get_queryset(request).prefetch_related("player__categories")
+
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "player" and self.discipline_code:
             try:
@@ -500,6 +443,16 @@ class BaseResultAdminMixin:
 
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+    @admin.display(description=_("Pozycje w kategoriach"))
+    def get_category_positions(self, obj) -> str:
+        """Pozycja zawodnika w tej dyscyplinie - osobno w każdej jego kategorii."""
+        rows = (
+            CategoryDisciplineResult.objects.filter(player_id=obj.player_id, discipline=self.discipline_code)
+            .select_related("category")
+            .order_by("category__name")
+        )
+        return ", ".join(f"{row.category.name}: {row.position}" for row in rows if row.position) or "---"
+
 
 class BaseSingleResultAdmin(BaseResultAdminMixin, admin.ModelAdmin):
     # Displaying result_1, result_2, result_3 - assuming they exist on the model
@@ -510,42 +463,42 @@ class BaseSingleResultAdmin(BaseResultAdminMixin, admin.ModelAdmin):
         "result_3", # Should exist on BaseSingleAttemptResult model
         "get_max_result_display",
         "get_bw_percentage_display",
-        "position",
         "get_player_categories",
     )
     list_display_links = ("get_player_name",)
-    list_filter = ("player__categories", "position", ("player__weight", admin.EmptyFieldListFilter))
+    list_filter = ("player__categories", ("player__weight", admin.EmptyFieldListFilter))
     search_fields = ("player__name", "player__surname", "player__club__name")
-    readonly_fields = ("position", "get_max_result_display", "get_bw_percentage_display", "get_player_categories")
+    readonly_fields = ("get_category_positions", "get_max_result_display", "get_bw_percentage_display", "get_player_categories")
     list_select_related = ("player", "player__club")
     fields = (
         "player",
         "result_1", # Should exist on BaseSingleAttemptResult model
         "result_2", # Should exist on BaseSingleAttemptResult model
         "result_3", # Should exist on BaseSingleAttemptResult model
-        "position",
+        "get_category_positions",
         "get_max_result_display",
         "get_bw_percentage_display",
         "get_player_categories",
     )
     autocomplete_fields = ("player",)
-    ordering = ('position', 'player__surname', 'player__name')
+    ordering = ('player__surname', 'player__name')
 
     def save_model(self, request, obj, form, change):
-        """Po zapisaniu wyniku, przelicz wyniki dla powiązanego zawodnika."""
+        """
+        Zapisuje wynik. Ranking przelicza sygnał post_save po zatwierdzeniu transakcji
+        (przyrostowo, na podstawie wyniku sprzed zapisu) - drugie, synchroniczne
+        przeliczenie tutaj przesunęłoby pozycje podwójnie. Zmienione próby dostają wersję,
+        żeby spóźnione zgłoszenie sędziego sprzed tej poprawki jej nie nadpisało.
+        """
         super().save_model(request, obj, form, change)
         player = getattr(obj, 'player', None)
         if player:
-            try:
-                print(f"[Admin {self.__class__.__name__} save_model] Zapisano wynik dla gracza {player.id}. Uruchamiam przeliczanie...")
-                # Uruchom pełną aktualizację dla zawodnika - to przeliczy wszystkie jego kategorie
-                update_overall_results_for_player(player)
-                print(f"[Admin {self.__class__.__name__} save_model] Zakończono przeliczanie dla gracza {player.id}.")
-                self.message_user(request, f"Wyniki dla zawodnika {player} zostały przeliczone.", level="INFO")
-            except Exception as e:
-                print(f"[Admin {self.__class__.__name__} save_model] BŁĄD podczas przeliczania wyników dla gracza {player.id}: {e}")
-                traceback.print_exc()
-                self.message_user(request, f"Wystąpił błąd podczas przeliczania wyników dla gracza {player}: {e}", level="ERROR")
+            record_attempt_versions(player.id, DISCIPLINE_BY_MODEL[type(obj)], form.changed_data)
+            logger.info(
+                "[Admin %s save_model] Zapisano wynik dla gracza %s. Przeliczenie po zatwierdzeniu zapisu.",
+                self.__class__.__name__, player.id,
+            )
+            self.message_user(request, f"Wyniki dla zawodnika {player} zostały zapisane i zostaną przeliczone.", level="INFO")
         else:
              print(f"[Admin {self.__class__.__name__} save_model] Nie znaleziono gracza dla obiektu {obj}. Pomijam przeliczanie.")
 
@@ -568,7 +521,7 @@ class BaseSingleResultAdmin(BaseResultAdminMixin, admin.ModelAdmin):
         else:
             return super().response_change(request, obj)
 
-    @admin.display(description=_("Max Wynik"))
+    @admin.display(description=_("Max Wynik"), ordering="best_result")
     def get_max_result_display(self, obj) -> str:
         # Assuming 'max_result' property exists on BaseSingleAttemptResult model
         max_res = getattr(obj, "max_result", None)
@@ -593,40 +546,35 @@ class SnatchResultAdmin(BaseResultAdminMixin, admin.ModelAdmin):
         "kettlebell_weight",
         "repetitions",
         "get_snatch_score_admin",
-        "position",
         "get_player_categories",
     )
     list_display_links = ("get_player_name",)
-    list_filter = ("player__categories", "position", ("kettlebell_weight", admin.AllValuesFieldListFilter))
+    list_filter = ("player__categories", ("kettlebell_weight", admin.AllValuesFieldListFilter))
     search_fields = ("player__name", "player__surname", "player__club__name")
-    readonly_fields = ("position", "get_player_categories", "get_snatch_score_admin")
+    readonly_fields = ("get_category_positions", "get_player_categories", "get_snatch_score_admin")
     fields = (
         "player",
         "kettlebell_weight",
         "repetitions",
-        "position",
+        "get_category_positions",
         "get_snatch_score_admin",
         "get_player_categories",
     )
     list_select_related = ("player", "player__club")
     autocomplete_fields = ("player",)
-    ordering = ('position', 'player__surname', 'player__name')
+    ordering = ('player__surname', 'player__name')
 
     def save_model(self, request, obj: SnatchResult, form, change):
-        """Po zapisaniu wyniku Snatch, przelicz wyniki dla powiązanego zawodnika."""
+        """Zapisuje wynik Snatch i wersje zmienionych prób; ranking przelicza sygnał post_save (jak w BaseSingleResultAdmin)."""
         super().save_model(request, obj, form, change)
         player = getattr(obj, 'player', None)
         if player:
-            try:
-                print(f"[Admin SnatchResultAdmin save_model] Zapisano wynik dla gracza {player.id}. Uruchamiam przeliczanie...")
-                # Uruchom pełną aktualizację dla zawodnika
-                update_overall_results_for_player(player)
-                print(f"[Admin SnatchResultAdmin save_model] Zakończono przeliczanie dla gracza {player.id}.")
-                self.message_user(request, f"Wyniki dla zawodnika {player} zostały przeliczone.", level="INFO")
-            except Exception as e:
-                print(f"[Admin SnatchResultAdmin save_model] BŁĄD podczas przeliczania wyników dla gracza {player.id}: {e}")
-                traceback.print_exc()
-                self.message_user(request, f"Wystąpił błąd podczas przeliczania wyników dla gracza {player}: {e}", level="ERROR")
+            record_attempt_versions(player.id, SNATCH, form.changed_data)
+            logger.info(
+                "[Admin SnatchResultAdmin save_model] Zapisano wynik dla gracza %s. Przeliczenie po zatwierdzeniu zapisu.",
+                player.id,
+            )
+            self.message_user(request, f"Wyniki dla zawodnika {player} zostały zapisane i zostaną przeliczone.", level="INFO")
         else:
             print(f"[Admin SnatchResultAdmin save_model] Nie znaleziono gracza dla obiektu {obj}. Pomijam przeliczanie.")
 
@@ -655,22 +603,11 @@ class SnatchResultAdmin(BaseResultAdminMixin, admin.ModelAdmin):
     def get_player_categories(self, obj: SnatchResult) -> str:
         return get_player_categories_display(obj)
 
-    @admin.display(description=_("Wynik (obl.)"), ordering="calculated_snatch_score")
+    @admin.display(description=_("Wynik (obl.)"), ordering="score")
     def get_snatch_score_admin(self, obj: SnatchResult) -> str:
         score = getattr(obj, "result", None)
         return f"{score:.1f}" if score is not None else "---"
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        qs = qs.annotate(
-            calculated_snatch_score=Case(
-                When(kettlebell_weight__gt=0, repetitions__gt=0, then=F("kettlebell_weight") * F("repetitions")),
-                default=Value(0.0),
-                output_field=FloatField(),
-            )
-        )
-        return qs
-
 
 @admin.register(TGUResult)
 class TGUResultAdmin(BaseSingleResultAdmin):
@@ -740,10 +677,15 @@ class CategoryOverallResultAdmin(admin.ModelAdmin):
         "final_position",
     )
     list_select_related = ("player", "player__club")
-    list_prefetch_related = ("player__categories",)
     list_filter = ("category", "final_position")
     search_fields = ("player__name", "player__surname", "player__club__name")
-    actions = ["export_overall_results_as_html"]
+    actions = [
+        "export_overall_results_as_html", "export_overall_results_as_csv", "export_overall_results_as_xlsx"
+    ]
+
+    def get_queryset(self, request):
+        # Kategorie zawodnika (kolumna listy) jednym zapytaniem zamiast jednego na wiersz
+        return super().get_queryset(request).prefetch_related("player__categories")
 
     def has_add_permission(self, request):
         return False
@@ -752,64 +694,30 @@ class CategoryOverallResultAdmin(admin.ModelAdmin):
         return False
 
 
-    # Define the points mapping first
-    DISCIPLINE_POINTS_FIELDS = {
-        SNATCH: "snatch_points",
-        TGU: "tgu_points",
-        KB_SQUAT: "kb_squat_points",
-        ONE_KB_PRESS: "one_kb_press_points",
-        TWO_KB_PRESS: "two_kb_press_points",
-    }
-
-    # Define ordered codes based ONLY on the imported constant
-    # We will filter this list inside the method below
-    ORDERED_DISCIPLINE_CODES = [code for code, name in AVAILABLE_DISCIPLINES]
+    DISCIPLINE_POINTS_FIELDS = DISCIPLINE_POINTS_FIELDS
 
     @admin.action(description=_("Eksportuj podsumowanie wyników do HTML"))
     def export_overall_results_as_html(self, request, queryset):
-        results = (
-            queryset.select_related("player", "player__club")
-            .prefetch_related("player__categories")
-            .order_by("final_position", "total_points")
-        )
-
-        if not results.exists():
+        if not queryset.exists():
             self.message_user(request, _("Brak wyników do wyeksportowania."), level="INFO")
             return
 
-        discipline_columns = []
-        # Filter the codes *inside* the method using the defined points fields
-        for code in self.ORDERED_DISCIPLINE_CODES:
-            if code in self.DISCIPLINE_POINTS_FIELDS: # Filter using the class attribute
-                discipline_columns.append(
-                    {
-                        "code": code,
-                        "name": dict(AVAILABLE_DISCIPLINES).get(code, code),
-                        "field_name": self.DISCIPLINE_POINTS_FIELDS[code], # Access via self
-                    }
-                )
-
-        table_rows = []
-        for result in results:
-            table_rows.append(
-                {
-                    "result": result,
-                    "categories_str": ", ".join([c.name for c in result.player.categories.all()])
-                    if result.player.categories.exists()
-                    else "---",
-                }
-            )
+        return html_export_response(stream_overall_results_html(queryset))
 
-        context = {
-            "title": _("Podsumowanie Wyników Ogólnych"),
-            "results_with_cats": table_rows,
-            "discipline_columns": discipline_columns, # Use the filtered list
-        }
+    @admin.action(description=_("Eksportuj podsumowanie wyników do CSV"))
+    def export_overall_results_as_csv(self, request, queryset):
+        return self._export_overall_table(request, queryset, "csv")
 
-        html_content = render_to_string("admin/live_results/categoryoverallresult/overall_export.html", context)
+    @admin.action(description=_("Eksportuj podsumowanie wyników do XLSX"))
+    def export_overall_results_as_xlsx(self, request, queryset):
+        return self._export_overall_table(request, queryset, "xlsx")
 
-        response = HttpResponse(html_content, content_type="text/html; charset=utf-8")
-        return response
+    def _export_overall_table(self, request, queryset, file_format: str):
+        headers, rows = overall_results_table(queryset)
+        try:
+            return table_export_response(headers, rows, file_format, "podsumowanie-wynikow")
+        except RuntimeError as e: # XLSX bez openpyxl
+            self.message_user(request, str(e), level="ERROR")
 
     @admin.display(description=_("Zawodnik"), ordering="player__surname")
     def player_link(self, obj: CategoryOverallResult):
@@ -819,6 +727,22 @@ class CategoryOverallResultAdmin(admin.ModelAdmin):
     def get_player_categories_display(self, obj: CategoryOverallResult) -> str:
         return get_player_categories_display(obj.player)
 
+@admin.register(CategoryDisciplineResult)
+class CategoryDisciplineResultAdmin(admin.ModelAdmin):
+    """Podgląd pozycji w dyscyplinach - tabelę wypełnia przeliczanie rankingu, stąd tylko odczyt."""
+    list_display = ("player", "category", "discipline", "score", "position")
+    list_filter = ("category", "discipline")
+    search_fields = ("player__name", "player__surname", "category__name")
+    list_select_related = ("player", "category")
+    ordering = ("category", "discipline", "position")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(PlayerCategoryTiebreak)
 class PlayerCategoryTiebreakAdmin(admin.ModelAdmin):
     list_display = ('player', 'category')
@@ -834,7 +758,7 @@ class PlayerCategoryTiebreakAdmin(admin.ModelAdmin):
         if player:
             try:
                 print(f"[Admin PlayerCategoryTiebreakAdmin save_model] Zapisano tiebreak dla gracza {player.id} w kat {obj.category.id}. Uruchamiam przeliczanie...")
-                update_overall_results_for_player(player) # Przelicz dla gracza
+                schedule_category_recalculation(obj.category) # Przelicz kategorię tiebreaku
                 print(f"[Admin PlayerCategoryTiebreakAdmin save_model] Zakończono przeliczanie dla gracza {player.id}.")
                 self.message_user(request, f"Wyniki dla zawodnika {player} zostały przeliczone po zmianie tiebreak.", level="INFO")
             except Exception as e:
@@ -849,7 +773,7 @@ class PlayerCategoryTiebreakAdmin(admin.ModelAdmin):
         if player:
              try:
                 print(f"[Admin PlayerCategoryTiebreakAdmin delete_model] Usunięto tiebreak dla gracza {player.id} w kat {obj.category.id}. Uruchamiam przeliczanie...")
-                update_overall_results_for_player(player) # Przelicz dla gracza
+                schedule_category_recalculation(obj.category) # Przelicz kategorię tiebreaku
                 print(f"[Admin PlayerCategoryTiebreakAdmin delete_model] Zakończono przeliczanie dla gracza {player.id}.")
                 self.message_user(request, f"Wyniki dla zawodnika {player} zostały przeliczone po usunięciu tiebreak.", level="INFO")
              except Exception as e:
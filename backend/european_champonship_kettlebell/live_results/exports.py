@@ -0,0 +1,525 @@
+"""
+Eksport tabel wyników do plików: akcje admina (HTML/CSV/XLSX wysyłane strumieniowo) i statyczna kopia
+wyników dla nginx.
+
+export_static_site zapisuje tabele wszystkich kategorii (JSON jak w API i HTML z szablonów eksportu admina)
+do katalogu serwowanego bezpośrednio przez nginx - w szczycie ruchu publiczne żądania omijają Django,
+a ten sam katalog jest archiwum wyników, gdy serwer aplikacji nie działa. Kolejne uruchomienia
+generują ponownie tylko kategorie, których rewizja tabeli wyników (Category.revision) się zmieniła.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import tablib
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.http import FileResponse, StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.translation import gettext_lazy as _
+
+from .models import Category, CategoryDisciplineResult, CategoryLeaderboardSnapshot, CategoryOverallResult, Player
+from .models.constants import AVAILABLE_DISCIPLINES, KB_SQUAT, ONE_KB_PRESS, SNATCH, TGU, TWO_KB_PRESS
+from .renderers import ORJSONRenderer
+from .resources import PlayerExportResource
+from .serializers import CategorySerializer
+from .services import build_leaderboard_payload, compress_leaderboard_payload
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError: # Windows - eksporty nie są wtedy serializowane między procesami
+    fcntl = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+CATEGORY_EXPORT_TEMPLATE = "admin/live_results/category/results_export_detailed.html"
+OVERALL_EXPORT_TEMPLATE = "admin/live_results/categoryoverallresult/overall_export.html"
+CATEGORY_EXPORT_ROW_TEMPLATE = "admin/live_results/category/results_export_detailed_row.html"
+OVERALL_EXPORT_ROW_TEMPLATE = "admin/live_results/categoryoverallresult/overall_export_row.html"
+
+# Updated DISCIPLINE_RELATED_NAMES based on comments and changes
+DISCIPLINE_RELATED_NAMES = {
+    SNATCH: "snatch_result",
+    TGU: "tgu_result",
+    # SEE_SAW_PRESS: "see_saw_press_result", # Commented out
+    KB_SQUAT: "kb_squat_one_result", # Changed related name [cite: 1]
+    # PISTOL_SQUAT: "pistol_squat_result", # Commented out
+    ONE_KB_PRESS: "one_kettlebell_press_result",
+    TWO_KB_PRESS: "two_kettlebell_press_one_result", # Changed related name [cite: 3]
+}
+# Updated DISCIPLINE_EXPORT_CONFIG based on comments and changes
+DISCIPLINE_EXPORT_CONFIG = {
+    SNATCH: {
+        "header": "Snatch (kg x reps / wynik)",
+        "attributes": ["kettlebell_weight", "repetitions", "result"],
+        "template_snippet": "admin/live_results/category/export_snippets/snatch.html",
+    },
+    TGU: {
+        "header": "TGU (max kg / %BW)",
+        "attributes": ["max_result", "bw_percentage"],
+        "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html",
+    },
+    # PISTOL_SQUAT: { # Commented out
+    #     "header": "Pistol (max kg / %BW)",
+    #     "attributes": ["max_result", "bw_percentage"],
+    #     "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html",
+    # },
+    ONE_KB_PRESS: {
+        "header": "OH Press (max kg / %BW)",
+        "attributes": ["max_result", "bw_percentage"],
+        "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html",
+    },
+    # SEE_SAW_PRESS: { # Commented out
+    #     "header": "SeeSaw Press (max kg / %BW)",
+    #     "attributes": ["max_score", "bw_percentage"],
+    #     "template_snippet": "admin/live_results/category/export_snippets/double_attempt.html",
+    # },
+    KB_SQUAT: { # Changed base class implies single attempt logic
+        "header": "KB Squat (max kg / %BW)",
+        "attributes": ["max_result", "bw_percentage"], # Changed attributes
+        "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html", # Changed template
+    },
+    TWO_KB_PRESS: { # Changed base class implies single attempt logic
+        "header": "2KB Press (max kg / %BW)",
+        "attributes": ["max_result", "bw_percentage"], # Changed attributes
+        "template_snippet": "admin/live_results/category/export_snippets/single_attempt.html", # Changed template
+    },
+}
+# Kolumny punktów w podsumowaniu wyników ogólnych, w kolejności AVAILABLE_DISCIPLINES
+DISCIPLINE_POINTS_FIELDS = {
+    SNATCH: "snatch_points",
+    TGU: "tgu_points",
+    KB_SQUAT: "kb_squat_points",
+    ONE_KB_PRESS: "one_kb_press_points",
+    TWO_KB_PRESS: "two_kb_press_points",
+}
+
+
+def get_player_categories_display(obj) -> str:
+    """Helper function to display player categories in admin panel"""
+    player = getattr(obj, "player", None)
+    target_player = obj if isinstance(obj, Player) else player
+    if target_player and hasattr(target_player, "categories"):
+        # all() zamiast exists() - korzysta z prefetch_related, bez dodatkowego zapytania na wiersz
+        category_names = [c.name for c in target_player.categories.all()]
+        if category_names:
+            return ", ".join(category_names)
+    return "---"
+
+
+def category_discipline_columns(disciplines) -> list[dict]:
+    """Kolumny dyscyplin eksportu szczegółowych wyników (konfiguracja i related_name wyniku zawodnika)."""
+    discipline_columns = []
+    for code in sorted(disciplines):
+        if code in DISCIPLINE_EXPORT_CONFIG and code in DISCIPLINE_RELATED_NAMES:
+            config = DISCIPLINE_EXPORT_CONFIG[code]
+            discipline_columns.append(
+                {
+                    "code": code,
+                    "header": config["header"],
+                    "attributes": config["attributes"],
+                    "related_name": DISCIPLINE_RELATED_NAMES[code],
+                    "template_snippet": config.get("template_snippet"),
+                }
+            )
+        else:
+            logger.warning("Missing export configuration or related_name for discipline '%s'", code)
+    return discipline_columns
+
+
+def iter_category_result_rows(category: Category, discipline_columns: list[dict]) -> Iterator[dict]:
+    """
+    Wiersze szczegółowych wyników kategorii w kolejności miejsc, czytane porcjami (iterator) - pamięć nie
+    rośnie z liczbą zawodników. Jedno zapytanie na porcję: wyniki dyscyplin dołączane JOIN-em (odwrotne
+    OneToOne), pozycje w dyscyplinach jako podzapytania.
+    """
+    queryset = (
+        CategoryOverallResult.objects.filter(category=category)
+        .select_related(
+            "player", "player__club", *(f"player__{column['related_name']}" for column in discipline_columns)
+        )
+        .annotate(
+            **{
+                f"position_{column['code']}": Subquery(
+                    CategoryDisciplineResult.objects.filter(
+                        category=category, player=OuterRef("player"), discipline=column["code"]
+                    ).values("position")[:1]
+                )
+                for column in discipline_columns
+            }
+        )
+        .order_by("final_position", "id")
+    )
+    for overall in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        player = overall.player
+        yield {
+            "position": overall.final_position,
+            "player": player,
+            "club_name": player.club.name if player.club else "brak klubu",
+            "total_points": overall.total_points,
+            "discipline_results": {
+                column["code"]: getattr(player, column["related_name"], None) for column in discipline_columns
+            },
+            "discipline_positions": {
+                column["code"]: getattr(overall, f"position_{column['code']}") for column in discipline_columns
+            },
+        }
+
+
+def category_export_context(category: Category) -> dict | None:
+    """Kontekst szablonu szczegółowych wyników kategorii; None, gdy kategoria nie ma jeszcze wyników."""
+    discipline_columns = category_discipline_columns(category.get_disciplines())
+    table_rows = list(iter_category_result_rows(category, discipline_columns))
+    if not table_rows:
+        return None
+    return {"category": category, "discipline_columns": discipline_columns, "table_rows": table_rows}
+
+
+def overall_discipline_columns() -> list[dict]:
+    """Kolumny punktów dyscyplin w podsumowaniu wyników ogólnych."""
+    return [
+        {"code": code, "name": name, "field_name": DISCIPLINE_POINTS_FIELDS[code]}
+        for code, name in AVAILABLE_DISCIPLINES
+        if code in DISCIPLINE_POINTS_FIELDS
+    ]
+
+
+def iter_overall_result_rows(results) -> Iterator[dict]:
+    """Wiersze podsumowania (queryset CategoryOverallResult) czytane porcjami, z kategoriami zawodnika."""
+    results = (
+        results.select_related("category", "player", "player__club")
+        .prefetch_related("player__categories")
+        .order_by("final_position", "total_points", "id")
+    )
+    for result in results.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield {"result": result, "categories_str": get_player_categories_display(result.player)}
+
+
+def overall_export_context(results) -> dict | None:
+    """Kontekst szablonu podsumowania wyników ogólnych (queryset CategoryOverallResult); None, gdy pusty."""
+    rows = list(iter_overall_result_rows(results))
+    if not rows:
+        return None
+    return {
+        "title": _("Podsumowanie Wyników Ogólnych"),
+        "results_with_cats": rows,
+        "discipline_columns": overall_discipline_columns(),
+    }
+
+
+# --- Eksporty strumieniowe (admin: HTML, CSV, XLSX) ---
+# Wiersze są czytane z bazy porcjami po EXPORT_CHUNK_SIZE i od razu wysyłane (StreamingHttpResponse):
+# pierwszy bajt odpowiedzi wychodzi przed pierwszym zapytaniem o wiersze, a pamięć nie zależy od
+# liczby wierszy. XLSX (archiwum zip) nie da się wysyłać w trakcie budowania - arkusz jest zapisywany
+# wierszami w trybie write_only openpyxl do pliku tymczasowego i wysyłany z niego porcjami.
+EXPORT_CHUNK_SIZE = 500
+STREAM_ROWS_MARKER = "<!-- wiersze -->"  # miejsce wierszy w szablonie renderowanym ze streaming=True
+EXPORT_FORMATS = ("csv", "xlsx")
+
+
+def _chunked(rows: Iterable, size: int = EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _stream_html(
+    template_name: str, row_template_name: str, context: dict, row_name: str, rows: Iterable
+) -> Iterator[str]:
+    """Nagłówek strony, wiersze renderowane porcjami szablonem wiersza i stopka."""
+    head, tail = render_to_string(template_name, {**context, "streaming": True}).split(STREAM_ROWS_MARKER)
+    yield head
+    row_template = get_template(row_template_name)
+    for chunk in _chunked(rows):
+        yield "".join(row_template.render({**context, row_name: row}) for row in chunk)
+    yield tail
+
+
+def stream_category_results_html(category: Category) -> Iterator[str]:
+    """Szczegółowe wyniki kategorii jako HTML wysyłany porcjami (ten sam wygląd co eksport z admina)."""
+    discipline_columns = category_discipline_columns(category.get_disciplines())
+    return _stream_html(
+        CATEGORY_EXPORT_TEMPLATE,
+        CATEGORY_EXPORT_ROW_TEMPLATE,
+        {"category": category, "discipline_columns": discipline_columns},
+        "row",
+        iter_category_result_rows(category, discipline_columns),
+    )
+
+
+def stream_overall_results_html(results) -> Iterator[str]:
+    """Podsumowanie wyników ogólnych (queryset CategoryOverallResult) jako HTML wysyłany porcjami."""
+    return _stream_html(
+        OVERALL_EXPORT_TEMPLATE,
+        OVERALL_EXPORT_ROW_TEMPLATE,
+        {"title": _("Podsumowanie Wyników Ogólnych"), "discipline_columns": overall_discipline_columns()},
+        "row_data",
+        iter_overall_result_rows(results),
+    )
+
+
+def category_results_table(categories) -> tuple[list[str], Iterator[list]]:
+    """
+    Szczegółowe wyniki kategorii do CSV/XLSX: nagłówki i leniwie generowane wiersze. Kolumny dyscyplin
+    to suma dyscyplin wybranych kategorii; w kategorii bez danej dyscypliny komórki są puste.
+    """
+    categories = list(categories)
+    discipline_columns = category_discipline_columns(
+        {code for category in categories for code in category.get_disciplines()}
+    )
+    headers = ["Kategoria", "Miejsce", "Nazwisko", "Imię", "Klub"]
+    for column in discipline_columns:
+        headers += [f"{column['code']} {attribute}" for attribute in column["attributes"]]
+        headers.append(f"{column['code']} pozycja")
+    headers.append("Suma pkt")
+
+    def rows():
+        for category in categories:
+            disciplines = set(category.get_disciplines())
+            for row in iter_category_result_rows(category, discipline_columns):
+                player = row["player"]
+                values = [category.name, row["position"], player.surname, player.name, row["club_name"]]
+                for column in discipline_columns:
+                    result = row["discipline_results"][column["code"]] if column["code"] in disciplines else None
+                    values += [getattr(result, attribute, None) for attribute in column["attributes"]]
+                    position = row["discipline_positions"][column["code"]] if column["code"] in disciplines else None
+                    values.append(position)
+                values.append(row["total_points"])
+                yield values
+
+    return headers, rows()
+
+
+def overall_results_table(results) -> tuple[list[str], Iterator[list]]:
+    """Podsumowanie wyników ogólnych (queryset CategoryOverallResult) do CSV/XLSX."""
+    discipline_columns = overall_discipline_columns()
+    headers = (
+        ["Kategoria", "Miejsce", "Nazwisko", "Imię", "Klub", "Kategorie zawodnika"]
+        + [f"Pkt {column['name']}" for column in discipline_columns]
+        + ["Pkt Tiebreak", "Suma pkt"]
+    )
+
+    def rows():
+        for row in iter_overall_result_rows(results):
+            result, player = row["result"], row["result"].player
+            yield (
+                [result.category.name, result.final_position, player.surname, player.name]
+                + [player.club.name if player.club else None, row["categories_str"]]
+                + [getattr(result, column["field_name"]) for column in discipline_columns]
+                + [result.tiebreak_points, result.total_points]
+            )
+
+    return headers, rows()
+
+
+def players_table(players) -> tuple[list[str], Iterator[list]]:
+    """Zawodnicy (queryset Player) do CSV/XLSX - te same kolumny co eksport django-import-export."""
+    resource = PlayerExportResource()
+    players = players.select_related("club").prefetch_related("categories").order_by("surname", "name", "id")
+    rows = (resource.export_resource(player) for player in players.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    return resource.get_export_headers(), rows
+
+
+def stream_csv(headers: list[str], rows: Iterable[list]) -> Iterator[str]:
+    """CSV porcjami: nagłówek od razu, potem po jednym zbiorze tablib na EXPORT_CHUNK_SIZE wierszy."""
+    yield tablib.Dataset(headers=headers).export("csv")
+    for chunk in _chunked(rows):
+        yield tablib.Dataset(*chunk).export("csv")
+
+
+def write_xlsx(headers: list[str], rows: Iterable[list], title: str):
+    """Arkusz XLSX zapisany wierszami (openpyxl write_only) do pliku tymczasowego; zwraca plik od początku."""
+    if openpyxl is None:
+        raise RuntimeError("Eksport XLSX wymaga pakietu openpyxl (pip install openpyxl).")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31]) # Excel: najwyżej 31 znaków nazwy arkusza
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    file = tempfile.TemporaryFile()
+    workbook.save(file)
+    file.seek(0)
+    return file
+
+
+def table_export_response(headers: list[str], rows: Iterable[list], file_format: str, filename: str):
+    """Odpowiedź z plikiem CSV (strumień) albo XLSX (plik tymczasowy wysyłany porcjami)."""
+    if file_format == "xlsx":
+        return FileResponse(
+            write_xlsx(headers, rows, filename),
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    response = StreamingHttpResponse(stream_csv(headers, rows), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def html_export_response(stream: Iterator[str]) -> StreamingHttpResponse:
+    return StreamingHttpResponse(stream, content_type="text/html; charset=utf-8")
+
+
+# --- Statyczna kopia wyników ---
+# Układ katalogu (nginx: root <katalog>; gzip_static on; brotli_static on; try_files $uri $uri/index.html):
+#   categories.json                          - lista kategorii jak GET /api/categories/
+#   categories/<id>/results.json (.gz, .br)  - tabela wyników jak GET /api/categories/<id>/results/
+#   categories/<id>/index.html               - szczegółowe wyniki kategorii (szablon eksportu z admina)
+#   overall.html                             - podsumowanie wyników ogólnych wszystkich kategorii
+#   manifest.json                            - rewizje zapisanych kategorii (podstawa eksportu przyrostowego)
+MANIFEST_NAME = "manifest.json"
+
+
+def _write_file(path: Path, content: bytes) -> None:
+    """Zapis przez plik tymczasowy i os.replace - nginx nigdy nie poda pliku zapisanego w połowie."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(content)
+        os.chmod(temporary, 0o644) # mkstemp tworzy plik 0600, a nginx działa jako inny użytkownik
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _remove_file(path: Path) -> None:
+    if path.exists():
+        path.unlink()
+
+
+@contextmanager
+def _export_lock(output_dir: Path):
+    """Jeden eksport naraz na katalog (np. po przeliczeniach w kilku procesach serwera)."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / ".lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _read_manifest(output_dir: Path) -> dict[int, int]:
+    try:
+        revisions = json.loads((output_dir / MANIFEST_NAME).read_text(encoding="utf-8"))["revisions"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+    return {int(category_id): revision for category_id, revision in revisions.items()}
+
+
+def _export_category(output_dir: Path, category: Category, snapshot: dict | None) -> None:
+    directory = output_dir / "categories" / str(category.id)
+    if snapshot is not None:
+        payload, compressed = snapshot["payload"], snapshot
+    else: # kategoria jeszcze nieprzeliczona - tabela budowana tak jak przez endpoint wyników
+        payload = build_leaderboard_payload(category.id)
+        compressed = compress_leaderboard_payload(payload)
+    _write_file(directory / "results.json", payload.encode("utf-8"))
+    for field_name, suffix in (("payload_gzip", ".gz"), ("payload_brotli", ".br")):
+        if compressed.get(field_name) is not None:
+            _write_file(directory / f"results.json{suffix}", bytes(compressed[field_name]))
+        else:
+            _remove_file(directory / f"results.json{suffix}") # nie zostawiać starszej skompresowanej wersji
+
+    # Szablon sam pokazuje "brak wyników" dla pustej tabeli
+    context = category_export_context(category) or {"category": category, "discipline_columns": [], "table_rows": []}
+    _write_file(directory / "index.html", render_to_string(CATEGORY_EXPORT_TEMPLATE, context).encode("utf-8"))
+
+
+def export_static_site(output_dir, category_ids=None, force: bool = False) -> dict:
+    """
+    Zapisuje statyczną kopię wyników do `output_dir` (układ opisany wyżej).
+
+    Eksportowane są kategorie z `category_ids` (domyślnie wszystkie), których Category.revision różni się
+    od zapisanej w manifeście (albo wszystkie przy force=True); overall.html i categories.json są
+    odświeżane, gdy cokolwiek się zmieniło. Przy pełnym eksporcie usuwane są katalogi kategorii,
+    których już nie ma. Rewizja jest czytana przed renderowaniem, więc zmiana w trakcie eksportu
+    zostanie wyeksportowana przy następnym uruchomieniu.
+    Zwraca {"exported", "unchanged", "removed"} - listy id kategorii.
+    """
+    output_dir = Path(output_dir)
+    with _export_lock(output_dir):
+        manifest = _read_manifest(output_dir)
+        categories = Category.objects.order_by("name")
+        if category_ids is not None:
+            categories = categories.filter(pk__in=category_ids)
+        categories = list(categories)
+
+        changed = [
+            category
+            for category in categories
+            if force
+            or manifest.get(category.id) != category.revision
+            or not (output_dir / "categories" / str(category.id) / "index.html").exists()
+        ]
+        snapshots = {
+            snapshot["category_id"]: snapshot
+            for snapshot in CategoryLeaderboardSnapshot.objects.filter(
+                category_id__in=[category.id for category in changed]
+            ).values("category_id", "payload", "payload_gzip", "payload_brotli")
+        }
+        for category in changed:
+            _export_category(output_dir, category, snapshots.get(category.id))
+            manifest[category.id] = category.revision
+
+        removed = []
+        if category_ids is None:
+            existing = {category.id for category in categories}
+            removed = sorted(category_id for category_id in manifest if category_id not in existing)
+            for category_id in removed:
+                shutil.rmtree(output_dir / "categories" / str(category_id), ignore_errors=True)
+                del manifest[category_id]
+
+        if changed or removed or force or not (output_dir / "overall.html").exists():
+            context = overall_export_context(CategoryOverallResult.objects.all())
+            overall_html = render_to_string(
+                OVERALL_EXPORT_TEMPLATE,
+                context or {"title": _("Podsumowanie Wyników Ogólnych"), "results_with_cats": []},
+            )
+            _write_file(output_dir / "overall.html", overall_html.encode("utf-8"))
+            category_list = CategorySerializer(Category.objects.order_by("name"), many=True).data
+            _write_file(output_dir / "categories.json", ORJSONRenderer().render(category_list))
+            _write_file(
+                output_dir / MANIFEST_NAME,
+                json.dumps({"revisions": {str(key): value for key, value in sorted(manifest.items())}}).encode("utf-8"),
+            )
+
+    exported = [category.id for category in changed]
+    logger.info("Eksport statyczny %s: wyeksportowane kategorie: %s, usunięte: %s", output_dir, exported, removed)
+    return {
+        "exported": exported,
+        "unchanged": [category.id for category in categories if category not in changed],
+        "removed": removed,
+    }
+
+
+def refresh_static_export() -> dict | None:
+    """
+    Odświeża statyczną kopię w settings.STATIC_EXPORT_DIR (gdy ustawiony): jeden przebieg export_static_site
+    dla wszystkich kategorii przeliczonych od poprzedniego. Wywoływane poza ścieżką żądań - przez
+    run_recalc_worker po przeliczeniu kolejki i export_static_site --interval. Błąd jest tylko logowany.
+    """
+    output_dir = getattr(settings, "STATIC_EXPORT_DIR", None)
+    if not output_dir:
+        return None
+    try:
+        return export_static_site(output_dir)
+    except Exception:
+        logger.exception("Błąd eksportu statycznego do %s", output_dir)
+        return None
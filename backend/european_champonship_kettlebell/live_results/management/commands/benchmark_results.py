@@ -0,0 +1,191 @@
+import contextlib
+import io
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+
+import django
+from django.contrib.admin.sites import site as admin_site
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.test import APIRequestFactory
+
+from ...admin import CategoryAdmin, CategoryOverallResultAdmin
+from ...models.category import Category
+from ...models.player import Player
+from ...models.results.overall import CategoryOverallResult
+from ...services import (
+    recalculate_category,
+    update_discipline_positions,
+    update_overall_results_for_category,
+    update_overall_results_for_player,
+)
+from ...views import CategoryViewSet
+from .populate_players import generate_event
+
+DEFAULT_SIZES = "100,1000,10000"
+# Players sampled for update_overall_results_for_player (it recalculates all categories of a player)
+PLAYER_SAMPLE_SIZE = 5
+# Relative slowdown (median) reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.2
+
+
+class _QueryCounter:
+    """connection.execute_wrapper counting executed queries (no DEBUG query log limits)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class _Rollback(Exception):
+    """Raised to roll back the generated benchmark event."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks ranking recalculation, the category results API endpoint and the admin HTML exports on '
+        'generated events (by default 100, 1,000 and 10,000 athletes). Data is created with the populate_players '
+        'factories inside a transaction that is rolled back, and timings are written to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default=DEFAULT_SIZES, help=f'Comma-separated athlete counts (default: {DEFAULT_SIZES})')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per operation; the median is reported (default: 3)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible events (default: 42)')
+        parser.add_argument('--output', type=str, default='benchmark_results.json', help='JSON output path (default: benchmark_results.json)')
+        parser.add_argument('--compare', type=str, default=None, help='Previous JSON output to compare medians against')
+
+    # --- Measurement ---
+
+    def _measure(self, repeat: int, func) -> dict:
+        """Runs func `repeat` times and returns timing statistics (ms) and the query count of one run."""
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter), contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                func()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = counter.count
+        return {
+            "median_ms": round(statistics.median(timings), 2),
+            "min_ms": round(min(timings), 2),
+            "max_ms": round(max(timings), 2),
+            "queries": queries,
+        }
+
+    def _benchmark_size(self, size: int, repeat: int, seed: int) -> dict:
+        categories = generate_event(size, seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for category in categories:
+                recalculate_category(category)
+
+        largest = max(categories, key=lambda category: category.players.count())
+        sample_players = list(Player.objects.filter(categories__in=categories).distinct().order_by('id')[:PLAYER_SAMPLE_SIZE])
+        request_factory = RequestFactory()
+        results_view = CategoryViewSet.as_view({'get': 'results'}, **CategoryViewSet.results.kwargs)
+        api_request_factory = APIRequestFactory()
+        category_admin = CategoryAdmin(Category, admin_site)
+        overall_admin = CategoryOverallResultAdmin(CategoryOverallResult, admin_site)
+
+        def api_results():
+            response = results_view(api_request_factory.get(f'/api/categories/{largest.id}/results/'), pk=largest.id)
+            if hasattr(response, 'render'):  # a stored leaderboard snapshot is served as a plain HttpResponse
+                response.render()
+
+        def read_body(response) -> bytes:
+            # Admin exports stream their rows - the work happens while the body is consumed
+            return b"".join(response.streaming_content) if response.streaming else response.content
+
+        operations = {
+            "update_discipline_positions (all categories)": lambda: [update_discipline_positions(c) for c in categories],
+            "update_overall_results_for_category (all categories)": lambda: [update_overall_results_for_category(c) for c in categories],
+            "recalculate_category (all categories)": lambda: [recalculate_category(c) for c in categories],
+            f"update_overall_results_for_player (x{len(sample_players)})": lambda: [update_overall_results_for_player(p) for p in sample_players],
+            "GET /api/categories/{id}/results/ (largest category)": api_results,
+            "admin export_results_as_html (largest category)": lambda: read_body(category_admin.export_results_as_html(
+                request_factory.get('/admin/'), Category.objects.filter(pk=largest.id)
+            )),
+            "admin export_overall_results_as_html (largest category)": lambda: read_body(
+                overall_admin.export_overall_results_as_html(
+                    request_factory.get('/admin/'), CategoryOverallResult.objects.filter(category=largest)
+                )
+            ),
+        }
+        measured = {}
+        for name, func in operations.items():
+            measured[name] = self._measure(repeat, func)
+            self.stdout.write(f"  {name}: {measured[name]['median_ms']:.1f} ms ({measured[name]['queries']} queries)")
+        return {
+            "athletes": size,
+            "categories": len(categories),
+            "largest_category_athletes": largest.players.count(),
+            "operations": measured,
+        }
+
+    def _compare(self, previous_path: str, current: dict) -> None:
+        try:
+            with open(previous_path, encoding='utf-8') as previous_file:
+                previous = json.load(previous_file)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read benchmark file to compare with '{previous_path}': {e}")
+
+        self.stdout.write(f"Comparison with {previous_path}:")
+        regressions = 0
+        for size, size_results in current["results"].items():
+            previous_operations = previous.get("results", {}).get(size, {}).get("operations", {})
+            for name, stats in size_results["operations"].items():
+                before = previous_operations.get(name)
+                if not before or not before["median_ms"]:
+                    continue
+                change = (stats["median_ms"] - before["median_ms"]) / before["median_ms"]
+                line = f"  [{size}] {name}: {before['median_ms']:.1f} -> {stats['median_ms']:.1f} ms ({change:+.0%})"
+                if change > REGRESSION_THRESHOLD:
+                    regressions += 1
+                    self.stdout.write(self.style.WARNING(line + " REGRESSION"))
+                else:
+                    self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f"{regressions} operations slower by more than {REGRESSION_THRESHOLD:.0%}."))
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers")
+        repeat = max(1, options['repeat'])
+
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "seed": options['seed'],
+                "repeat": repeat,
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+            },
+            "results": {},
+        }
+        for size in sizes:
+            self.stdout.write(f"Benchmarking event with {size} athletes...")
+            try:
+                with transaction.atomic():
+                    report["results"][str(size)] = self._benchmark_size(size, repeat, options['seed'])
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        with open(options['output'], 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Benchmark results written to {options['output']}"))
+
+        if options['compare']:
+            self._compare(options['compare'], report)
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from ...exports import export_static_site
+from ...models.category import Category
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes a static copy of all results pages (JSON leaderboards, detailed category HTML and the overall '
+        'summary) to a directory served by nginx. Only categories whose standings revision changed since the '
+        'previous run are regenerated.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=getattr(settings, 'STATIC_EXPORT_DIR', None),
+            help='Output directory (default: settings.STATIC_EXPORT_DIR)',
+        )
+        parser.add_argument(
+            '--categories',
+            type=str,
+            default=None,
+            help='Comma-separated list of category names or ids to export (default: all categories)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate every selected category, even if its revision did not change.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='Keep running and export changed categories every N seconds (RECALC_MODE="immediate" '
+                 'deployments; in queue mode run_recalc_worker refreshes the copy itself)',
+        )
+
+    def _get_category_ids(self, categories_arg: str | None) -> list[int] | None:
+        if not categories_arg:
+            return None
+        ids_by_key = {}
+        for category_id, name in Category.objects.values_list('id', 'name'):
+            ids_by_key[str(category_id)] = category_id
+            ids_by_key[name] = category_id
+        requested = [item.strip() for item in categories_arg.split(',') if item.strip()]
+        missing = [item for item in requested if item not in ids_by_key]
+        if missing:
+            raise CommandError(f"Categories not found: {', '.join(missing)}")
+        return list(dict.fromkeys(ids_by_key[item] for item in requested))
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError("No output directory: pass --output or set STATIC_EXPORT_DIR.")
+        category_ids = self._get_category_ids(options['categories'])
+
+        force = options['force']
+        try:
+            while True:
+                close_old_connections()
+                started = time.perf_counter()
+                try:
+                    result = export_static_site(options['output'], category_ids=category_ids, force=force)
+                except Exception as e:
+                    if options['interval'] is None:
+                        raise
+                    self.stderr.write(self.style.ERROR(f"Static export failed: {e}"))
+                    time.sleep(options['interval'])
+                    continue
+                if options['interval'] is None or result['exported'] or result['removed']:
+                    self.stdout.write(
+                        f"Summary: {len(result['exported'])} exported, {len(result['unchanged'])} unchanged, "
+                        f"{len(result['removed'])} removed in {time.perf_counter() - started:.2f} s."
+                    )
+                if options['interval'] is None:
+                    break
+                force = False
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Static export stopped.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Static results written to {options['output']}."))
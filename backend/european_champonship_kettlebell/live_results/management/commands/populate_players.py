@@ -5,6 +5,7 @@ from typing import List, Optional, Set
 
 # Third-party imports
 import factory
+import factory.random
 from factory.django import DjangoModelFactory
 from faker import Faker
 
@@ -15,7 +16,8 @@ from django.db import transaction
 from ...models.player import Player
 from ...models.sport_club import SportClub
 from ...models.category import Category
-from ...models.constants import AVAILABLE_DISCIPLINES
+from ...models.constants import AVAILABLE_DISCIPLINES, SNATCH
+from ...services import DISCIPLINE_MODELS_MAP
 
 # --- Faker Instance ---
 fake = Faker('pl_PL')
@@ -74,6 +76,64 @@ class PlayerFactory(DjangoModelFactory):
     weight = 0.0
     club = factory.SubFactory(SportClubFactory)
 
+
+def generate_event(size: int, seed: int, category_names=CATEGORY_NAMES, all_disciplines: bool = False) -> list[Category]:
+    """
+    Creates an event of `size` athletes: one category per name in `category_names` (prefixed with the size,
+    with a random subset of disciplines unless `all_disciplines`), clubs and athletes with filled attempts
+    in all disciplines. Rows are bulk-created, so no signals fire and nothing is ranked yet.
+    Seeded, so the same seed gives the same event.
+    """
+    random.seed(seed)
+    factory.random.reseed_random(seed)
+    fake.seed_instance(seed)
+
+    discipline_codes = [code for code, _name in AVAILABLE_DISCIPLINES]
+    categories = [
+        Category.objects.create(
+            name=f"Benchmark {size} - {name}",
+            disciplines=sorted(
+                discipline_codes
+                if all_disciplines
+                else random.sample(discipline_codes, k=random.randint(3, len(discipline_codes)))
+            ),
+        )
+        for name in category_names
+    ]
+    clubs = [SportClubFactory(name=f"Benchmark Club {index}") for index in range(max(1, size // 50))]
+    players = Player.objects.bulk_create(
+        [
+            PlayerFactory.build(club=random.choice(clubs), weight=round(random.uniform(50.0, 120.0), 1))
+            for _ in range(size)
+        ]
+    )
+
+    memberships = []
+    for player in players:
+        for category in random.sample(categories, k=min(random.choice([1, 1, 1, 2]), len(categories))):
+            memberships.append(Player.categories.through(player_id=player.id, category_id=category.id))
+    Player.categories.through.objects.bulk_create(memberships)
+
+    for discipline, model in DISCIPLINE_MODELS_MAP.items():
+        if discipline == SNATCH:
+            results = [
+                model(player=player, kettlebell_weight=random.choice([12.0, 16.0, 20.0, 24.0]), repetitions=random.randint(20, 150))
+                for player in players
+            ]
+        else:
+            results = [
+                model(
+                    player=player,
+                    result_1=random.choice([0.0, 16.0, 20.0, 24.0, 28.0, 32.0]),
+                    result_2=random.choice([0.0, 20.0, 24.0, 28.0, 32.0, 36.0]),
+                    result_3=random.choice([0.0, 24.0, 28.0, 32.0, 40.0, 48.0]),
+                )
+                for player in players
+            ]
+        model.objects.bulk_create(results, batch_size=1000)
+    return categories
+
+
 class Command(BaseCommand):
     help = 'Populates the database with sample player data using Factory Boy and exports to CSV. By default, uses categories defined in CATEGORY_NAMES constant, ensuring they exist in DB. Use --use-categories to specify others from DB.'
 
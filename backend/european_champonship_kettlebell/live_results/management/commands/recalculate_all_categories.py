@@ -0,0 +1,122 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ...models.category import Category
+from ...services import recalculate_category
+
+
+def _init_worker():
+    """Prepares a pool process: Django setup (spawn start method) and a fresh DB connection."""
+    django.setup()
+    # Each worker opens its own connection on first query.
+    connections.close_all()
+
+
+def _recalculate_category_by_id(category_id: int) -> dict:
+    """Runs in a pool process. Recalculates one category and reports its timing."""
+    started = time.perf_counter()
+    category = Category.objects.get(pk=category_id)
+    try:
+        recalculated = recalculate_category(category)
+        error = None
+    except Exception as e:
+        recalculated = False
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "category_id": category.id,
+        "category_name": category.name,
+        "duration_seconds": time.perf_counter() - started,
+        "skipped": error is None and recalculated is False,
+        "error": error,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalculates standings for all categories (or the ones given with --categories) in parallel, '
+        'one category at a time per worker process. Prints per-category timings and a summary.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--categories',
+            type=str,
+            default=None,
+            help='Comma-separated list of category names or ids to recalculate (default: all categories)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: number of CPUs). 1 runs everything in this process.',
+        )
+
+    def _get_category_ids(self, categories_arg: str | None) -> list[int]:
+        categories = Category.objects.order_by('name')
+        if not categories_arg:
+            return list(categories.values_list('id', flat=True))
+
+        ids_by_key = {}
+        for category_id, name in categories.values_list('id', 'name'):
+            ids_by_key[str(category_id)] = category_id
+            ids_by_key[name] = category_id
+        requested = [item.strip() for item in categories_arg.split(',') if item.strip()]
+        missing = [item for item in requested if item not in ids_by_key]
+        if missing:
+            raise CommandError(f"Categories not found: {', '.join(missing)}")
+        return list(dict.fromkeys(ids_by_key[item] for item in requested))
+
+    def _report(self, result: dict) -> None:
+        label = f"'{result['category_name']}' (id={result['category_id']})"
+        if result['error']:
+            self.stdout.write(self.style.ERROR(f"  {label} FAILED after {result['duration_seconds']:.2f} s: {result['error']}"))
+        elif result['skipped']:
+            self.stdout.write(f"  {label} skipped - an equivalent recalculation was already waiting.")
+        else:
+            self.stdout.write(f"  {label} recalculated in {result['duration_seconds'] * 1000:.1f} ms.")
+
+    def handle(self, *args, **options):
+        category_ids = self._get_category_ids(options['categories'])
+        if not category_ids:
+            self.stdout.write(self.style.WARNING("No categories to recalculate."))
+            return
+
+        workers = max(1, min(options['workers'], len(category_ids)))
+        self.stdout.write(f"Recalculating {len(category_ids)} categories using {workers} worker(s)...")
+
+        started = time.perf_counter()
+        results = []
+        if workers == 1:
+            for category_id in category_ids:
+                result = _recalculate_category_by_id(category_id)
+                self._report(result)
+                results.append(result)
+        else:
+            # Close the parent's connections so forked workers don't inherit an open socket.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                futures = [executor.submit(_recalculate_category_by_id, category_id) for category_id in category_ids]
+                for future in as_completed(futures):
+                    result = future.result()
+                    self._report(result)
+                    results.append(result)
+        elapsed = time.perf_counter() - started
+
+        failed = [result for result in results if result['error']]
+        skipped = [result for result in results if result['skipped']]
+        category_time = sum(result['duration_seconds'] for result in results)
+        slowest = max(results, key=lambda result: result['duration_seconds'])
+        self.stdout.write(
+            f"Summary: {len(results) - len(failed) - len(skipped)} recalculated, {len(skipped)} skipped, "
+            f"{len(failed)} failed in {elapsed:.2f} s wall time "
+            f"({category_time:.2f} s of category work, slowest: '{slowest['category_name']}' "
+            f"{slowest['duration_seconds']:.2f} s)."
+        )
+        if failed:
+            raise CommandError(f"{len(failed)} categories failed to recalculate.")
+        self.stdout.write(self.style.SUCCESS("All categories recalculated."))
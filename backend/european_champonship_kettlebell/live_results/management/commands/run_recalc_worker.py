@@ -0,0 +1,73 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...exports import refresh_static_export
+from ...services import get_recalculation_queue_stats, process_recalculation_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Processes the category recalculation queue (RECALC_MODE="queue"). Each dirty category is recalculated '
+        'once, no matter how many results were saved for it in the meantime. Reports queue depth and lag. '
+        'With STATIC_EXPORT_DIR set, the static results copy is refreshed once after each processed batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty (default: 1.0)')
+        parser.add_argument('--batch', type=int, default=50, help='Max categories recalculated per iteration (default: 50)')
+
+    def handle(self, *args, **options):
+        once = options['once']
+        interval = options['interval']
+        batch = options['batch']
+        self.stdout.write(f"Recalculation worker started (batch={batch}, interval={interval}s, once={once}).")
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    processed = process_recalculation_queue(limit=batch)
+                    stats = get_recalculation_queue_stats()
+                except Exception:
+                    # E.g. lost database connection - the worker keeps polling
+                    logger.exception("Recalculation worker iteration failed.")
+                    if once:
+                        self.stderr.write(self.style.ERROR("Recalculation queue not drained."))
+                        return
+                    time.sleep(interval)
+                    continue
+
+                for item in processed:
+                    self.stdout.write(
+                        f"  Recalculated '{item['category_name']}' (id={item['category_id']}) "
+                        f"in {item['duration_seconds'] * 1000:.1f} ms, waited {item['lag_seconds']:.2f} s."
+                    )
+
+                if processed:
+                    # One export run for the whole batch, off the request path
+                    refresh_static_export()
+                if processed or stats['depth']:
+                    self.stdout.write(
+                        f"Processed {len(processed)} categories. Queue depth: {stats['depth']}, "
+                        f"oldest lag: {stats['oldest_lag_seconds']:.2f} s."
+                    )
+
+                if once and stats['depth'] and not processed:
+                    # Only requests that failed (and stay queued) or are being processed by another worker are left
+                    self.stderr.write(self.style.WARNING(f"{stats['depth']} categories left in the queue."))
+                    return
+                if once and not stats['depth']:
+                    break
+                if not processed:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write("Recalculation worker stopped.")
+            return
+
+        self.stdout.write(self.style.SUCCESS("Recalculation queue drained."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 03:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecalculationRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_at', models.DateTimeField(db_index=True, verbose_name='Pierwsze zgłoszenie')),
+                ('last_requested_at', models.DateTimeField(verbose_name='Ostatnie zgłoszenie')),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recalculation_request', to='live_results.category', verbose_name='Kategoria')),
+            ],
+            options={
+                'verbose_name': 'Kategoria do przeliczenia',
+                'verbose_name_plural': 'Kategorie do przeliczenia',
+                'ordering': ['requested_at'],
+            },
+        ),
+    ]
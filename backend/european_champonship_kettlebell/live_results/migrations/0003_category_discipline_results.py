@@ -0,0 +1,129 @@
+# Generated by Django 5.2 on 2026-10-17 03:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DISCIPLINE_RESULT_MODELS = {
+    'snatch': 'SnatchResult',
+    'tgu': 'TGUResult',
+    'kb_squat': 'KBSquatResult',
+    'one_kettlebell_press': 'OneKettlebellPressResult',
+    'two_kettlebell_press': 'TwoKettlebellPressResult',
+}
+
+
+def discipline_score(discipline, result):
+    # The rules of ranking.snatch_score / ranking.bw_ratio_score, frozen for this migration
+    if discipline == 'snatch':
+        weight, repetitions = result['kettlebell_weight'], result['repetitions']
+        if weight is not None and repetitions is not None and weight > 0 and repetitions > 0:
+            return float(weight * repetitions)
+        return 0.0
+    best = max(result['result_1'] or 0.0, result['result_2'] or 0.0, result['result_3'] or 0.0, 0.0)
+    body_weight = result['player__weight']
+    if body_weight is not None and body_weight > 0 and best > 0:
+        return best / body_weight
+    return 0.0
+
+
+def populate_category_discipline_results(apps, schema_editor):
+    """The dropped position columns were per athlete, not per category: rank every category from its attempts."""
+    Category = apps.get_model('live_results', 'Category')
+    CategoryDisciplineResult = apps.get_model('live_results', 'CategoryDisciplineResult')
+    rows = []
+    for category in Category.objects.all():
+        for discipline in category.disciplines or []:
+            if discipline not in DISCIPLINE_RESULT_MODELS:
+                continue
+            result_model = apps.get_model('live_results', DISCIPLINE_RESULT_MODELS[discipline])
+            if discipline == 'snatch':
+                fields = ('kettlebell_weight', 'repetitions')
+            else:
+                fields = ('result_1', 'result_2', 'result_3')
+            results = result_model.objects.filter(player__categories=category).values(
+                'player_id', 'player__surname', 'player__name', 'player__weight', *fields
+            )
+            # Higher score first, equal scores share a place and skip the next one (1, 2, 2, 4)
+            ranked = sorted(
+                (
+                    -discipline_score(discipline, result),
+                    result['player__surname'],
+                    result['player__name'],
+                    result['player_id'],
+                )
+                for result in results
+            )
+            position = previous = None
+            for index, (negative_score, _surname, _name, player_id) in enumerate(ranked, start=1):
+                if index == 1 or negative_score != previous:
+                    position, previous = index, negative_score
+                rows.append(CategoryDisciplineResult(
+                    category_id=category.id, player_id=player_id, discipline=discipline,
+                    score=-negative_score, position=position,
+                ))
+    CategoryDisciplineResult.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0002_recalculation_queue'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='seesawpressresult',
+            options={'ordering': ['player__categories'], 'verbose_name': 'Wynik See Saw Press', 'verbose_name_plural': 'Wyniki See Saw Press'},
+        ),
+        migrations.AlterModelOptions(
+            name='snatchresult',
+            options={'ordering': ['player__categories'], 'verbose_name': 'Wynik Snatch', 'verbose_name_plural': 'Wyniki Snatch'},
+        ),
+        migrations.RemoveField(
+            model_name='kbsquatresult',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='onekettlebellpressresult',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='pistolsquatresult',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='seesawpressresult',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='snatchresult',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='tguresult',
+            name='position',
+        ),
+        migrations.RemoveField(
+            model_name='twokettlebellpressresult',
+            name='position',
+        ),
+        migrations.CreateModel(
+            name='CategoryDisciplineResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discipline', models.CharField(choices=[('snatch', 'Snatch'), ('tgu', 'Turkish Get-Up'), ('kb_squat', 'Kettlebell Squat'), ('one_kettlebell_press', 'One Kettlebell Press'), ('two_kettlebell_press', 'Two Kettlebell Press')], max_length=32, verbose_name='Dyscyplina')),
+                ('score', models.FloatField(default=0.0, verbose_name='Wynik rankingowy')),
+                ('position', models.PositiveIntegerField(blank=True, null=True, verbose_name='Pozycja w dyscyplinie')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discipline_results', to='live_results.category', verbose_name='Kategoria')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discipline_results', to='live_results.player', verbose_name='Zawodnik')),
+            ],
+            options={
+                'verbose_name': 'Pozycja w Dyscyplinie (Kategoria)',
+                'verbose_name_plural': 'Pozycje w Dyscyplinach (Kategorie)',
+                'ordering': ['category', 'discipline', 'position'],
+                'indexes': [models.Index(fields=['category', 'discipline', 'position'], name='catdisc_position_idx'), models.Index(fields=['category', 'discipline', 'score'], name='catdisc_score_idx')],
+                'unique_together': {('category', 'player', 'discipline')},
+            },
+        ),
+        migrations.RunPython(populate_category_discipline_results, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-17 03:48
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0003_category_discipline_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kbsquatresult',
+            name='best_result',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.comparison.Greatest(django.db.models.functions.comparison.Coalesce('result_1', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_2', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_3', models.Value(0.0)), models.Value(0.0)), output_field=models.FloatField(), verbose_name='Najlepsza próba'),
+        ),
+        migrations.AddField(
+            model_name='onekettlebellpressresult',
+            name='best_result',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.comparison.Greatest(django.db.models.functions.comparison.Coalesce('result_1', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_2', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_3', models.Value(0.0)), models.Value(0.0)), output_field=models.FloatField(), verbose_name='Najlepsza próba'),
+        ),
+        migrations.AddField(
+            model_name='pistolsquatresult',
+            name='best_result',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.comparison.Greatest(django.db.models.functions.comparison.Coalesce('result_1', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_2', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_3', models.Value(0.0)), models.Value(0.0)), output_field=models.FloatField(), verbose_name='Najlepsza próba'),
+        ),
+        migrations.AddField(
+            model_name='snatchresult',
+            name='score',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=models.Case(models.When(kettlebell_weight__gt=0, repetitions__gt=0, then=django.db.models.expressions.CombinedExpression(models.F('kettlebell_weight'), '*', models.F('repetitions'))), default=models.Value(0.0)), output_field=models.FloatField(), verbose_name='Wynik'),
+        ),
+        migrations.AddField(
+            model_name='tguresult',
+            name='best_result',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.comparison.Greatest(django.db.models.functions.comparison.Coalesce('result_1', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_2', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_3', models.Value(0.0)), models.Value(0.0)), output_field=models.FloatField(), verbose_name='Najlepsza próba'),
+        ),
+        migrations.AddField(
+            model_name='twokettlebellpressresult',
+            name='best_result',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.comparison.Greatest(django.db.models.functions.comparison.Coalesce('result_1', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_2', models.Value(0.0)), django.db.models.functions.comparison.Coalesce('result_3', models.Value(0.0)), models.Value(0.0)), output_field=models.FloatField(), verbose_name='Najlepsza próba'),
+        ),
+    ]
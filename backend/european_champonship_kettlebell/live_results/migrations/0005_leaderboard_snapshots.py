@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 03:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0004_generated_score_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryLeaderboardSnapshot',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_snapshot', serialize=False, to='live_results.category', verbose_name='Kategoria')),
+                ('revision', models.PositiveBigIntegerField(default=1, verbose_name='Rewizja')),
+                ('payload', models.TextField(verbose_name='Tabela wyników (JSON)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Zaktualizowano')),
+            ],
+            options={
+                'verbose_name': 'Migawka tabeli wyników',
+                'verbose_name_plural': 'Migawki tabel wyników',
+            },
+        ),
+    ]
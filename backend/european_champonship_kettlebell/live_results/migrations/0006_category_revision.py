@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0005_leaderboard_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=1, editable=False, verbose_name='Rewizja'),
+        ),
+    ]
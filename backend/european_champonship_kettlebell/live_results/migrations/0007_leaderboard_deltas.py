@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 04:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0006_category_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryLeaderboardDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveBigIntegerField(verbose_name='Rewizja')),
+                ('base_revision', models.PositiveBigIntegerField(verbose_name='Rewizja bazowa')),
+                ('changes', models.JSONField(default=dict, verbose_name='Zmiany')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Utworzono')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_deltas', to='live_results.category', verbose_name='Kategoria')),
+            ],
+            options={
+                'verbose_name': 'Zmiana tabeli wyników',
+                'verbose_name_plural': 'Zmiany tabel wyników',
+                'ordering': ['category', 'revision'],
+                'unique_together': {('category', 'revision')},
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-17 04:12
+
+import gzip
+
+from django.db import migrations, models
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def compress_existing_snapshots(apps, schema_editor):
+    CategoryLeaderboardSnapshot = apps.get_model('live_results', 'CategoryLeaderboardSnapshot')
+    for snapshot in CategoryLeaderboardSnapshot.objects.only('category_id', 'payload'):
+        data = snapshot.payload.encode('utf-8')
+        CategoryLeaderboardSnapshot.objects.filter(category_id=snapshot.category_id).update(
+            payload_gzip=gzip.compress(data, compresslevel=9, mtime=0),
+            payload_brotli=brotli.compress(data, quality=9) if brotli is not None else None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0007_leaderboard_deltas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoryleaderboardsnapshot',
+            name='payload_brotli',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Tabela wyników (brotli)'),
+        ),
+        migrations.AddField(
+            model_name='categoryleaderboardsnapshot',
+            name='payload_gzip',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Tabela wyników (gzip)'),
+        ),
+        migrations.RunPython(compress_existing_snapshots, migrations.RunPython.noop),
+    ]
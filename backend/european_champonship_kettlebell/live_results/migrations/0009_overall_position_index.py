@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0008_leaderboard_compressed_payloads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='categoryoverallresult',
+            index=models.Index(fields=['category', 'final_position'], name='overall_position_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-17 04:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('live_results', '0009_overall_position_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptSubmission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Klucz idempotencji')),
+                ('summary', models.JSONField(default=dict, verbose_name='Wynik zgłoszenia')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Odebrano')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt_submissions', to=settings.AUTH_USER_MODEL, verbose_name='Użytkownik')),
+            ],
+            options={
+                'verbose_name': 'Zgłoszenie prób',
+                'verbose_name_plural': 'Zgłoszenia prób',
+                'ordering': ['-received_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AttemptFieldVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('discipline', models.CharField(choices=[('snatch', 'Snatch'), ('tgu', 'Turkish Get-Up'), ('kb_squat', 'Kettlebell Squat'), ('one_kettlebell_press', 'One Kettlebell Press'), ('two_kettlebell_press', 'Two Kettlebell Press')], max_length=32, verbose_name='Dyscyplina')),
+                ('field', models.CharField(max_length=32, verbose_name='Pole wyniku')),
+                ('recorded_at', models.DateTimeField(verbose_name='Zapisano u sędziego')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_versions', to='live_results.player', verbose_name='Zawodnik')),
+            ],
+            options={
+                'verbose_name': 'Wersja próby',
+                'verbose_name_plural': 'Wersje prób',
+                'unique_together': {('player', 'discipline', 'field')},
+            },
+        ),
+    ]
@@ -3,6 +3,7 @@ Models package for the application.
 """
 
 # Import constants first if they are needed by models during import
+from .attempts import AttemptFieldVersion, AttemptSubmission
 from .category import Category
 from .constants import (
     AVAILABLE_DISCIPLINES,
@@ -15,7 +16,9 @@ from .constants import (
     TGU,
     TWO_KB_PRESS,
 )
+from .leaderboard import CategoryLeaderboardDelta, CategoryLeaderboardSnapshot
 from .player import Player
+from .results.category_discipline import CategoryDisciplineResult
 from .results.kb_squat_one_result import KBSquatResult
 from .results.one_kettlebell_press import OneKettlebellPressResult
 from .results.overall import CategoryOverallResult
@@ -26,6 +29,7 @@ from .results.see_saw_press import SeeSawPressResult
 from .results.snatch import SnatchResult
 from .results.tgu import TGUResult
 from .results.two_kettlebell_press_one_result import TwoKettlebellPressResult
+from .recalculation import RecalculationRequest
 
 # Import models
 from .sport_club import SportClub
@@ -54,4 +58,10 @@ __all__ = [
     "OneKettlebellPressResult",
     "TwoKettlebellPressResult",
     "CategoryOverallResult",
+    "CategoryDisciplineResult",
+    "RecalculationRequest",
+    "CategoryLeaderboardSnapshot",
+    "CategoryLeaderboardDelta",
+    "AttemptSubmission",
+    "AttemptFieldVersion",
 ]
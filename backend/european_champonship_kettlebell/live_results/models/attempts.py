@@ -0,0 +1,65 @@
+"""Model definitions for idempotent judge submissions."""
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .constants import AVAILABLE_DISCIPLINES
+
+
+class AttemptSubmission(models.Model):
+    """
+    A batch of attempts sent by a judge's device under a client-generated idempotency key.
+
+    The row is written in the same transaction as the attempts, so a retried or re-flushed
+    submission with the same key is recognised and not applied again. `summary` holds the
+    outcome returned the first time (attempts applied / skipped as stale).
+    """
+
+    key = models.CharField(_("Klucz idempotencji"), max_length=64, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_("Użytkownik"),
+        related_name="attempt_submissions",
+    )
+    summary = models.JSONField(_("Wynik zgłoszenia"), default=dict)
+    received_at = models.DateTimeField(_("Odebrano"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Zgłoszenie prób")
+        verbose_name_plural = _("Zgłoszenia prób")
+        ordering = ["-received_at"]
+
+    def __str__(self) -> str:
+        return f"Zgłoszenie {self.key}"
+
+
+class AttemptFieldVersion(models.Model):
+    """
+    Time of the attempt currently stored in one result field of a player.
+
+    Submissions that arrive late carry the time the judge recorded the attempt; a value
+    recorded before the stored one is a stale update and is skipped (last recorded wins,
+    not last received).
+    """
+
+    player = models.ForeignKey(
+        "live_results.Player",
+        on_delete=models.CASCADE,
+        verbose_name=_("Zawodnik"),
+        related_name="attempt_versions",
+    )
+    discipline = models.CharField(_("Dyscyplina"), max_length=32, choices=AVAILABLE_DISCIPLINES)
+    field = models.CharField(_("Pole wyniku"), max_length=32)
+    recorded_at = models.DateTimeField(_("Zapisano u sędziego"))
+
+    class Meta:
+        verbose_name = _("Wersja próby")
+        verbose_name_plural = _("Wersje prób")
+        unique_together = ("player", "discipline", "field")
+
+    def __str__(self) -> str:
+        return f"{self.player_id} {self.discipline}.{self.field} @ {self.recorded_at:%H:%M:%S}"
@@ -11,6 +11,8 @@ class Category(models.Model):
 
     name = models.CharField(_("Nazwa Kategorii"), max_length=100, unique=True)  # Dodano unique=True?
     disciplines = models.JSONField(_("Disciplines"), default=list)
+    # Rośnie przy każdej zmianie kategorii i jej tabeli wyników - podstawa ETagów API
+    revision = models.PositiveBigIntegerField(_("Rewizja"), default=1, editable=False)
 
     class Meta:
         verbose_name = _("Kategorie")
@@ -20,6 +22,17 @@ class Category(models.Model):
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Saves the category and bumps `revision` in the same UPDATE (no lost increments)."""
+        updating = not self._state.adding
+        if updating:
+            self.revision = models.F("revision") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "revision"}
+        super().save(*args, **kwargs)
+        if updating:
+            self.refresh_from_db(fields=["revision"])
+
     def set_disciplines(self, disciplines: list[str]) -> None:
         """Sets the list of disciplines, ensuring they are valid."""
         valid_disciplines = [d[0] for d in AVAILABLE_DISCIPLINES]
@@ -0,0 +1,66 @@
+"""Model definition for precomputed category leaderboards."""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class CategoryLeaderboardSnapshot(models.Model):
+    """
+    Ready-to-serve JSON leaderboard of a category, as returned by the results endpoint.
+
+    Written by the ranking recalculation in the same transaction as the standings,
+    so serving it is a single primary-key read. `revision` is the category revision
+    from the last time the leaderboard content changed. The gzip and brotli forms are
+    compressed once per change and served as-is for a matching Accept-Encoding
+    (brotli only when the brotli package is installed).
+    """
+
+    category = models.OneToOneField(
+        "live_results.Category",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name=_("Kategoria"),
+        related_name="leaderboard_snapshot",
+    )
+    revision = models.PositiveBigIntegerField(_("Rewizja"), default=1)
+    payload = models.TextField(_("Tabela wyników (JSON)"))
+    payload_gzip = models.BinaryField(_("Tabela wyników (gzip)"), null=True, blank=True)
+    payload_brotli = models.BinaryField(_("Tabela wyników (brotli)"), null=True, blank=True)
+    updated_at = models.DateTimeField(_("Zaktualizowano"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Migawka tabeli wyników")
+        verbose_name_plural = _("Migawki tabel wyników")
+
+    def __str__(self) -> str:
+        return f"Tabela wyników kat. {self.category_id} (rewizja {self.revision})"
+
+
+class CategoryLeaderboardDelta(models.Model):
+    """
+    Rows of a category leaderboard that changed between two snapshot revisions.
+
+    Written together with the snapshot: `changes` holds the changed rows (in the results
+    endpoint format) and the ids of players that left the leaderboard when going from
+    `base_revision` to `revision`. Only the newest LEADERBOARD_DELTA_HISTORY rows per category are kept.
+    """
+
+    category = models.ForeignKey(
+        "live_results.Category",
+        on_delete=models.CASCADE,
+        verbose_name=_("Kategoria"),
+        related_name="leaderboard_deltas",
+    )
+    revision = models.PositiveBigIntegerField(_("Rewizja"))
+    base_revision = models.PositiveBigIntegerField(_("Rewizja bazowa"))
+    changes = models.JSONField(_("Zmiany"), default=dict)
+    created_at = models.DateTimeField(_("Utworzono"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Zmiana tabeli wyników")
+        verbose_name_plural = _("Zmiany tabel wyników")
+        ordering = ["category", "revision"]
+        unique_together = ("category", "revision")
+
+    def __str__(self) -> str:
+        return f"Zmiany kat. {self.category_id}: {self.base_revision} -> {self.revision}"
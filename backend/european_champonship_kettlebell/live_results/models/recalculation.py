@@ -0,0 +1,30 @@
+"""Model definition for the category recalculation queue."""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class RecalculationRequest(models.Model):
+    """
+    Marks a category whose standings need to be recalculated.
+
+    There is at most one row per category, so repeated saves in the same category
+    coalesce into a single pending recalculation picked up by `run_recalc_worker`.
+    """
+
+    category = models.OneToOneField(
+        "live_results.Category",
+        on_delete=models.CASCADE,
+        verbose_name=_("Kategoria"),
+        related_name="recalculation_request",
+    )
+    requested_at = models.DateTimeField(_("Pierwsze zgłoszenie"), db_index=True)
+    last_requested_at = models.DateTimeField(_("Ostatnie zgłoszenie"))
+
+    class Meta:
+        verbose_name = _("Kategoria do przeliczenia")
+        verbose_name_plural = _("Kategorie do przeliczenia")
+        ordering = ["requested_at"]
+
+    def __str__(self) -> str:
+        return f"Przeliczenie kat. {self.category_id} (od {self.requested_at:%H:%M:%S})"
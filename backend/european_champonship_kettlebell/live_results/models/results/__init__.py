@@ -1,4 +1,5 @@
 from .bases import BaseDoubleAttemptResult, BaseSingleAttemptResult
+from .category_discipline import CategoryDisciplineResult
 from .kb_squat_one_result import KBSquatResult
 from .one_kettlebell_press import OneKettlebellPressResult
 from .overall import CategoryOverallResult
@@ -19,4 +20,5 @@ __all__ = [
     "TGUResult",
     "SnatchResult",
     "CategoryOverallResult",
+    "CategoryDisciplineResult",
 ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils.translation import gettext_lazy as _
 
 
@@ -13,11 +15,10 @@ class BaseDoubleAttemptResult(models.Model):
     result_right_2 = models.FloatField(_("Próba II R"), default=0.0, null=True, blank=True)
     result_left_3 = models.FloatField(_("Próba III L"), default=0.0, null=True, blank=True)
     result_right_3 = models.FloatField(_("Próba III R"), default=0.0, null=True, blank=True)
-    position = models.IntegerField(_("Pozycja w kategorii"), null=True, blank=True)
 
     class Meta:
         abstract = True
-        ordering = ["player__categories", "-position"]
+        ordering = ["player__categories"]
 
     def get_attempt_score(self, attempt_number: int) -> float:
         left = getattr(self, f"result_left_{attempt_number}", 0.0) or 0.0
@@ -53,12 +54,23 @@ class BaseSingleAttemptResult(models.Model):
     result_1 = models.FloatField(_("Próba I"), default=0.0, null=True, blank=True)
     result_2 = models.FloatField(_("Próba II"), default=0.0, null=True, blank=True)
     result_3 = models.FloatField(_("Próba III"), default=0.0, null=True, blank=True)
-    position = models.PositiveIntegerField(_("Pozycja w kategorii"), null=True, blank=True) # Lepszy typ Integer
+    # Najlepsza próba liczona przez bazę przy każdym zapisie (puste próby liczone jako 0.0)
+    best_result = models.GeneratedField(
+        expression=Greatest(
+            Coalesce("result_1", Value(0.0)),
+            Coalesce("result_2", Value(0.0)),
+            Coalesce("result_3", Value(0.0)),
+            Value(0.0),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+        db_index=True,
+        verbose_name=_("Najlepsza próba"),
+    )
 
     class Meta:
         abstract = True
 
-
     @property
     def max_result(self) -> float:
         return max(self.result_1 or 0.0, self.result_2 or 0.0, self.result_3 or 0.0)
@@ -74,4 +86,4 @@ class BaseSingleAttemptResult(models.Model):
                 return round((float(max_res) / float(player_weight)) * 100.0, 2)
             except (ValueError, TypeError):
                 return None
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from ..constants import AVAILABLE_DISCIPLINES
+
+
+class CategoryDisciplineResult(models.Model):
+    """
+    Score and position of a player in one discipline, ranked within one category.
+
+    A player competing in several categories gets a separate row per category,
+    so categories can be recalculated independently.
+    """
+
+    category = models.ForeignKey("live_results.Category", on_delete=models.CASCADE, related_name="discipline_results", verbose_name=_("Kategoria"))
+    player = models.ForeignKey("live_results.Player", on_delete=models.CASCADE, related_name="discipline_results", verbose_name=_("Zawodnik"))
+    discipline = models.CharField(_("Dyscyplina"), max_length=32, choices=AVAILABLE_DISCIPLINES)
+    score = models.FloatField(_("Wynik rankingowy"), default=0.0)
+    position = models.PositiveIntegerField(_("Pozycja w dyscyplinie"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Pozycja w Dyscyplinie (Kategoria)")
+        verbose_name_plural = _("Pozycje w Dyscyplinach (Kategorie)")
+        unique_together = ("category", "player", "discipline")
+        indexes = [
+            models.Index(fields=["category", "discipline", "position"], name="catdisc_position_idx"),
+            models.Index(fields=["category", "discipline", "score"], name="catdisc_score_idx"),
+        ]
+        ordering = ["category", "discipline", "position"]
+
+    def __str__(self):
+        return f"{self.player} - {self.get_discipline_display()} ({self.category}): {self.position or 'N/A'}"
@@ -19,6 +19,10 @@ class CategoryOverallResult(models.Model):
         verbose_name_plural = _("Wyniki Ogólne Kategorii")
         unique_together = ('player', 'category')
         ordering = ["category", "final_position", "total_points"]
+        indexes = [
+            # Tabela wyników i jej strony (kursor po miejscu końcowym) w obrębie kategorii
+            models.Index(fields=["category", "final_position"], name="overall_position_idx"),
+        ]
 
     def calculate_total_points(self): # Bez zmian
         points_to_sum = [ self.snatch_points, self.tgu_points, self.kb_squat_points, self.one_kb_press_points, self.two_kb_press_points, ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Case, F, Value, When
 from django.utils.translation import gettext_lazy as _
 
 
@@ -11,12 +12,22 @@ class SnatchResult(models.Model):
     )
     kettlebell_weight = models.FloatField(_("Waga Kettlebell (kg)"), default=0.0, null=True, blank=True)
     repetitions = models.IntegerField(_("Ilość Powtórzeń"), default=0, null=True, blank=True)
-    position = models.IntegerField(_("Pozycja w kategorii"), null=True, blank=True)
+    # Wynik rankingowy liczony przez bazę przy każdym zapisie (0.0, gdy brak wagi lub powtórzeń)
+    score = models.GeneratedField(
+        expression=Case(
+            When(kettlebell_weight__gt=0, repetitions__gt=0, then=F("kettlebell_weight") * F("repetitions")),
+            default=Value(0.0),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+        db_index=True,
+        verbose_name=_("Wynik"),
+    )
 
     class Meta:
         verbose_name = _("Wynik Snatch")
         verbose_name_plural = _("Wyniki Snatch")
-        ordering = ["player__categories", "-position"]
+        ordering = ["player__categories"]
 
     @property
     def result(self) -> float | None:
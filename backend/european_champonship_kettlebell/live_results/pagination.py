@@ -0,0 +1,134 @@
+"""
+Stronicowanie kursorem (keyset) dla publicznego API.
+
+Kursor to zakodowane wartości kolumn sortowania ostatniego wiersza strony; kolejna strona to
+WHERE (kolumny) > (kursor) ORDER BY kolumny LIMIT rozmiar - koszt strony nie rośnie z jej numerem
+(w przeciwieństwie do OFFSET). Stronicowanie jest na życzenie klienta: bez ?cursor i ?page_size
+endpoint zwraca całą listę jak dotąd (tablice wyników i frontend pobierają wszystko naraz).
+"""
+
+import base64
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Stronicowanie po krotce `ordering` (ostatnie pole musi być unikalne). Pola z `nullable_fields`
+    są sortowane z NULL na końcu. Odpowiedź: {"next": url albo null, "results": [...]}.
+    """
+
+    ordering: tuple[str, ...] = ("id",)
+    nullable_fields: frozenset[str] = frozenset()
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def is_requested(self, request) -> bool:
+        """Czy klient prosi o stronę (bez parametrów - cała lista, jak przed wprowadzeniem stronicowania)."""
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def get_page_size(self, request) -> int:
+        page_size = getattr(settings, "API_PAGE_SIZE", 50)
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, page_size))
+        except ValueError:
+            pass
+        return max(1, min(page_size, getattr(settings, "API_MAX_PAGE_SIZE", 500)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(
+            *(
+                F(field).asc(nulls_last=True) if field in self.nullable_fields else F(field).asc()
+                for field in self.ordering
+            )
+        )
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.after(cursor))
+            except (TypeError, ValueError): # wartości kursora niepasujące do typów kolumn
+                raise NotFound("Nieprawidłowy kursor.") from None
+        rows = list(queryset[: page_size + 1])
+        self.next_values = self.values_of(rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def after(self, values: list) -> Q:
+        """Warunek "wiersz za kursorem" dla krotki `ordering`: a > x OR (a = x AND b > y) OR ..."""
+        conditions = []
+        for index, (field, value) in enumerate(zip(self.ordering, values, strict=True)):
+            equal = [
+                Q(**{previous_field: previous}) if previous is not None else Q(**{f"{previous_field}__isnull": True})
+                for previous_field, previous in zip(self.ordering[:index], values[:index], strict=True)
+            ]
+            if value is None:
+                continue # NULL-e są na końcu - za NULL nie ma już większych wartości tego pola
+            greater = Q(**{f"{field}__gt": value})
+            if field in self.nullable_fields:
+                greater |= Q(**{f"{field}__isnull": True})
+            conditions.append(reduce(lambda left, right: left & right, equal, greater))
+        # Ostatnie pole jest unikalne, więc wiersz z kursora nie wraca na następnej stronie
+        return reduce(lambda left, right: left | right, conditions, Q(pk__in=[]))
+
+    def values_of(self, row) -> list:
+        values = []
+        for field in self.ordering:
+            value = row
+            for attribute in field.split("__"):
+                value = getattr(value, attribute)
+            values.append(value)
+        return values
+
+    def decode_cursor(self, request) -> list | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+        except (ValueError, UnicodeError):
+            raise NotFound("Nieprawidłowy kursor.") from None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound("Nieprawidłowy kursor.")
+        return values
+
+    def encode_cursor(self, values: list) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+    def get_next_link(self) -> str | None:
+        if self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {"next": {"type": "string", "nullable": True, "format": "uri"}, "results": schema},
+        }
+
+
+class CategoryResultsPagination(KeysetPagination):
+    """Wyniki kategorii w kolejności tabeli: miejsce (nieprzeliczeni na końcu), nazwisko, imię, id."""
+
+    ordering = ("final_position", "player__surname", "player__name", "id")
+    nullable_fields = frozenset({"final_position"})
+
+
+class SportClubPagination(KeysetPagination):
+    """Kluby po nazwie (unikalnej)."""
+
+    ordering = ("name",)
@@ -0,0 +1,104 @@
+# Plik: ranking.py
+"""
+Silnik rankingu kategorii liczony w całości w pamięci.
+
+Warstwa services pobiera zawodników, ich wagę ciała, wyniki w dyscyplinach i tiebreaki
+jednym zapytaniem, a tutaj - bez żadnego dostępu do bazy - liczone są pozycje
+w dyscyplinach, punkty, suma punktów oraz miejsca końcowe.
+Reguły są te same co w update_discipline_positions / update_overall_results_for_category.
+"""
+
+from dataclasses import dataclass, field
+
+from .models.constants import SNATCH
+
+TIEBREAK_POINTS = -0.5
+
+
+@dataclass
+class PlayerStanding:
+    """Stan jednego zawodnika w rankingu kategorii."""
+
+    player_id: int
+    surname: str
+    name: str
+    # Wynik w dyscyplinie (tylko dla dyscyplin, w których zawodnik ma rekord wyniku)
+    scores: dict[str, float] = field(default_factory=dict)
+    positions: dict[str, int] = field(default_factory=dict)
+    tiebreak_points: float = 0.0
+    total_points: float | None = None
+    final_position: int | None = None
+
+
+def snatch_score(kettlebell_weight: float | None, repetitions: int | None) -> float:
+    """Wynik Snatch (waga x powtórzenia), 0.0 gdy któraś wartość jest pusta lub niedodatnia."""
+    if kettlebell_weight is not None and repetitions is not None and kettlebell_weight > 0 and repetitions > 0:
+        return float(kettlebell_weight * repetitions)
+    return 0.0
+
+
+def bw_ratio_score(
+    result_1: float | None, result_2: float | None, result_3: float | None, body_weight: float | None
+) -> float:
+    """Najlepsza próba podzielona przez wagę ciała, 0.0 gdy brak wagi lub wyniku."""
+    best = max(result_1 or 0.0, result_2 or 0.0, result_3 or 0.0, 0.0)
+    if body_weight is not None and body_weight > 0 and best > 0:
+        return best / body_weight
+    return 0.0
+
+
+def discipline_score(discipline: str, result, body_weight: float | None) -> float:
+    """Zwraca wynik rankingowy rekordu wyniku danej dyscypliny."""
+    if discipline == SNATCH:
+        return snatch_score(result.kettlebell_weight, result.repetitions)
+    return bw_ratio_score(result.result_1, result.result_2, result.result_3, body_weight)
+
+
+def assign_competition_ranks(ordered_scores: list[tuple[int, float | None]]) -> dict[int, int]:
+    """
+    Nadaje miejsca posortowanej liście par (klucz, wynik).
+
+    Równe wyniki dzielą miejsce, a kolejne miejsce jest pomijane (1, 2, 2, 4).
+    Dwa wyniki None również traktowane są jako remis.
+    """
+    positions: dict[int, int] = {}
+    last_score = None
+    tie_start = 0
+    for index, (key, score) in enumerate(ordered_scores, start=1):
+        if index == 1 or score != last_score:
+            tie_start = index
+            last_score = score
+        positions[key] = tie_start
+    return positions
+
+
+def rank_category(standings: list[PlayerStanding], disciplines: list[str]) -> list[PlayerStanding]:
+    """
+    Liczy pozycje w dyscyplinach, sumę punktów i miejsca końcowe dla całej kategorii.
+
+    Wynik w dyscyplinie: wyższy lepszy. Suma punktów: niższa lepsza, brak punktów na końcu.
+    Zwraca listę posortowaną wg miejsca końcowego.
+    """
+    for discipline in disciplines:
+        ranked = [s for s in standings if discipline in s.scores]
+        ranked.sort(key=lambda s: (-s.scores[discipline], s.surname, s.name))
+        positions = assign_competition_ranks([(s.player_id, s.scores[discipline]) for s in ranked])
+        for standing in ranked:
+            standing.positions[discipline] = positions[standing.player_id]
+    return rank_overall(standings, disciplines)
+
+
+def rank_overall(standings: list[PlayerStanding], disciplines: list[str]) -> list[PlayerStanding]:
+    """
+    Liczy sumę punktów i miejsca końcowe z gotowych pozycji w dyscyplinach (standing.positions).
+    Zwraca listę posortowaną wg miejsca końcowego.
+    """
+    for standing in standings:
+        points = [float(standing.positions[d]) for d in disciplines if d in standing.positions]
+        standing.total_points = sum(points) + (standing.tiebreak_points or 0.0) if points else None
+
+    standings.sort(key=lambda s: (s.total_points is None, s.total_points or 0.0, s.surname, s.name))
+    final_positions = assign_competition_ranks([(s.player_id, s.total_points) for s in standings])
+    for standing in standings:
+        standing.final_position = final_positions[standing.player_id]
+    return standings
@@ -0,0 +1,74 @@
+"""
+Wersjonowana pamięć podręczna tabel wyników kategorii (framework cache Django: locmem, plik, redis...).
+
+Klucz to (id kategorii, Category.revision) - przeliczenie podbija rewizję, więc stary wpis nie jest
+usuwany, tylko przestaje być czytany i wygasa sam. Po zmianie rewizji tabelę buduje tylko jedno
+żądanie (blokada przez cache.add); pozostałe dostają poprzednią wersję tabeli albo, gdy jej nie ma,
+czekają chwilę na wynik budującego - zamiast serii identycznych ciężkich zapytań naraz.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .services import build_leaderboard_payload
+
+KEY_PREFIX = "live_results:category_results"
+
+logger = logging.getLogger(__name__)
+
+
+def _payload_key(category_id: int, revision: int) -> str:
+    return f"{KEY_PREFIX}:{category_id}:{revision}"
+
+
+def _latest_key(category_id: int) -> str:
+    return f"{KEY_PREFIX}:{category_id}:latest"
+
+
+def _lock_key(category_id: int, revision: int) -> str:
+    return f"{KEY_PREFIX}:{category_id}:{revision}:lock"
+
+
+def get_cached_category_results(category_id: int, revision: int, fast: bool | None = None) -> tuple[int, str]:
+    """
+    Zwraca (rewizja, JSON tabeli wyników) dla rewizji kategorii. Rewizja może być starsza od żądanej,
+    gdy inne żądanie właśnie buduje nową wersję - odpowiedź powinna nieść zwróconą rewizję (ETag).
+    `fast` wybiera ścieżkę serializacji (patrz build_leaderboard_payload) - obie dają ten sam JSON.
+    """
+    timeout = getattr(settings, "RESULTS_CACHE_TIMEOUT", 300)
+    payload = cache.get(_payload_key(category_id, revision))
+    if payload is not None:
+        return revision, payload
+
+    lock_key = _lock_key(category_id, revision)
+    # Blokada wygasa sama, gdy budujący proces padnie
+    if cache.add(lock_key, True, timeout=getattr(settings, "RESULTS_CACHE_LOCK_TIMEOUT", 10)):
+        try:
+            payload = build_leaderboard_payload(category_id, fast)
+            cache.set_many(
+                {_payload_key(category_id, revision): payload, _latest_key(category_id): (revision, payload)},
+                timeout=timeout,
+            )
+        finally:
+            cache.delete(lock_key)
+        return revision, payload
+
+    # Ktoś inny buduje tę rewizję - ostatnia zbudowana wersja jest lepsza niż kolejne identyczne zapytania
+    latest = cache.get(_latest_key(category_id))
+    if latest is not None:
+        return latest
+
+    deadline = time.monotonic() + getattr(settings, "RESULTS_CACHE_WAIT", 2.0)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        payload = cache.get(_payload_key(category_id, revision))
+        if payload is not None:
+            return revision, payload
+    # Budujący nie zdążył - budujemy sami, bez zapisu (zapisze go właściciel blokady)
+    logger.warning(
+        "Nie doczekano się tabeli kategorii %s (rewizja %s), budowanie bez cache.", category_id, revision
+    )
+    return revision, build_leaderboard_payload(category_id, fast)
@@ -6,6 +6,7 @@ from rest_framework import serializers
 from .models.results.overall import CategoryOverallResult
 # Importuj pozostałe modele
 from .models.category import Category
+from .models.constants import AVAILABLE_DISCIPLINES, SNATCH
 from .models.sport_club import SportClub
 from .models.player import Player
 from .models.results import (
@@ -27,7 +28,7 @@ class PlayerBasicInfoSerializer(serializers.ModelSerializer):
 # --- Serializery Wyników Dyscyplin - POPRAWIONE ---
 
 class SnatchResultSerializer(serializers.ModelSerializer):
-    # Używa SerializerMethodField dla property 'result'
+    # Używa SerializerMethodField dla kolumny generowanej 'score'
     result_score = serializers.SerializerMethodField()
     class Meta:
         model = SnatchResult
@@ -35,9 +36,9 @@ class SnatchResultSerializer(serializers.ModelSerializer):
         # read_only_fields = ['position'] # Można dodać, jeśli pole istnieje
 
     def get_result_score(self, obj: SnatchResult) -> float | None:
-        # Wywołuje property 'result' z modelu
-        # Zmieniono zwracanie None, aby było spójne
-        return getattr(obj, 'result', None)
+        # Kolumna generowana 'score' (wyliczona przez bazę przy zapisie); None gdy brak wyniku - jak property 'result'
+        score = obj.score
+        return round(score, 1) if score else None
 
 # Wspólna klasa bazowa dla serializera wyników z 3 próbami i property
 class BaseSingleAttemptResultSerializer(serializers.ModelSerializer):
@@ -57,9 +58,8 @@ class BaseSingleAttemptResultSerializer(serializers.ModelSerializer):
         # read_only_fields = ['position'] # Jeśli pole istnieje
 
     def get_max_result_display(self, obj) -> float | None:
-        # Wywołuje property 'max_result' - obj będzie instancją TGUResult, KBSquatResult etc.
-        val = getattr(obj, 'max_result', None) # Używamy property 'max_result'
-        return val # Zwracamy wartość lub None
+        # Kolumna generowana 'best_result' - obj będzie instancją TGUResult, KBSquatResult etc.
+        return obj.best_result
 
     def get_bw_percentage_display(self, obj) -> float | None:
         # Wywołuje property 'bw_percentage'
@@ -105,4 +105,91 @@ class CategoryResultsSerializer(serializers.ModelSerializer):
             'snatch_result', 'tgu_result', 'kb_squat_result',
             'one_kettlebell_press_result', 'two_kettlebell_press_result',
         ]
-        read_only_fields = fields
\ No newline at end of file
+        read_only_fields = fields
+
+# --- Wprowadzanie prób przez sędziów (POST /api/attempts/batch/) ---
+class AttemptSerializer(serializers.Serializer):
+    """
+    Jedna próba: zawodnik, dyscyplina, numer próby (1-3) i wynik (null czyści próbę).
+    Snatch nie ma prób - zamiast attempt/value podaje się kettlebell_weight i/lub repetitions.
+    recorded_at - kiedy sędzia zapisał próbę na urządzeniu (rozstrzyga konflikty zaległych zgłoszeń).
+    """
+    player = serializers.IntegerField()
+    discipline = serializers.ChoiceField(choices=AVAILABLE_DISCIPLINES)
+    attempt = serializers.IntegerField(min_value=1, max_value=3, required=False)
+    value = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    kettlebell_weight = serializers.FloatField(min_value=0.0, allow_null=True, required=False)
+    repetitions = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+    recorded_at = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if attrs["discipline"] == SNATCH:
+            fields = {name: attrs[name] for name in ("kettlebell_weight", "repetitions") if name in attrs}
+            if not fields:
+                raise serializers.ValidationError("Snatch wymaga kettlebell_weight i/lub repetitions.")
+        else:
+            if "attempt" not in attrs or "value" not in attrs:
+                raise serializers.ValidationError("Wymagane są attempt (1-3) i value.")
+            fields = {f"result_{attrs['attempt']}": attrs["value"]}
+        return {
+            "player_id": attrs["player"],
+            "discipline": attrs["discipline"],
+            "fields": fields,
+            "recorded_at": attrs.get("recorded_at"),
+        }
+
+
+class AttemptSubmissionSerializer(serializers.Serializer):
+    """Zgłoszenie z kolejki urządzenia sędziego: klucz idempotencji wygenerowany przez klienta i jego próby."""
+    key = serializers.CharField(max_length=64)
+    attempts = AttemptSerializer(many=True, allow_empty=False)
+
+
+class AttemptBatchSerializer(serializers.Serializer):
+    """
+    Paczka prób ("attempts", klucz idempotencji w nagłówku Idempotency-Key - kontekst "idempotency_key")
+    albo zaległe zgłoszenia urządzenia ("submissions", każde z własnym kluczem). Po walidacji zawsze
+    {"submissions": [{"key" (albo None), "attempts"}]}. Zawodnicy i ich kategorie sprawdzane jednym
+    zapytaniem dla całej paczki.
+    """
+    attempts = AttemptSerializer(many=True, allow_empty=False, required=False)
+    submissions = AttemptSubmissionSerializer(many=True, allow_empty=False, required=False)
+
+    def validate(self, attrs):
+        if ("attempts" in attrs) == ("submissions" in attrs):
+            raise serializers.ValidationError("Podaj albo attempts, albo submissions.")
+        if "attempts" in attrs:
+            key = self.context.get("idempotency_key") or None
+            if key is not None and len(key) > 64:
+                raise serializers.ValidationError({"idempotency_key": "Klucz idempotencji może mieć najwyżej 64 znaki."})
+            submissions = [{"key": key, "attempts": attrs["attempts"]}]
+        else:
+            submissions = attrs["submissions"]
+
+        memberships = {}
+        rows = Player.categories.through.objects.filter(
+            player_id__in={attempt["player_id"] for submission in submissions for attempt in submission["attempts"]}
+        ).values_list("player_id", "category__disciplines")
+        for player_id, disciplines in rows:
+            memberships.setdefault(player_id, set()).update(disciplines or [])
+
+        errors = []
+        for submission in submissions:
+            submission_errors = []
+            for attempt in submission["attempts"]:
+                if attempt["player_id"] not in memberships:
+                    submission_errors.append(
+                        {"player": ["Zawodnik nie istnieje albo nie jest przypisany do żadnej kategorii."]}
+                    )
+                elif attempt["discipline"] not in memberships[attempt["player_id"]]:
+                    submission_errors.append({"discipline": ["Dyscyplina nie jest rozgrywana w kategoriach zawodnika."]})
+                else:
+                    submission_errors.append({})
+            errors.append(submission_errors)
+        if any(any(submission_errors) for submission_errors in errors):
+            if "attempts" in attrs:
+                raise serializers.ValidationError({"attempts": errors[0]})
+            raise serializers.ValidationError(
+                {"submissions": [{"attempts": submission_errors} if any(submission_errors) else {} for submission_errors in errors]}
+            )
+        return {"submissions": submissions}
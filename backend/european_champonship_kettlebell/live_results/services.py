@@ -1,14 +1,32 @@
 # Plik: services.py
 
+import gzip
+import json
+import logging
 import traceback
-from django.db import transaction
-from django.db.models import Case, F, FloatField, Value, When, IntegerField
-from django.db.models.functions import Greatest
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, Exists, F, FloatField, OuterRef, Subquery, Value, When, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from .models.tiebreak import PlayerCategoryTiebreak
+from .ranking import (
+    TIEBREAK_POINTS,
+    PlayerStanding,
+    assign_competition_ranks,
+    discipline_score,
+    rank_category,
+    rank_overall,
+)
 
 # Importuj NOWY model CategoryOverallResult i upewnij się, że reszta importów jest poprawna
 from .models import Category, Player
 from .models.constants import KB_SQUAT, ONE_KB_PRESS, SNATCH, TGU, TWO_KB_PRESS
+from .models.attempts import AttemptFieldVersion, AttemptSubmission
+from .models.leaderboard import CategoryLeaderboardDelta, CategoryLeaderboardSnapshot
+from .models.recalculation import RecalculationRequest
+from .models.results.category_discipline import CategoryDisciplineResult
 from .models.results.overall import CategoryOverallResult
 from .models.results import (
     KBSquatResult,
@@ -17,6 +35,15 @@ from .models.results import (
     TGUResult,
     TwoKettlebellPressResult,
 )
+from .renderers import ORJSONRenderer
+from .serializers import CategoryResultsSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
 
 # Mapy stałych (bez zmian, ale upewnij się, że są aktualne)
 DISCIPLINE_MODELS_MAP = {
@@ -27,19 +54,12 @@ DISCIPLINE_RELATED_NAMES = {
     SNATCH: "snatch_result", TGU: "tgu_result", KB_SQUAT: "kb_squat_one_result", # Sprawdź related_name!
     ONE_KB_PRESS: "one_kettlebell_press_result", TWO_KB_PRESS: "two_kettlebell_press_one_result", # Sprawdź related_name!
 }
+DISCIPLINE_BY_MODEL = {model: discipline for discipline, model in DISCIPLINE_MODELS_MAP.items()}
 OVERALL_POINTS_FIELDS = {
     SNATCH: "snatch_points", TGU: "tgu_points", KB_SQUAT: "kb_squat_points",
     ONE_KB_PRESS: "one_kb_press_points", TWO_KB_PRESS: "two_kb_press_points",
 }
-DISCIPLINE_ORDERING_LOGIC = {
-    SNATCH: "-calculated_snatch_score",
-    TGU: "-tgu_bw_ratio", # Było OK
-    # ZMIENIONO PONIŻSZE vvv
-    ONE_KB_PRESS: "-one_kettlebell_press_bw_ratio",
-    KB_SQUAT: "-kb_squat_bw_ratio",
-    TWO_KB_PRESS: "-two_kettlebell_press_bw_ratio",
-    # KONIEC ZMIAN ^^^
-}
+OVERALL_RESULT_FIELDS = list(OVERALL_POINTS_FIELDS.values()) + ["tiebreak_points", "total_points", "final_position"]
 DEFAULT_RESULT_VALUES = { # Potwierdź wartości domyślne
     SNATCH: {"kettlebell_weight": 0.0, "repetitions": 0}, # Użyj 0.0 dla FloatField
     # Usunięto 'max_result_val' i 'bw_percentage_val' z poniższych
@@ -49,321 +69,739 @@ DEFAULT_RESULT_VALUES = { # Potwierdź wartości domyślne
     TWO_KB_PRESS: {"result_1": 0.0, "result_2": 0.0, "result_3": 0.0},
 }
 
-# --- Funkcja update_discipline_positions (BEZ ZMIAN FUNKCJONALNYCH) ---
-# Nadal oblicza ranking w dyscyplinie i zapisuje w polu 'position'
-# indywidualnych wyników (np. SnatchResult.position).
-def update_discipline_positions(category: Category) -> None:
-    """Oblicza i aktualizuje pozycje graczy w dyscyplinach DLA DANEJ KATEGORII."""
+def annotate_discipline_score(results_qs, discipline: str):
+    """
+    Dodaje do zapytania o wyniki dyscypliny wynik rankingowy
+    (Snatch: waga x powtórzenia, pozostałe: najlepsza próba / waga ciała).
+    Wynik Snatch i najlepsza próba to kolumny generowane (score, best_result), więc baza
+    tylko je odczytuje; stosunek do wagi ciała zależy od Player.weight i jest liczony w zapytaniu.
+    Zwraca krotkę (queryset, nazwa_pola); nazwa to None dla nieznanej dyscypliny.
+    """
+    if discipline == SNATCH:
+        return results_qs, "score"
+    if discipline in [TGU, ONE_KB_PRESS, KB_SQUAT, TWO_KB_PRESS]: # Wspólna logika dla %MC
+        ratio_field = f"{discipline.lower()}_bw_ratio"
+        annotated_qs = results_qs.annotate(
+            **{ratio_field: Case(
+                When(player__weight__gt=0, best_result__gt=0, then=F("best_result") / F("player__weight")),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )}
+        )
+        return annotated_qs, ratio_field
+    return results_qs, None
 
-    print(f"\n=== DEBUG: Rozpoczynam update_discipline_positions dla kategorii: {category.name} (ID: {category.id}) ===")
-    DEBUG_DISCIPLINES = {KB_SQUAT, ONE_KB_PRESS, TWO_KB_PRESS}
 
-    players_in_category = Player.objects.filter(categories=category).only("id", "weight", "surname", "name")
-    if not players_in_category.exists():
-        print(f"DEBUG: Brak graczy w kategorii {category.id}. Pomijam.")
-        return
+RANKING_BACKEND_MEMORY = "memory"
+RANKING_BACKEND_SQL = "sql"
 
-    player_ids = list(players_in_category.values_list("id", flat=True))
-    disciplines = category.get_disciplines()
-    if not disciplines:
-        print(f"DEBUG: Kategoria {category.id} nie ma dyscyplin. Pomijam.")
-        return
 
-    print(f"DEBUG: Dyscypliny do przetworzenia: {disciplines}")
-    for discipline in disciplines:
-        print(f"\n  --- DEBUG: Przetwarzanie dyscypliny: {discipline} ---")
+def get_ranking_backend() -> str:
+    """Zwraca skonfigurowany sposób przeliczania rankingu (settings.RANKING_BACKEND)."""
+    return getattr(settings, "RANKING_BACKEND", RANKING_BACKEND_MEMORY)
 
-        model = DISCIPLINE_MODELS_MAP.get(discipline)
-        order_by_field = DISCIPLINE_ORDERING_LOGIC.get(discipline)
-        if not model or not order_by_field:
-            print(f"  DEBUG WARNING: Brak modelu lub logiki sortowania dla '{discipline}'. Pomijam.")
-            continue
 
-        results_qs = model.objects.select_related("player").filter(player_id__in=player_ids)
-        annotated_qs = results_qs
-        annotation_field_name = None
+def _write_positions_with_window(category: Category, discipline: str, annotated_qs, annotation_field_name: str) -> int:
+    """
+    Liczy pozycje funkcją okna RANK() OVER (ORDER BY wynik DESC) i zapisuje wynik oraz pozycję
+    do CategoryDisciplineResult jednym INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+    Aktualizowane są tylko wiersze ze zmienionym wynikiem lub pozycją.
+    Remisy dostają to samo miejsce, a kolejne jest pomijane - tak samo jak w pętli Pythonowej.
+    """
+    ranked_qs = (
+        annotated_qs.annotate(
+            new_position=Window(expression=Rank(), order_by=F(annotation_field_name).desc())
+        )
+        .order_by()  # Meta.ordering (player__categories) powielałby wiersze w podzapytaniu
+        .values("player_id", annotation_field_name, "new_position")
+    )
+    ranked_sql, params = ranked_qs.query.sql_with_params()
+    quote_name = connection.ops.quote_name
+    table = quote_name(CategoryDisciplineResult._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (category_id, player_id, discipline, score, position) "
+            f"SELECT %s, ranked.player_id, %s, ranked.{quote_name(annotation_field_name)}, ranked.new_position "
+            f"FROM ({ranked_sql}) AS ranked WHERE true "  # WHERE wymagane przez SQLite przed ON CONFLICT
+            f"ON CONFLICT (category_id, player_id, discipline) DO UPDATE "
+            f"SET score = EXCLUDED.score, position = EXCLUDED.position "
+            f"WHERE {table}.score IS DISTINCT FROM EXCLUDED.score "
+            f"OR {table}.position IS DISTINCT FROM EXCLUDED.position",
+            [category.id, discipline, *params],
+        )
+        return cursor.rowcount
+
 
-        try:
-            # --- Logika Adnotacji (zakłada istnienie pól result_1/2/3 w modelach!) ---
-            if discipline == SNATCH:
-                annotation_field_name = "calculated_snatch_score"
-                annotated_qs = results_qs.annotate(calculated_snatch_score=Case(When(kettlebell_weight__gt=0, repetitions__gt=0, then=F("kettlebell_weight") * F("repetitions")), default=Value(0.0), output_field=FloatField()))
-            elif discipline in [TGU, ONE_KB_PRESS, KB_SQUAT, TWO_KB_PRESS]: # Wspólna logika dla %MC
-                base_name = discipline.lower()
-                max_res_field = f"max_{base_name}_result"
-                ratio_field = f"{base_name}_bw_ratio"
-                annotation_field_name = ratio_field
-                # WAŻNE: Upewnij się, że modele TGU, OKBP, KBS, TKBP mają pola result_1, result_2, result_3
-                annotated_qs = results_qs.annotate(
-                    **{max_res_field: Greatest(F("result_1"), F("result_2"), F("result_3"), Value(0.0), output_field=FloatField())}
-                ).annotate(
-                    **{ratio_field: Case(
-                        When(**{f'player__weight__gt': 0, f'{max_res_field}__gt': 0}, then=F(max_res_field) / F("player__weight")),
-                        default=Value(0.0),
-                        output_field=FloatField(),
-                    )}
+def write_discipline_standings(
+    category: Category, standings: list[PlayerStanding], disciplines: list[str]
+) -> tuple[int, int]:
+    """
+    Zapisuje wyniki i pozycje w dyscyplinach kategorii do CategoryDisciplineResult:
+    nowe i zmienione wiersze jednym INSERT ... ON CONFLICT DO UPDATE, a wiersze zawodników,
+    których nie ma już w kategorii (lub dyscyplin usuniętych z kategorii) - jednym DELETE.
+    Zwraca (liczba zapisanych, liczba usuniętych).
+    """
+    existing_rows = {
+        (player_id, discipline): (row_id, score, position)
+        for row_id, player_id, discipline, score, position in CategoryDisciplineResult.objects.filter(
+            category=category
+        ).values_list("id", "player_id", "discipline", "score", "position")
+    }
+    rows_to_write = []
+    current_keys = set()
+    for standing in standings:
+        for discipline in disciplines:
+            if discipline not in standing.scores:
+                continue
+            key = (standing.player_id, discipline)
+            current_keys.add(key)
+            score, position = standing.scores[discipline], standing.positions.get(discipline)
+            stored = existing_rows.get(key)
+            if stored is None or stored[1:] != (score, position):
+                rows_to_write.append(
+                    CategoryDisciplineResult(
+                        category=category, player_id=standing.player_id, discipline=discipline,
+                        score=score, position=position,
+                    )
                 )
-            # --- Koniec Logiki Adnotacji ---
-
-            if not annotation_field_name:
-                 print(f"  DEBUG ERROR: Nie ustalono pola adnotacji dla {discipline}. Pomijam.")
-                 continue
-
-            ordered_results = annotated_qs.order_by(order_by_field, "player__surname", "player__name")
-            print(f"  DEBUG: Wyniki posortowane ({ordered_results.count()}).")
-
-            updates = []
-            current_pos = 0
-            last_score = None
-            rank_counter = 0
-            tie_start_rank = 1
-
-            # Logika remisu (bez epsilon)
-            print(f"    --- DEBUG: Pętla rankingu dla {discipline} ---")
-            for result in ordered_results:
-                rank_counter += 1
-                score = float(getattr(result, annotation_field_name, 0.0) or 0.0)
-
-                is_tie = False
-                if last_score is not None and score == last_score:
-                    is_tie = True
-
-                if not is_tie:
-                    current_pos = rank_counter
-                    last_score = score
-                    tie_start_rank = rank_counter
-                else:
-                    current_pos = tie_start_rank
+    stale_row_ids = [stored[0] for key, stored in existing_rows.items() if key not in current_keys]
+    if not rows_to_write and not stale_row_ids:
+        return 0, 0
 
-                if result.position != current_pos or result.position is None:
-                    result.position = current_pos
-                    updates.append(result)
+    with transaction.atomic():
+        if rows_to_write:
+            CategoryDisciplineResult.objects.bulk_create(
+                rows_to_write,
+                update_conflicts=True,
+                unique_fields=["category", "player", "discipline"],
+                update_fields=["score", "position"],
+            )
+        if stale_row_ids:
+            CategoryDisciplineResult.objects.filter(id__in=stale_row_ids).delete()
+    return len(rows_to_write), len(stale_row_ids)
 
-            print(f"    --- DEBUG: Koniec pętli rankingu. Aktualizacje: {len(updates)} ---")
 
-            if updates:
-                try:
-                    with transaction.atomic():
-                        updated_count = model.objects.bulk_update(updates, ["position"])
-                    print(f"    DEBUG SUCCESS: Zaktualizowano 'position' dla {updated_count} rekordów {model.__name__}.")
-                except Exception as e_bulk:
-                    print(f"    DEBUG ERROR: BŁĄD bulk_update 'position' dla {model.__name__}: {e_bulk}")
-                    traceback.print_exc()
-            else:
-                print(f"    DEBUG INFO: Brak zmian 'position' do zapisania dla {model.__name__}.")
+def _load_category_standings(category: Category, disciplines: list[str]) -> list[PlayerStanding]:
+    """
+    Jednym zapytaniem pobiera zawodników kategorii razem z wynikami we wszystkich jej
+    dyscyplinach (select_related po OneToOne) i flagą tiebreak. Zwraca stany bez pozycji.
+    """
+    players = (
+        Player.objects.filter(categories=category)
+        .select_related(*(DISCIPLINE_RELATED_NAMES[d] for d in disciplines))
+        .annotate(
+            has_tiebreak=Exists(
+                PlayerCategoryTiebreak.objects.filter(category=category, player_id=OuterRef("pk"))
+            )
+        )
+    )
+    standings = []
+    for player in players:
+        standing = PlayerStanding(
+            player_id=player.id,
+            surname=player.surname,
+            name=player.name,
+            tiebreak_points=TIEBREAK_POINTS if player.has_tiebreak else 0.0,
+        )
+        for discipline in disciplines:
+            result = getattr(player, DISCIPLINE_RELATED_NAMES[discipline], None)
+            if result is not None:
+                standing.scores[discipline] = discipline_score(discipline, result, player.weight)
+        standings.append(standing)
+    return standings
+
+
+# --- Funkcja update_discipline_positions ---
+# Oblicza ranking w dyscyplinie i zapisuje wynik oraz pozycję zawodnika w tabeli
+# CategoryDisciplineResult - osobno dla każdej kategorii, więc przeliczenie jednej
+# kategorii nie nadpisuje pozycji zawodnika w innej.
+# Dla RANKING_BACKEND = "sql" pozycje liczy baza (RANK() OVER), bez pętli w Pythonie.
+def update_discipline_positions(category: Category, use_window: bool | None = None) -> None:
+    """Oblicza i zapisuje pozycje graczy w dyscyplinach DLA DANEJ KATEGORII."""
+    if use_window is None:
+        use_window = get_ranking_backend() == RANKING_BACKEND_SQL
+    disciplines = [d for d in category.get_disciplines() if d in DISCIPLINE_MODELS_MAP]
+
+    if not use_window:
+        standings = _load_category_standings(category, disciplines)
+        rank_category(standings, disciplines)
+        written, removed = write_discipline_standings(category, standings, disciplines)
+        logger.info("[Ranking] Kat. %s: zapisane/usunięte pozycje w dyscyplinach: %s/%s", category.id, written, removed)
+        return
 
-        except Exception as e_outer:
-            print(f"  DEBUG ERROR: Niespodziewany błąd przetwarzania dyscypliny {discipline}: {e_outer}")
-            traceback.print_exc()
-        print(f"  --- DEBUG: Koniec przetwarzania dyscypliny: {discipline} ---")
-    print(f"=== DEBUG: Koniec update_discipline_positions dla kategorii: {category.name} ===")
+    category_rows = CategoryDisciplineResult.objects.filter(category=category)
+    with transaction.atomic():
+        removed, _ = category_rows.exclude(discipline__in=disciplines).delete()
+        written = 0
+        for discipline in disciplines:
+            results_qs = DISCIPLINE_MODELS_MAP[discipline].objects.filter(player__categories=category)
+            annotated_qs, annotation_field_name = annotate_discipline_score(results_qs, discipline)
+            written += _write_positions_with_window(category, discipline, annotated_qs, annotation_field_name)
+            # Zawodnicy, którzy odeszli z kategorii (lub nie mają już wyniku w dyscyplinie)
+            removed += category_rows.filter(discipline=discipline).exclude(
+                player_id__in=results_qs.values("player_id")
+            ).delete()[0]
+    logger.info(
+        "[Ranking] Kat. %s: RANK() OVER - zapisane/usunięte pozycje w dyscyplinach: %s/%s", category.id, written, removed
+    )
 
 
 def update_overall_results_for_category(category: Category) -> None:
     """
-    Oblicza i aktualizuje punkty ogólne i pozycje końcowe dla graczy
-    W RAMACH DANEJ KATEGORII, operując na modelu CategoryOverallResult.
-    Odczytuje obliczone wcześniej pozycje z indywidualnych wyników.
+    Oblicza punkty ogólne i miejsca końcowe graczy W RAMACH DANEJ KATEGORII
+    na podstawie zapisanych wcześniej pozycji w dyscyplinach (update_discipline_positions)
+    i zapisuje je jednym upsertem (write_category_standings).
     """
-    player_ids_in_category = list(Player.objects.filter(categories=category).values_list('id', flat=True))
-    DEBUG_DISCIPLINES = {KB_SQUAT, ONE_KB_PRESS, TWO_KB_PRESS}
+    disciplines = [d for d in category.get_disciplines() if d in DISCIPLINE_MODELS_MAP]
+    standings = {
+        player.id: PlayerStanding(
+            player_id=player.id,
+            surname=player.surname,
+            name=player.name,
+            tiebreak_points=TIEBREAK_POINTS if player.has_tiebreak else 0.0,
+        )
+        for player in Player.objects.filter(categories=category)
+        .only("id", "surname", "name")
+        .annotate(
+            has_tiebreak=Exists(
+                PlayerCategoryTiebreak.objects.filter(category=category, player_id=OuterRef("pk"))
+            )
+        )
+    }
+    positions = CategoryDisciplineResult.objects.filter(
+        category=category, discipline__in=disciplines, position__isnull=False
+    ).values_list("player_id", "discipline", "position")
+    for player_id, discipline, position in positions:
+        if player_id in standings:
+            standings[player_id].positions[discipline] = position
+
+    ranked = rank_overall(list(standings.values()), disciplines)
+    written, removed = write_category_standings(category, ranked)
+    logger.info(
+        "[Ranking] Kat. %s (%s): wyniki ogólne dla %s graczy, zapisane/usunięte wiersze: %s/%s",
+        category.name, category.id, len(ranked), written, removed,
+    )
+
+
+def _overall_values_for_standing(standing: PlayerStanding) -> dict:
+    """Buduje wartości pól CategoryOverallResult z obliczonego stanu zawodnika."""
+    values = {points_field: None for points_field in OVERALL_POINTS_FIELDS.values()}
+    for discipline, position in standing.positions.items():
+        values[OVERALL_POINTS_FIELDS[discipline]] = float(position)
+    values["tiebreak_points"] = standing.tiebreak_points
+    values["total_points"] = standing.total_points
+    values["final_position"] = standing.final_position
+    return values
 
-    if not player_ids_in_category:
-        print(f"Brak graczy w kat. {category.id}. Pomijam update_overall_results_for_category.")
-        # Rozważ usunięcie starych wyników, jeśli logika biznesowa tego wymaga
-        # CategoryOverallResult.objects.filter(category=category).delete()
-        return
 
-    print(f"Aktualizacja CategoryOverallResult dla kat: {category.name} ({category.id}), gracze: {player_ids_in_category}")
-    disciplines_in_category = category.get_disciplines()
-
-    # Pobierz indywidualne wyniki (tylko player_id i position) dla optymalizacji
-    discipline_positions = {}
-    # Dodano print debugujący
-    print(f"\n[DEBUG OVERALL - {category.id}] Pobieranie pozycji dla dyscyplin: {disciplines_in_category}")
-    for disc_const in disciplines_in_category:
-        model_class = DISCIPLINE_MODELS_MAP.get(disc_const)
-        if model_class:
-            # Upewnij się, że pole 'position' istnieje w modelu
-            try:
-                results = model_class.objects.filter(player_id__in=player_ids_in_category).values('player_id', 'position')
-                discipline_positions[disc_const] = {r['player_id']: r['position'] for r in results}
-                 # Dodano blok print debugujący
-                if disc_const in DEBUG_DISCIPLINES:
-                    print(f"  [DEBUG OVERALL - {category.id}] Pozycje dla {disc_const}: {discipline_positions[disc_const]}")
-            except Exception as e_val:
-                 print(f"  BŁĄD pobierania pozycji dla {model_class.__name__} w kat {category.id}: {e_val}")
-                 discipline_positions[disc_const] = {} # Ustaw pusty słownik w razie błędu
-
-    players_map = {p.id: p for p in Player.objects.filter(id__in=player_ids_in_category)}
-    # Pobierz istniejące wyniki Overall dla tej kategorii i graczy
-    overall_results_map = {
-        or_obj.player_id: or_obj
-        for or_obj in CategoryOverallResult.objects.filter(category=category, player_id__in=player_ids_in_category)
+def write_category_standings(category: Category, standings: list[PlayerStanding]) -> tuple[int, int]:
+    """
+    Zapisuje ranking ogólny kategorii zbiorowo: nowe i zmienione wiersze jednym
+    INSERT ... ON CONFLICT (player_id, category_id) DO UPDATE, a wiersze zawodników,
+    których nie ma już w kategorii - jednym DELETE. Wiersze bez zmian nie są dotykane.
+    Zwraca (liczba zapisanych, liczba usuniętych).
+    """
+    existing_values = {
+        row.pop("player_id"): row
+        for row in CategoryOverallResult.objects.filter(category=category).values("player_id", *OVERALL_RESULT_FIELDS)
     }
-    overall_updates = []
-    final_pos_updates = []
-    tiebreak_info = set(
-        PlayerCategoryTiebreak.objects.filter(
-            category=category,
-            player_id__in=player_ids_in_category
-        ).values_list('player_id', flat=True)
+    rows_to_write = []
+    for standing in standings:
+        values = _overall_values_for_standing(standing)
+        if existing_values.get(standing.player_id) != values:
+            rows_to_write.append(CategoryOverallResult(player_id=standing.player_id, category=category, **values))
+    stale_player_ids = existing_values.keys() - {standing.player_id for standing in standings}
+    if not rows_to_write and not stale_player_ids:
+        return 0, 0
+
+    with transaction.atomic():
+        if rows_to_write:
+            CategoryOverallResult.objects.bulk_create(
+                rows_to_write,
+                update_conflicts=True,
+                unique_fields=["player", "category"],
+                update_fields=OVERALL_RESULT_FIELDS,
+            )
+        if stale_player_ids:
+            CategoryOverallResult.objects.filter(category=category, player_id__in=stale_player_ids).delete()
+    return len(rows_to_write), len(stale_player_ids)
+
+
+# --- Migawki tabel wyników (CategoryLeaderboardSnapshot) ---
+# Przeliczenie rankingu zapisuje gotowy JSON tabeli wyników kategorii, a endpoint wyników
+# zwraca go bez budowania grafu ORM i serializerów przy każdym odświeżeniu strony.
+def get_category_results_queryset(category_id: int):
+    """Wyniki ogólne kategorii z graczem, klubem i wynikami dyscyplin (JOIN-y), w kolejności tabeli wyników."""
+    return (
+        CategoryOverallResult.objects.filter(category_id=category_id)
+        .select_related("player", "player__club", *(f"player__{name}" for name in DISCIPLINE_RELATED_NAMES.values()))
+        .order_by("final_position", "total_points", "player__surname", "player__name")
     )
-    print(f"  [DEBUG OVERALL - {category.id}] Gracze z tiebreakiem w tej kat: {tiebreak_info}") # Log debugujący
-    for player_id in player_ids_in_category:
-        player = players_map.get(player_id)
-        if not player: continue
-
-        overall_result = overall_results_map.get(player_id)
-        created_overall = False
-        if not overall_result:
-            # Użyj get_or_create dla bezpieczeństwa, jeśli jakimś cudem mapa jest niekompletna
-            overall_result, created_overall = CategoryOverallResult.objects.get_or_create(
-                player=player,
-                category=category,
-                # Można dodać defaults={}, ale get_or_create i tak użyje domyślnych modelu
+
+
+# Pola wyników dyscyplin w odpowiedzi endpointu wyników -> related_name wyniku zawodnika (jak w CategoryResultsSerializer)
+RESULTS_SINGLE_ATTEMPT_FIELDS = {
+    "tgu_result": DISCIPLINE_RELATED_NAMES[TGU],
+    "kb_squat_result": DISCIPLINE_RELATED_NAMES[KB_SQUAT],
+    "one_kettlebell_press_result": DISCIPLINE_RELATED_NAMES[ONE_KB_PRESS],
+    "two_kettlebell_press_result": DISCIPLINE_RELATED_NAMES[TWO_KB_PRESS],
+}
+RESULTS_POINTS_FIELDS = [*OVERALL_POINTS_FIELDS.values(), "tiebreak_points"]
+
+
+def get_category_results_rows(category_id: int) -> list[dict]:
+    """
+    Szybka ścieżka: wiersze endpointu wyników w kształcie CategoryResultsSerializer z jednego zapytania values(),
+    bez instancji modeli i SerializerMethodField. Wyniki liczy baza (kolumny generowane score/best_result,
+    stosunek wyniku do masy ciała); w Pythonie zostaje tylko zaokrąglenie, identyczne jak w serializerach.
+    """
+    # Id z URL-a może być napisem - kluczem wyniku jest id z bazy
+    return next(iter(get_categories_results_rows([category_id]).values()), [])
+
+
+def get_categories_results_rows(category_ids) -> dict[int, list[dict]]:
+    """get_category_results_rows dla wielu kategorii tym samym jednym zapytaniem: {id kategorii: wiersze}."""
+    snatch = DISCIPLINE_RELATED_NAMES[SNATCH]
+    fields = [
+        "final_position", "total_points", *RESULTS_POINTS_FIELDS,
+        "player_id", "player__name", "player__surname", "player__club__name", "player__weight",
+        f"player__{snatch}__id", f"player__{snatch}__kettlebell_weight", f"player__{snatch}__repetitions",
+        f"player__{snatch}__score",
+    ]
+    bw_ratios = {}
+    for key, related_name in RESULTS_SINGLE_ATTEMPT_FIELDS.items():
+        fields += [f"player__{related_name}__{name}" for name in ("id", "result_1", "result_2", "result_3", "best_result")]
+        bw_ratios[f"{key}_bw_ratio"] = Case(
+            When(
+                player__weight__gt=0,
+                **{f"player__{related_name}__best_result__gt": 0},
+                then=F(f"player__{related_name}__best_result") / F("player__weight") * Value(100.0),
+            ),
+            output_field=FloatField(),
+        )
+    values = (
+        CategoryOverallResult.objects.filter(category_id__in=category_ids)
+        .order_by("category_id", "final_position", "total_points", "player__surname", "player__name")
+        .values("category_id", *fields, **bw_ratios)
+    )
+
+    rows_by_category = {}
+    for value in values:
+        row = {
+            "final_position": value["final_position"],
+            "player": {
+                "id": value["player_id"],
+                "name": value["player__name"],
+                "surname": value["player__surname"],
+                "club_name": value["player__club__name"],
+                "weight": value["player__weight"],
+            },
+            "total_points": value["total_points"],
+            **{field: value[field] for field in RESULTS_POINTS_FIELDS},
+            "snatch_result": None,
+        }
+        if value[f"player__{snatch}__id"] is not None:
+            score = value[f"player__{snatch}__score"]
+            row["snatch_result"] = {
+                "kettlebell_weight": value[f"player__{snatch}__kettlebell_weight"],
+                "repetitions": value[f"player__{snatch}__repetitions"],
+                "result_score": round(score, 1) if score else None,
+            }
+        for key, related_name in RESULTS_SINGLE_ATTEMPT_FIELDS.items():
+            prefix = f"player__{related_name}__"
+            if value[f"{prefix}id"] is None:
+                row[key] = None
+                continue
+            bw_ratio = value[f"{key}_bw_ratio"]
+            row[key] = {
+                "result_1": value[f"{prefix}result_1"],
+                "result_2": value[f"{prefix}result_2"],
+                "result_3": value[f"{prefix}result_3"],
+                "max_result_display": value[f"{prefix}best_result"],
+                "bw_percentage_display": round(bw_ratio, 2) if bw_ratio is not None else None,
+            }
+        rows_by_category.setdefault(value["category_id"], []).append(row)
+    return rows_by_category
+
+
+def build_leaderboard_payload(category_id: int, fast: bool | None = None) -> str:
+    """
+    JSON tabeli wyników kategorii - ten sam, który zwraca endpoint /categories/{id}/results/.
+    fast=True - jedno zapytanie values() (get_category_results_rows), False - CategoryResultsSerializer,
+    None - wg ustawienia RESULTS_FAST_SERIALIZATION.
+    """
+    if fast is None:
+        fast = getattr(settings, "RESULTS_FAST_SERIALIZATION", True)
+    if fast:
+        results = get_category_results_rows(category_id)
+    else:
+        results = CategoryResultsSerializer(get_category_results_queryset(category_id), many=True).data
+    return _render_leaderboard_payload(results)
+
+
+def build_leaderboard_payloads(category_ids) -> dict[int, str]:
+    """JSON-y tabel wyników wielu kategorii (szybka ścieżka) z jednego zapytania: {id kategorii: JSON}."""
+    rows_by_category = get_categories_results_rows(category_ids)
+    return {category_id: _render_leaderboard_payload(rows_by_category.get(category_id, [])) for category_id in category_ids}
+
+
+def _render_leaderboard_payload(results) -> str:
+    renderer = ORJSONRenderer if getattr(settings, "API_FAST_RENDERERS", True) else JSONRenderer
+    return renderer().render(results).decode("utf-8")
+
+
+def diff_leaderboard_payloads(old_payload: str, new_payload: str) -> dict:
+    """Wiersze nowej tabeli wyników różne od starych (wg id zawodnika) i id zawodników, których już nie ma."""
+    old_rows = {row["player"]["id"]: row for row in json.loads(old_payload)}
+    new_rows = {row["player"]["id"]: row for row in json.loads(new_payload)}
+    return {
+        "rows": [row for player_id, row in new_rows.items() if old_rows.get(player_id) != row],
+        "removed": sorted(old_rows.keys() - new_rows.keys()),
+    }
+
+
+def merge_leaderboard_deltas(deltas: list[dict]) -> dict:
+    """Składa kolejne zmiany w jedną: późniejszy wiersz zawodnika zastępuje wcześniejszy."""
+    rows, removed = {}, set()
+    for changes in deltas:
+        for player_id in changes["removed"]:
+            rows.pop(player_id, None)
+            removed.add(player_id)
+        for row in changes["rows"]:
+            rows[row["player"]["id"]] = row
+            removed.discard(row["player"]["id"])
+    return {"rows": list(rows.values()), "removed": sorted(removed)}
+
+
+def get_leaderboard_changes(category_id: int, since: int) -> dict | None:
+    """
+    Zmiany tabeli wyników kategorii od rewizji `since` do bieżącej:
+    {"revision", "rows", "removed"}. None, gdy trzeba pobrać pełną tabelę - brak migawki,
+    nieznana rewizja albo starsza niż przechowywana historia zmian.
+    """
+    snapshots = CategoryLeaderboardSnapshot.objects.filter(category_id=category_id)
+    revision = snapshots.values_list("revision", flat=True).first()
+    if revision is None or since > revision:
+        return None
+    if since == revision:
+        return {"revision": revision, "rows": [], "removed": []}
+    deltas = list(
+        CategoryLeaderboardDelta.objects.filter(category_id=category_id, revision__gt=since, revision__lte=revision)
+        .order_by("revision")
+        .values_list("base_revision", "changes")
+    )
+    # Łańcuch zmian musi zaczynać się dokładnie od rewizji klienta
+    if not deltas or deltas[0][0] != since:
+        return None
+    return {"revision": revision, **merge_leaderboard_deltas([changes for _base, changes in deltas])}
+
+
+# Content-Encoding -> pole migawki z tabelą w tym kodowaniu, w kolejności preferencji serwera
+LEADERBOARD_ENCODINGS = {"br": "payload_brotli", "gzip": "payload_gzip"} if brotli is not None else {"gzip": "payload_gzip"}
+
+
+def compress_leaderboard_payload(payload: str) -> dict:
+    """
+    Skompresowane formy tabeli wyników (pola migawki) - liczone raz na zmianę tabeli, nie przy każdym żądaniu.
+    gzip zawsze, brotli tylko z zainstalowanym pakietem brotli (jakość 9 - 11 jest wielokrotnie wolniejsza
+    przy niewielkim zysku, a kompresja biegnie w zapisie wyniku). mtime=0: ta sama tabela daje te same bajty.
+    """
+    data = payload.encode("utf-8")
+    return {
+        "payload_gzip": gzip.compress(data, compresslevel=9, mtime=0),
+        "payload_brotli": brotli.compress(data, quality=9) if brotli is not None else None,
+    }
+
+
+def refresh_leaderboard_snapshot(category: Category) -> int:
+    """
+    Zapisuje aktualną tabelę wyników kategorii. Gdy jej treść się zmieniła, podbija
+    Category.revision, zapisuje migawkę z tą rewizją (ETag endpointu wyników) razem z formami gzip/brotli
+    i zmienione wiersze (CategoryLeaderboardDelta, dla ?since=). Zwraca aktualny numer rewizji migawki.
+    """
+    payload = build_leaderboard_payload(category.id)
+    with transaction.atomic():
+        current = (
+            CategoryLeaderboardSnapshot.objects.select_for_update()
+            .filter(category_id=category.id)
+            .values_list("payload", "revision")
+            .first()
+        )
+        if current is not None and current[0] == payload:
+            return current[1]
+
+        Category.objects.filter(pk=category.id).update(revision=F("revision") + 1)
+        revision = Category.objects.filter(pk=category.id).values_list("revision", flat=True).get()
+        if current is None:
+            CategoryLeaderboardSnapshot.objects.create(
+                category_id=category.id, payload=payload, revision=revision, **compress_leaderboard_payload(payload)
             )
-            if created_overall: print(f"  Stworzono CategoryOverallResult dla gracza {player_id} w kat {category.id}")
-            overall_results_map[player_id] = overall_result # Dodaj do mapy, jeśli stworzono
-        # else: print(f"  Aktualizacja CategoryOverallResult dla gracza {player_id} w kat {category.id}") # Mniej istotny log
-
-        changed = False # Flaga śledząca, czy cokolwiek się zmieniło dla tego gracza
-
-        # Aktualizuj punkty tiebreak
-        apply_tiebreak_for_this_category = player_id in tiebreak_info
-        new_tiebreak_points = -0.5 if apply_tiebreak_for_this_category else 0.0
-        if overall_result.tiebreak_points != new_tiebreak_points:
-            overall_result.tiebreak_points = new_tiebreak_points
-            changed = True
-            print(f"    [DEBUG OVERALL - {category.id}] Aktualizacja tiebreak_points dla gracza {player_id} na {new_tiebreak_points}") # Log debugujący
-
-        # Dodano print debugujący
-        print(f"  [DEBUG OVERALL - {category.id}] Przypisywanie punktów dla gracza: {player_id} ({player})")
-        for disc_const in disciplines_in_category:
-            points_field = OVERALL_POINTS_FIELDS.get(disc_const)
-            if not points_field: continue # Pomiń, jeśli dyscyplina nie ma mapowania na pole punktowe
-
-            # Odczytujemy 'position' z wcześniej pobranych danych
-            # Używamy .get(player_id) z domyślnym None, aby uniknąć KeyError
-            position = discipline_positions.get(disc_const, {}).get(player_id) # Bezpieczny dostęp
-            # Konwertuj pozycję na float lub None
-            new_points = float(position) if position is not None else None
-
-            # Dodano blok print debugujący
-            if disc_const in DEBUG_DISCIPLINES:
-                 print(f"    [DEBUG OVERALL - {category.id}] Dyscyplina: {disc_const}, Gracz: {player_id}")
-                 print(f"      -> Odczytana Pozycja: {position}")
-                 print(f"      -> Pole punktowe: {points_field}")
-                 print(f"      -> Przypisane Punkty (new_points): {new_points}")
-
-            # Sprawdź, czy wartość się zmieniła przed ustawieniem
-            if getattr(overall_result, points_field, None) != new_points:
-                setattr(overall_result, points_field, new_points)
-                changed = True
-                # Dodano print informujący o zmianie
-                if disc_const in DEBUG_DISCIPLINES:
-                    print(f"      *** ZMIANA punktów {points_field} dla gracza {player_id} na {new_points} ***")
-
-        # Wyzeruj punkty dla dyscyplin spoza kategorii
-        # (Ważne, jeśli gracz zmienił kategorię lub dyscypliny w kategorii zostały usunięte)
-        for disc_const_all, points_field_all in OVERALL_POINTS_FIELDS.items():
-             if disc_const_all not in disciplines_in_category:
-                  if getattr(overall_result, points_field_all, None) is not None:
-                       setattr(overall_result, points_field_all, None)
-                       changed = True
-                       print(f"    [DEBUG OVERALL - {category.id}] Zerowanie punktów {points_field_all} dla gracza {player_id} (dyscyplina poza kat.)")
-
-
-        # Oblicz sumę punktów po aktualizacji pól dyscyplin
-        old_total_points = overall_result.total_points
-        overall_result.calculate_total_points() # Wywołaj metodę z modelu
-        print(f"    [DEBUG OVERALL - {category.id}] Obliczono total_points: {overall_result.total_points} (poprzednio: {old_total_points})")
-        if old_total_points != overall_result.total_points:
-            changed = True
-
-        # Jeśli cokolwiek się zmieniło (lub obiekt został dopiero stworzony), dodaj go do listy do zapisu
-        if changed or created_overall:
-            # Nie dodawaj do overall_updates, jeśli obiekt dopiero co został stworzony przez get_or_create
-            # Dodaj go tylko jeśli istniał i się zmienił
-            if not created_overall and changed:
-                 overall_updates.append(overall_result)
-
-
-    # Zapisz zmiany punktów za pomocą bulk_update (tylko dla istniejących i zmienionych)
-    if overall_updates:
-        update_fields = list(OVERALL_POINTS_FIELDS.values()) + ["tiebreak_points", "total_points"]
+            return revision
+
+        previous_payload, previous_revision = current
+        CategoryLeaderboardSnapshot.objects.filter(category_id=category.id).update(
+            payload=payload, revision=revision, updated_at=timezone.now(), **compress_leaderboard_payload(payload)
+        )
+        CategoryLeaderboardDelta.objects.create(
+            category_id=category.id,
+            revision=revision,
+            base_revision=previous_revision,
+            changes=diff_leaderboard_payloads(previous_payload, payload),
+        )
+        # Zostaje `history` najnowszych zmian kategorii - liczonych po wierszach, bo rewizję podbija
+        # także zapis samej kategorii (Category.save), bez wiersza zmian. Każda zmiana ma inną rewizję,
+        # więc dopóki rewizji nie jest więcej niż `history`, nie ma czego usuwać
+        history = getattr(settings, "LEADERBOARD_DELTA_HISTORY", 100)
+        if revision > history:
+            deltas = CategoryLeaderboardDelta.objects.filter(category_id=category.id)
+            oldest_pruned = deltas.order_by("-revision").values("revision")[history : history + 1]
+            deltas.filter(revision__lte=Subquery(oldest_pruned)).delete()
+    return revision
+
+
+# --- Blokady doradcze PostgreSQL dla przeliczeń kategorii ---
+# pg_advisory_*(klucz1, klucz2): klucz1 to przestrzeń blokady, klucz2 - id kategorii.
+# RUNNING jest trzymana przez przeliczenie do końca jego transakcji (przeliczenia jednej
+# kategorii nie przeplatają się). PENDING trzyma przeliczenie czekające na RUNNING -
+# kolejne zgłoszenie, które jej nie dostanie, wie, że czekający przebieg zobaczy również
+# jego dane, więc może zostać pominięte.
+ADVISORY_LOCK_RUNNING = 41001
+ADVISORY_LOCK_PENDING = 41002
+
+
+def use_advisory_locks() -> bool:
+    """Blokady doradcze tylko na PostgreSQL i przy włączonym RECALC_ADVISORY_LOCKS."""
+    return connection.vendor == "postgresql" and getattr(settings, "RECALC_ADVISORY_LOCKS", True)
+
+
+def lock_category_for_recalculation(category_id: int) -> None:
+    """
+    Czeka na wyłączny dostęp do rankingu kategorii do końca bieżącej transakcji.
+    Musi być wywołana wewnątrz transaction.atomic().
+    """
+    if not use_advisory_locks():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ADVISORY_LOCK_RUNNING, category_id])
+
+
+def _acquire_recalculation_slot(category_id: int) -> bool:
+    """
+    Ustawia się w kolejce do przeliczenia kategorii. Zwraca False, gdy na blokadę czeka
+    już inne przeliczenie tej kategorii - wtedy bieżące jest zbędne.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [ADVISORY_LOCK_PENDING, category_id])
+        if not cursor.fetchone()[0]:
+            return False
         try:
-            # Dodano print debugujący
-            print(f"  [DEBUG OVERALL - {category.id}] Próba bulk_update dla pól: {update_fields}")
-            updated_points_count = CategoryOverallResult.objects.bulk_update(overall_updates, update_fields)
-             # Dodano print debugujący
-            print(f"  [DEBUG OVERALL - {category.id}] Wynik bulk_update (punkty): {updated_points_count} rekordów.")
-        except Exception as e_bulk:
-            print(f"  BŁĄD bulk operacji CategoryOverallResult (punkty) w kat {category.id}: {e_bulk}")
-            traceback.print_exc()
-    else:
-         print(f"  [DEBUG OVERALL - {category.id}] Brak zmian punktów CategoryOverallResult do zapisania (poza nowo stworzonymi).")
-
-
-    # --- Oblicz i zaktualizuj MIEJSCA KOŃCOWE (final_position) ---
-    # Pobierz WSZYSTKIE wyniki dla kategorii (w tym te nowo stworzone)
-    final_results_qs = CategoryOverallResult.objects.filter(
-        category=category, player_id__in=player_ids_in_category
-    ).annotate(
-        # Pomocnicza adnotacja do sortowania - nulls last dla total_points
-        total_points_is_null=Case(When(total_points__isnull=True, then=Value(1)), default=Value(0), output_field=IntegerField())
-    ).select_related('player') # select_related dla dostępu do player__surname etc.
-
-    # Sortuj wg total_points (niskie lepsze, nulls last), potem nazwiska
-    final_results_list = list(final_results_qs.order_by(
-        'total_points_is_null', "total_points", "player__surname", "player__name"
-    ))
-
-    current_final_pos = 0
-    last_total_points = None # Śledzi ostatni wynik do obsługi remisów
-    final_rank_counter = 0 # Licznik pozycji w pętli
-    tie_start_rank_final = 1 # Zapamiętuje pozycję, od której zaczął się remis
-
-    print(f"\n  [DEBUG OVERALL - {category.id}] Obliczanie Miejsc Końcowych dla {len(final_results_list)} wyników...")
-    for result in final_results_list:
-        final_rank_counter += 1
-        current_total_points = result.total_points # Może być None
-
-        is_tie_final = False
-        # Sprawdź remis (tylko jeśli oba wyniki nie są None LUB oba są None)
-        if current_total_points is not None and last_total_points is not None:
-            # Użyj porównania z tolerancją dla float? Na razie dokładne.
-            if current_total_points == last_total_points: is_tie_final = True
-        elif current_total_points is None and last_total_points is None: is_tie_final = True # Dwa None to też "remis" na końcu listy
-
-        calculated_final_pos_for_iteration = 0
-        if not is_tie_final:
-            # Nowy wynik (lub pierwszy wynik) -> nowa pozycja
-            calculated_final_pos_for_iteration = final_rank_counter
-            last_total_points = current_total_points # Zaktualizuj ostatni wynik
-            tie_start_rank_final = final_rank_counter # Zapamiętaj pozycję startową potencjalnego remisu
+            # Savepoint: błąd oczekiwania (np. statement_timeout) nie blokuje zwolnienia PENDING
+            with transaction.atomic():
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ADVISORY_LOCK_RUNNING, category_id])
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [ADVISORY_LOCK_PENDING, category_id])
+    return True
+
+
+def recalculate_category(category: Category) -> bool:
+    """
+    Przelicza ranking kategorii pod blokadą doradczą kategorii (PostgreSQL).
+
+    Poza transakcją (dane wywołującego są już zatwierdzone) przeliczenie jest pomijane,
+    jeśli na blokadę czeka już inne przeliczenie tej kategorii - ono i tak uwzględni
+    zatwierdzone zmiany. Wewnątrz transakcji zawsze czeka na swoją kolej.
+    Zwraca False, gdy przeliczenie zostało pominięte.
+    """
+    if not use_advisory_locks():
+        _recalculate_category(category)
+        return True
+
+    can_skip = not connection.in_atomic_block
+    with transaction.atomic():
+        if can_skip:
+            if not _acquire_recalculation_slot(category.id):
+                logger.info("[Ranking] Kat. %s: przeliczenie już czeka na blokadę. Pomijam.", category.id)
+                return False
         else:
-            # Remis -> użyj pozycji startowej remisu
-            calculated_final_pos_for_iteration = tie_start_rank_final
+            lock_category_for_recalculation(category.id)
+        _recalculate_category(category)
+    return True
 
-        # Sprawdź, czy pozycja się zmieniła
-        if result.final_position != calculated_final_pos_for_iteration or result.final_position is None:
-            result.final_position = calculated_final_pos_for_iteration
-            final_pos_updates.append(result) # Dodaj do listy do aktualizacji
-            # print(f"    Aktualizacja final_position dla gracza {result.player_id} w kat {category.id}: {calculated_final_pos_for_iteration}") # Mniej istotny log
 
-    # Zapisz zmiany miejsc końcowych za pomocą bulk_update
-    if final_pos_updates:
-        try:
-            updated_pos_count = CategoryOverallResult.objects.bulk_update(final_pos_updates, ["final_position"])
-            print(f"  [DEBUG OVERALL - {category.id}] Zaktualizowano final_position CategoryOverallResult dla {updated_pos_count} graczy.")
-        except Exception as e_bulk_final:
-            print(f"  BŁĄD bulk_update final_position CategoryOverallResult w kat {category.id}: {e_bulk_final}")
-            traceback.print_exc()
+def _recalculate_category(category: Category) -> None:
+    """
+    Przelicza cały ranking kategorii jednym przebiegiem w pamięci.
+
+    Jedno zapytanie pobiera zawodników kategorii razem z wynikami we wszystkich jej
+    dyscyplinach (select_related po OneToOne) i flagą tiebreak, dwa kolejne - zapisane
+    CategoryDisciplineResult i CategoryOverallResult kategorii. Pozycje, punkty i miejsca
+    końcowe liczy ranking.rank_category, a do bazy trafiają tylko wiersze, których
+    wartości faktycznie się zmieniły.
+
+    Dla RANKING_BACKEND = "sql" pozycje w dyscyplinach liczy baza (RANK() OVER).
+    """
+    if get_ranking_backend() == RANKING_BACKEND_SQL:
+        # Pozycje w dyscyplinach liczone w bazie, punkty i miejsca końcowe - dotychczasową ścieżką
+        with transaction.atomic():
+            update_discipline_positions(category, use_window=True)
+            update_overall_results_for_category(category)
+            refresh_leaderboard_snapshot(category)
+        return
+
+    disciplines = [d for d in category.get_disciplines() if d in DISCIPLINE_MODELS_MAP]
+    standings = _load_category_standings(category, disciplines)
+    rank_category(standings, disciplines)
+
+    with transaction.atomic():
+        positions_written, positions_removed = write_discipline_standings(category, standings, disciplines)
+        written, removed = write_category_standings(category, standings)
+        revision = refresh_leaderboard_snapshot(category)
+
+    logger.info(
+        "[Ranking] Kat. %s (%s): %s graczy, zapisane/usunięte pozycje w dyscyplinach: %s/%s, "
+        "zapisane/usunięte wyniki ogólne: %s/%s, rewizja tabeli wyników: %s",
+        category.name, category.id, len(standings), positions_written, positions_removed, written, removed, revision,
+    )
+
+
+def _update_final_positions_in_band(category: Category, changed_rows: dict, old_totals: dict) -> list:
+    """
+    Przelicza miejsca końcowe tylko w przedziale sum punktów objętym zmianą.
+
+    Miejsce = 1 + liczba zawodników z mniejszą sumą. Sumy spoza przedziału
+    [min(stare, nowe), max(stare, nowe)] się nie zmieniły, więc ich miejsca też nie.
+    Zwraca wiersze spoza changed_rows, którym zmieniło się final_position.
+    """
+    all_totals = list(old_totals.values()) + [row.total_points for row in changed_rows.values()]
+    low_total, high_total = min(all_totals), max(all_totals)
+    category_rows = CategoryOverallResult.objects.filter(category=category, player__categories=category)
+    below_count = category_rows.filter(total_points__lt=low_total).count()
+    band_rows = list(
+        category_rows.filter(total_points__gte=low_total, total_points__lte=high_total)
+        .exclude(player_id__in=changed_rows.keys())
+        .order_by()
+    )
+    band = band_rows + list(changed_rows.values())
+    band.sort(key=lambda row: row.total_points)
+    band_ranks = assign_competition_ranks([(row.player_id, row.total_points) for row in band])
+
+    moved_band_rows = []
+    for row in band:
+        new_final_position = below_count + band_ranks[row.player_id]
+        if row.final_position != new_final_position:
+            row.final_position = new_final_position
+            if row.player_id not in changed_rows:
+                moved_band_rows.append(row)
+    return moved_band_rows
+
+
+def update_category_incrementally(
+    category: Category, discipline: str, player_id: int, old_score: float, new_score: float
+) -> bool:
+    """
+    Aktualizuje ranking kategorii po zmianie wyniku JEDNEGO zawodnika w jednej dyscyplinie.
+
+    Pozycja w dyscyplinie = 1 + liczba zawodników z lepszym wynikiem, więc zmiana wyniku
+    z old_score na new_score przesuwa o jedno miejsce tylko zawodników z wynikiem
+    pomiędzy starym a nowym - wyszukiwanych po indeksie (category, discipline, score)
+    w CategoryDisciplineResult. Tylko ich punkty i sumy w CategoryOverallResult są zmieniane,
+    a miejsca końcowe przeliczane są w przedziale sum objętym zmianą - koszt zależy od tego,
+    jak daleko przesunął się zawodnik, a nie od wielkości kategorii.
+
+    Zwraca False, gdy zapisanego stanu nie da się bezpiecznie zaktualizować przyrostowo
+    (np. brak wcześniejszej pozycji) - wtedy należy przeliczyć całą kategorię.
+    """
+    if discipline not in category.get_disciplines() or old_score == new_score:
+        return True
+
+    points_field = OVERALL_POINTS_FIELDS[discipline]
+    if new_score > old_score:
+        low_score, high_score, delta = old_score, new_score, 1
     else:
-        print(f"  [DEBUG OVERALL - {category.id}] Brak zmian final_position CategoryOverallResult do zapisania.")
+        low_score, high_score, delta = new_score, old_score, -1
+
+    discipline_rows = CategoryDisciplineResult.objects.filter(category=category, discipline=discipline).order_by()
+    moved_result = discipline_rows.filter(player_id=player_id).only("id", "player_id", "score", "position").first()
+    if moved_result is None or moved_result.position is None or moved_result.score != old_score:
+        return False
 
-    print(f"--- [DEBUG OVERALL - {category.id}] Koniec update_overall_results_for_category ---")
+    other_results = discipline_rows.exclude(player_id=player_id)
+    shifted_results = list(
+        other_results.filter(score__gte=low_score, score__lt=high_score).only("id", "player_id", "score", "position")
+    )
+    new_position = other_results.filter(score__gt=new_score).count() + 1
+
+    affected_ids = {result.player_id for result in shifted_results} | {player_id}
+    changed_rows = {
+        row.player_id: row
+        for row in CategoryOverallResult.objects.filter(category=category, player_id__in=affected_ids)
+    }
+    if len(changed_rows) != len(affected_ids):
+        return False
+
+    old_totals = {}
+    for row_player_id, row in changed_rows.items():
+        old_points = getattr(row, points_field)
+        if old_points is None or row.total_points is None:
+            return False
+        new_points = float(new_position) if row_player_id == player_id else old_points + delta
+        old_totals[row_player_id] = row.total_points
+        setattr(row, points_field, new_points)
+        row.total_points = row.total_points + (new_points - old_points)
+
+    moved_band_rows = _update_final_positions_in_band(category, changed_rows, old_totals)
+
+    moved_result.score = new_score
+    moved_result.position = new_position
+    for result in shifted_results:
+        result.position = int(getattr(changed_rows[result.player_id], points_field))
+
+    with transaction.atomic():
+        CategoryOverallResult.objects.bulk_update(
+            list(changed_rows.values()) + moved_band_rows, [points_field, "total_points", "final_position"]
+        )
+        CategoryDisciplineResult.objects.bulk_update(shifted_results + [moved_result], ["score", "position"])
+
+    logger.info(
+        "[Ranking przyrostowy] Kat. %s (%s), %s: gracz %s na pozycji %s, przesunięci: %s, "
+        "zmienione miejsca końcowe poza nimi: %s",
+        category.name, category.id, discipline, player_id, new_position, len(shifted_results), len(moved_band_rows),
+    )
+    return True
+
+
+def is_incremental_ranking() -> bool:
+    """Czy zapis pojedynczego wyniku aktualizuje ranking przyrostowo (INCREMENTAL_RANKING poza trybem kolejki)."""
+    return getattr(settings, "INCREMENTAL_RANKING", True) and not is_queue_mode()
+
+
+def update_results_after_result_change(player: Player, discipline: str, previous_score: float | None) -> None:
+    """
+    Aktualizuje rankingi po zapisaniu wyniku zawodnika w jednej dyscyplinie.
+
+    Przy włączonym INCREMENTAL_RANKING i znanym wyniku sprzed zapisu zmieniane są tylko
+    pozycje zawodników pomiędzy starym a nowym miejscem, w kategoriach zawierających
+    tę dyscyplinę. W każdym innym przypadku - pełne przeliczenie wyników gracza.
+    """
+    if previous_score is None or not is_incremental_ranking():
+        update_overall_results_for_player(player)
+        return
+
+    model = DISCIPLINE_MODELS_MAP[discipline]
+    result = model.objects.select_related("player").filter(player=player).first()
+    if result is None:
+        update_overall_results_for_player(player)
+        return
+
+    new_score = discipline_score(discipline, result, result.player.weight)
+    for category in player.categories.all():
+        with transaction.atomic():
+            lock_category_for_recalculation(category.id)
+            if update_category_incrementally(category, discipline, player.id, previous_score, new_score):
+                refresh_leaderboard_snapshot(category)
+            else:
+                logger.warning("[Ranking przyrostowy] Kat. %s: brak spójnego stanu, pełne przeliczenie.", category.id)
+                recalculate_category(category)
 
 @transaction.atomic
 def update_overall_results_for_player(player: Player) -> None:
@@ -406,6 +844,9 @@ def update_overall_results_for_player(player: Player) -> None:
                 category_id__in=category_ids_to_delete_results_for
             ).delete()
             print(f"  Usunięto {deleted_count} przestarzałych rekordów CategoryOverallResult.")
+            # Pozostali zawodnicy tych kategorii zmieniają miejsca, a ich tabele wyników - treść
+            for left_category in Category.objects.filter(id__in=category_ids_to_delete_results_for):
+                recalculate_category(left_category)
         else:
             print("  Brak przestarzałych wyników Overall do usunięcia.")
 
@@ -426,16 +867,353 @@ def update_overall_results_for_player(player: Player) -> None:
         print(f"Aktualizuję wyniki dla gracza {player.id} w kategoriach: {[c.name for c in current_categories]}")
         for category in current_categories: # Iteruj po obiektach Category
             print(f"\n--- Aktualizacja dla Kategorii: {category.name} ({category.id}) ---")
-            # 1. Oblicz pozycje w dyscyplinach dla tej kategorii
-            update_discipline_positions(category)
-            # 2. Oblicz wyniki ogólne dla tej kategorii
-            update_overall_results_for_category(category)
+            # Pozycje w dyscyplinach, punkty i miejsca końcowe - jeden przebieg w pamięci
+            recalculate_category(category)
         print(f"=== Zakończono pełną aktualizację wyników dla gracza: {player} ({player.id}) ===")
     except Exception as e:
         print(f"!!! KRYTYCZNY BŁĄD podczas aktualizacji bieżących wyników dla gracza {player.id} ({player}): {e}")
         traceback.print_exc()
 
 
+# --- Paczki prób od sędziów (POST /api/attempts/batch/) ---
+# Pola wyników wpisywane przez sędziów - dla nich prowadzone są wersje (AttemptFieldVersion)
+ATTEMPT_FIELDS = {
+    discipline: ("kettlebell_weight", "repetitions") if discipline == SNATCH else ("result_1", "result_2", "result_3")
+    for discipline in DISCIPLINE_MODELS_MAP
+}
+
+
+def apply_attempt_batch(attempts: list[dict]) -> dict:
+    """
+    Zapisuje paczkę prób w jednej transakcji i przelicza każdą dotkniętą kategorię raz.
+
+    attempts: [{"player_id", "discipline", "fields": {pole wyniku: wartość}, "recorded_at" (opcjonalnie)}]
+    (AttemptBatchSerializer). Każde zapisane pole dostaje wersję (AttemptFieldVersion) z czasem zapisania
+    próby u sędziego (recorded_at, domyślnie chwila odbioru); wartość starsza od zapisanej wersji jest
+    pomijana jako nieaktualna, a w paczce wygrywa najnowsza próba pola (przy równym czasie - późniejsza).
+    Wersje są czytane dopiero po zablokowaniu wierszy wyników, więc współbieżne paczki z tym samym polem
+    porównują czasy po kolei. Wyniki są zapisywane przez bulk_update/bulk_create, więc sygnały post_save
+    nie uruchamiają przeliczenia po każdym wyniku. Kategoria jest dotknięta, gdy zmieniony wynik należy
+    do jej zawodnika i liczy się w niej dyscyplina. W trybie kolejki kategorie są oznaczane do przeliczenia
+    w tej samej transakcji.
+    Zwraca {"created", "updated", "categories", "stale"} (liczby wyników, posortowane id kategorii,
+    pominięte pola jako trójki (player_id, dyscyplina, pole)).
+    """
+    now = timezone.now()
+    changes = {}  # dyscyplina -> player_id -> {pole: (wartość, recorded_at)}
+    for attempt in attempts:
+        recorded_at = attempt.get("recorded_at") or now
+        fields = changes.setdefault(attempt["discipline"], {}).setdefault(attempt["player_id"], {})
+        for field, value in attempt["fields"].items():
+            if field not in fields or recorded_at >= fields[field][1]:
+                fields[field] = (value, recorded_at)
+
+    created = updated = 0
+    changed_disciplines = {}  # player_id -> dyscypliny ze zmienionym wynikiem
+    stale, versions = [], []
+    with transaction.atomic():
+        existing = {}  # dyscyplina -> player_id -> zablokowany wynik
+        for discipline, player_values in changes.items():
+            # Bez domyślnego sortowania (SnatchResult sortuje po kategoriach gracza - LEFT JOIN, którego
+            # PostgreSQL nie pozwala blokować) i blokując tylko wiersze wyników
+            locked_results = DISCIPLINE_MODELS_MAP[discipline].objects.order_by().select_for_update(of=("self",))
+            existing[discipline] = {
+                result.player_id: result for result in locked_results.filter(player_id__in=player_values)
+            }
+        stored = {
+            (player_id, discipline, field): recorded_at
+            for player_id, discipline, field, recorded_at in AttemptFieldVersion.objects.filter(
+                player_id__in={player_id for player_values in changes.values() for player_id in player_values}
+            ).values_list("player_id", "discipline", "field", "recorded_at")
+        }
+
+        for discipline, player_values in changes.items():
+            model = DISCIPLINE_MODELS_MAP[discipline]
+            to_create, to_update, update_fields = [], [], set()
+            for player_id, fields in player_values.items():
+                values = {}
+                for field, (value, recorded_at) in fields.items():
+                    slot = (player_id, discipline, field)
+                    if slot in stored and recorded_at < stored[slot]:
+                        stale.append(slot)
+                        continue
+                    values[field] = value
+                    versions.append(AttemptFieldVersion(
+                        player_id=player_id, discipline=discipline, field=field, recorded_at=recorded_at
+                    ))
+                result = existing[discipline].get(player_id)
+                if result is None:
+                    if not values:
+                        continue
+                    to_create.append(model(player_id=player_id, **values))
+                else:
+                    changed = {field: value for field, value in values.items() if getattr(result, field) != value}
+                    if not changed:
+                        continue
+                    for field, value in changed.items():
+                        setattr(result, field, value)
+                    to_update.append(result)
+                    update_fields.update(changed)
+                changed_disciplines.setdefault(player_id, set()).add(discipline)
+            if to_create:
+                model.objects.bulk_create(to_create)
+            if to_update:
+                model.objects.bulk_update(to_update, sorted(update_fields))
+            created += len(to_create)
+            updated += len(to_update)
+        if versions:
+            AttemptFieldVersion.objects.bulk_create(
+                versions,
+                update_conflicts=True,
+                unique_fields=["player", "discipline", "field"],
+                update_fields=["recorded_at"],
+            )
+
+        category_ids = set()
+        memberships = Player.categories.through.objects.filter(player_id__in=changed_disciplines).values_list(
+            "player_id", "category_id", "category__disciplines"
+        )
+        for player_id, category_id, disciplines in memberships:
+            if changed_disciplines[player_id] & set(disciplines or []):
+                category_ids.add(category_id)
+
+        if is_queue_mode():
+            mark_categories_dirty(category_ids)
+        elif category_ids:
+            def recalculate_after_commit():
+                for category in Category.objects.filter(pk__in=category_ids):
+                    recalculate_category(category)
+
+            transaction.on_commit(recalculate_after_commit)
+
+    logger.info(
+        "[Paczka prób] %s prób: utworzone/zmienione wyniki: %s/%s, pominięte nieaktualne pola: %s, "
+        "kategorie do przeliczenia: %s",
+        len(attempts), created, updated, len(stale), sorted(category_ids),
+    )
+    return {"created": created, "updated": updated, "categories": sorted(category_ids), "stale": stale}
+
+
+def record_attempt_versions(player_id: int, discipline: str, fields, recorded_at=None) -> None:
+    """
+    Zapisuje wersje pól wyniku zmienionych poza paczkami prób (np. w adminie).
+
+    Spóźnione zgłoszenie sędziego sprzed tej zmiany jest wtedy pomijane jako nieaktualne.
+    """
+    fields = [field for field in fields if field in ATTEMPT_FIELDS[discipline]]
+    if not fields:
+        return
+    recorded_at = recorded_at or timezone.now()
+    AttemptFieldVersion.objects.bulk_create(
+        [
+            AttemptFieldVersion(player_id=player_id, discipline=discipline, field=field, recorded_at=recorded_at)
+            for field in fields
+        ],
+        update_conflicts=True,
+        unique_fields=["player", "discipline", "field"],
+        update_fields=["recorded_at"],
+    )
+
+
+def apply_attempt_submissions(submissions: list[dict], user=None) -> dict:
+    """
+    Zapisuje zgłoszenia z urządzeń sędziów (także zaległe, wysłane po odzyskaniu sieci) najwyżej raz.
+
+    submissions: [{"key" (albo None), "attempts": [...]}] (AttemptBatchSerializer). Zgłoszenie o znanym
+    kluczu nie jest stosowane ponownie - zwracany jest zapisany wtedy wynik. Próby wszystkich zgłoszeń
+    trafiają do apply_attempt_batch naraz (konflikty rozstrzyga recorded_at) - każda kategoria jest
+    przeliczana raz na całą paczkę. Gdy ten sam klucz zapisze w międzyczasie równoległe żądanie,
+    transakcja jest wycofywana i powtarzana raz - zgłoszenie dostaje wtedy status "duplicate".
+    Zwraca wynik apply_attempt_batch i "submissions": [{"key", "status", "applied", "stale"}].
+    """
+    try:
+        return _apply_attempt_submissions(submissions, user)
+    except IntegrityError:
+        # Po wycofaniu widać zatwierdzony zapis równoległego żądania
+        logger.info("[Paczka prób] Klucz zapisany równolegle przez inne żądanie, ponawiam.")
+        return _apply_attempt_submissions(submissions, user)
+
+
+def _apply_attempt_submissions(submissions: list[dict], user) -> dict:
+    now = timezone.now()
+    keys = [submission["key"] for submission in submissions if submission["key"] is not None]
+    statuses, summaries = [], []  # status i wynik każdego zgłoszenia, w kolejności zgłoszeń
+    latest = {}  # (player_id, dyscyplina, pole) -> (recorded_at, indeks zgłoszenia, wartość)
+    entry_counts = {}  # indeks zgłoszenia -> liczba pól w jego próbach
+    with transaction.atomic():
+        stored_summaries = dict(AttemptSubmission.objects.filter(key__in=keys).values_list("key", "summary"))
+        request_keys = set()
+        for index, submission in enumerate(submissions):
+            key = submission["key"]
+            if key is not None and (key in stored_summaries or key in request_keys):
+                statuses.append("duplicate")
+                summaries.append(stored_summaries.get(key))  # powtórzony w tej paczce - uzupełniany niżej
+                continue
+            if key is not None:
+                request_keys.add(key)
+            statuses.append("applied")
+            summaries.append(None)
+            for attempt in submission["attempts"]:
+                recorded_at = attempt.get("recorded_at") or now
+                for field, value in attempt["fields"].items():
+                    entry_counts[index] = entry_counts.get(index, 0) + 1
+                    # Najnowsza próba każdego pola w paczce (przy równym czasie - późniejsza w paczce)
+                    slot = (attempt["player_id"], attempt["discipline"], field)
+                    if slot not in latest or recorded_at >= latest[slot][0]:
+                        latest[slot] = (recorded_at, index, value)
+
+        result = apply_attempt_batch(
+            [
+                {"player_id": player_id, "discipline": discipline, "fields": {field: value}, "recorded_at": recorded_at}
+                for (player_id, discipline, field), (recorded_at, _, value) in latest.items()
+            ]
+        )
+        stale = set(result["stale"])
+        applied_counts = {}
+        for slot, (_, index, _) in latest.items():
+            if slot not in stale:
+                applied_counts[index] = applied_counts.get(index, 0) + 1
+
+        new_submissions = []
+        for index, submission in enumerate(submissions):
+            if statuses[index] != "applied":
+                continue
+            applied = applied_counts.get(index, 0)
+            summary = {"applied": applied, "stale": entry_counts.get(index, 0) - applied}
+            summaries[index] = summary
+            if submission["key"] is not None:
+                new_submissions.append(AttemptSubmission(key=submission["key"], user=user, summary=summary))
+        AttemptSubmission.objects.bulk_create(new_submissions)
+
+    first_summaries = {
+        submission["key"]: summary
+        for submission, status, summary in zip(submissions, statuses, summaries, strict=True)
+        if status == "applied" and submission["key"] is not None
+    }
+    result["submissions"] = [
+        {"key": submission["key"], "status": status, **(summary or first_summaries[submission["key"]])}
+        for submission, status, summary in zip(submissions, statuses, summaries, strict=True)
+    ]
+    duplicates = statuses.count("duplicate")
+    if duplicates:
+        logger.info("[Paczka prób] Pominięto %s powtórzonych zgłoszeń (klucze idempotencji).", duplicates)
+    return result
+
+
+# --- Kolejka przeliczeń (RECALC_MODE = "queue") ---
+# Zapisy tylko oznaczają kategorie jako "brudne", a run_recalc_worker przelicza
+# każdą z nich raz, niezależnie od liczby zapisów, które trafiły w międzyczasie.
+RECALC_MODE_IMMEDIATE = "immediate"
+RECALC_MODE_QUEUE = "queue"
+
+
+def is_queue_mode() -> bool:
+    """Czy przeliczenia są zlecane do kolejki (settings.RECALC_MODE == "queue")."""
+    return getattr(settings, "RECALC_MODE", RECALC_MODE_IMMEDIATE) == RECALC_MODE_QUEUE
+
+
+def mark_categories_dirty(category_ids) -> int:
+    """
+    Oznacza kategorie do przeliczenia jednym INSERT ... ON CONFLICT.
+    Dla kategorii już oczekującej aktualizowany jest tylko last_requested_at -
+    requested_at (od kiedy czeka) zostaje, więc kolejne zapisy się scalają.
+    """
+    category_ids = set(category_ids)
+    if not category_ids:
+        return 0
+    now = timezone.now()
+    RecalculationRequest.objects.bulk_create(
+        [RecalculationRequest(category_id=category_id, requested_at=now, last_requested_at=now) for category_id in category_ids],
+        update_conflicts=True,
+        unique_fields=["category"],
+        update_fields=["last_requested_at"],
+    )
+    logger.info("[Kolejka] Oznaczono kategorie do przeliczenia: %s", sorted(category_ids))
+    return len(category_ids)
+
+
+def schedule_category_recalculation(category: Category) -> None:
+    """Przelicza kategorię od razu albo - w trybie kolejki - oznacza ją do przeliczenia."""
+    if is_queue_mode():
+        mark_categories_dirty([category.id])
+    else:
+        recalculate_category(category)
+
+
+def schedule_player_recalculation(player: Player) -> None:
+    """
+    Odpowiednik update_overall_results_for_player dla trybu kolejki: usuwa wyniki ogólne
+    z kategorii, z których gracz odszedł, i oznacza jego aktualne kategorie do przeliczenia.
+    """
+    if not is_queue_mode():
+        update_overall_results_for_player(player)
+        return
+    current_category_ids = set(player.categories.values_list("id", flat=True))
+    stale_results = CategoryOverallResult.objects.filter(player=player).exclude(category_id__in=current_category_ids)
+    left_category_ids = set(stale_results.values_list("category_id", flat=True))
+    stale_results.delete()
+    # Kategorie, z których gracz odszedł, też wymagają przeliczenia (miejsca pozostałych, tabela wyników)
+    mark_categories_dirty(current_category_ids | left_category_ids)
+
+
+def mark_player_discipline_dirty(player: Player, discipline: str) -> int:
+    """Oznacza do przeliczenia kategorie gracza, w których liczy się podana dyscyplina."""
+    category_ids = [
+        category.id for category in player.categories.only("id", "disciplines") if discipline in category.get_disciplines()
+    ]
+    return mark_categories_dirty(category_ids)
+
+
+def get_recalculation_queue_stats() -> dict:
+    """Zwraca głębokość kolejki i opóźnienie najstarszego zgłoszenia (w sekundach)."""
+    pending = RecalculationRequest.objects.order_by("requested_at")
+    oldest = pending.values_list("requested_at", flat=True).first()
+    return {
+        "depth": pending.count(),
+        "oldest_lag_seconds": (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+    }
+
+
+def process_recalculation_queue(limit: int | None = None) -> list[dict]:
+    """
+    Przelicza oczekujące kategorie - każdą dokładnie raz, od najstarszego zgłoszenia.
+
+    Zgłoszenie jest usuwane w tej samej transakcji co przeliczenie, więc zapis, który
+    trafi w trakcie, tworzy nowe zgłoszenie i kategoria zostanie przeliczona ponownie.
+    Na PostgreSQL wiersze zablokowane przez inny worker są pomijane (SKIP LOCKED).
+    Błąd przeliczenia jednej kategorii jest logowany, a jej zgłoszenie zostaje w kolejce
+    (transakcja jest wycofywana) - pozostałe kategorie są przeliczane dalej.
+    Zwraca listę {category_id, category_name, lag_seconds, duration_seconds}.
+    """
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    processed = []
+    pending_ids = list(RecalculationRequest.objects.order_by("requested_at").values_list("id", flat=True)[:limit])
+    for request_id in pending_ids:
+        started = timezone.now()
+        try:
+            with transaction.atomic():
+                claimed_qs = RecalculationRequest.objects.select_related("category").filter(pk=request_id)
+                if skip_locked:
+                    claimed_qs = claimed_qs.select_for_update(skip_locked=True, of=("self",))
+                claimed = claimed_qs.first()
+                if claimed is None:
+                    continue  # Przeliczone już przez inny worker
+                category = claimed.category
+                claimed.delete()
+                recalculate_category(category)
+        except Exception:
+            logger.exception("[Kolejka] Błąd przeliczenia zgłoszenia %s, zostaje w kolejce.", request_id)
+            continue
+        finished = timezone.now()
+        processed.append({
+            "category_id": category.id,
+            "category_name": category.name,
+            "lag_seconds": (started - claimed.requested_at).total_seconds(),
+            "duration_seconds": (finished - started).total_seconds(),
+        })
+    return processed
+
+
 # --- Funkcja create_default_results_for_player_categories (bez zmian) ---
 # Tworzy domyślne SnatchResult, TGUResult itp.
 def create_default_results_for_player_categories(player: Player, category_pks: set[int]):
@@ -1,10 +1,11 @@
+import logging
 import traceback
 
 from django.db import transaction
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models.signals import m2m_changed, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Player
+from .models import Category, Player, SportClub
 from .models.results import (
     KBSquatResult,
     OneKettlebellPressResult,
@@ -12,15 +13,44 @@ from .models.results import (
     TGUResult,
     TwoKettlebellPressResult,
 )
+from .ranking import discipline_score
 from .services import (
+    DISCIPLINE_BY_MODEL,
     create_default_results_for_player_categories,
-    update_overall_results_for_player,
+    is_incremental_ranking,
+    is_queue_mode,
+    mark_player_discipline_dirty,
+    schedule_category_recalculation,
+    schedule_player_recalculation,
+    update_results_after_result_change,
 )
+
+logger = logging.getLogger(__name__)
+
 RESULT_MODELS_TO_TRACK = [
     SnatchResult, TGUResult, KBSquatResult,
     OneKettlebellPressResult, TwoKettlebellPressResult,
 ]
 
+
+def remember_previous_score(sender, instance, **kwargs):
+    """
+    Zapamiętuje wynik rankingowy sprzed zapisu (instance._previous_score).
+    Na jego podstawie ranking jest aktualizowany przyrostowo zamiast pełnego przeliczenia.
+    Bez aktualizacji przyrostowej (INCREMENTAL_RANKING wyłączone, tryb kolejki) nikt go nie czyta,
+    więc dodatkowe zapytanie przy każdym zapisie jest pomijane.
+    """
+    instance._previous_score = None
+    if instance.pk is None or not is_incremental_ranking():
+        return
+    previous = sender.objects.select_related("player").filter(pk=instance.pk).first()
+    if previous is not None and previous.player_id == instance.player_id:
+        instance._previous_score = discipline_score(DISCIPLINE_BY_MODEL[sender], previous, previous.player.weight)
+
+
+for result_model in RESULT_MODELS_TO_TRACK:
+    pre_save.connect(remember_previous_score, sender=result_model, dispatch_uid=f"previous_score_{result_model.__name__}")
+
 def handle_result_save_logic(sender, instance, created, **kwargs):
     """
     Shared logic to handle result save.
@@ -29,6 +59,12 @@ def handle_result_save_logic(sender, instance, created, **kwargs):
     player_instance = getattr(instance, "player", None)
     if player_instance and isinstance(player_instance, Player):
         player_id = player_instance.id
+        discipline = DISCIPLINE_BY_MODEL[sender]
+        if is_queue_mode():
+            # Oznaczenie w tej samej transakcji co zapis wyniku - przeliczy to run_recalc_worker
+            mark_player_discipline_dirty(player_instance, discipline)
+            return
+        previous_score = None if created else getattr(instance, "_previous_score", None)
         print(
             f"[Signal post_save - {sender.__name__}] Zapisano dla gracza {player_id}. "
             f"Planuję aktualizację wyników po zatwierdzeniu transakcji..."
@@ -39,7 +75,7 @@ def handle_result_save_logic(sender, instance, created, **kwargs):
             print(f"[Signal post_save on_commit - {sender.__name__}] Rozpoczynam aktualizację dla gracza {player_id}...")
             try:
                 player_to_update = Player.objects.get(pk=player_id)
-                update_overall_results_for_player(player_to_update)
+                update_results_after_result_change(player_to_update, discipline, previous_score)
                 print(f"[Signal post_save on_commit - {sender.__name__}] Zakończono aktualizację dla gracza {player_id}.")
             except Player.DoesNotExist:
                  print(f"[Signal post_save on_commit ERROR - {sender.__name__}] Gracz {player_id} nie istnieje już w bazie?")
@@ -131,7 +167,7 @@ def handle_player_category_change(sender, instance, action, pk_set, **kwargs):
                 print(
                     f"[Signal m2m_changed on_commit] Uruchamiam pełną aktualizację wyników dla gracza {player.id}..."
                 )
-                update_overall_results_for_player(player)
+                schedule_player_recalculation(player)
                 print(
                     f"[Signal m2m_changed on_commit] Zakończono przetwarzanie dla gracza {player.id}."
                 )
@@ -145,3 +181,20 @@ def handle_player_category_change(sender, instance, action, pk_set, **kwargs):
                 traceback.print_exc()
 
         transaction.on_commit(process_after_commit)
+
+
+@receiver(post_save, sender=SportClub)
+def handle_sport_club_change(sender, instance, created, **kwargs):
+    """
+    Nazwa klubu jest częścią zapisanych tabel wyników (CategoryLeaderboardSnapshot) -
+    po zmianie klubu przeliczamy kategorie jego zawodników, co odświeża ich migawki.
+    """
+    if created:
+        return
+
+    def process_after_commit():
+        for category in Category.objects.filter(players__club=instance).distinct():
+            logger.info("[Signal post_save on_commit - SportClub] Klub %s zmieniony, odświeżam kat. %s.", instance.id, category.id)
+            schedule_category_recalculation(category)
+
+    transaction.on_commit(process_after_commit)
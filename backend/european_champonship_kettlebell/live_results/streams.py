@@ -0,0 +1,185 @@
+"""
+Strumień Server-Sent Events ze zmianami tabel wyników (wymaga serwera ASGI).
+
+Jeden LeaderboardBroadcaster na proces: jedno zadanie asyncio co LIVE_STREAM_POLL_INTERVAL
+sekund czyta rewizje migawek (CategoryLeaderboardSnapshot) - jedno małe zapytanie na proces,
+niezależnie od liczby podłączonych klientów. Dla kategorii, których rewizja wzrosła, pobiera
+zapisane zmienione wiersze (CategoryLeaderboardDelta), koduje zdarzenie SSE raz i wrzuca je
+do kolejek subskrybentów. Przeliczenia
+mogą biec w innych procesach (worker kolejki, admin) - baza jest jedynym wspólnym stanem.
+Bezczynne połączenie to tylko kolejka asyncio, więc proces utrzyma ich tysiące.
+
+Uruchomienie: `uvicorn european_champonship_kettlebell.asgi:application` (albo gunicorn
+z `-k uvicorn.workers.UvicornWorker`). Pod WSGI widoki strumienia odpowiadają 501 -
+każdy klient zająłby tam worker na czas całego połączenia.
+"""
+
+import asyncio
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models.leaderboard import CategoryLeaderboardSnapshot
+from .services import get_leaderboard_changes
+
+STANDINGS_EVENT = "standings"
+READY_EVENT = "ready"
+RESYNC_EVENT = "resync"
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(data: dict, event: str, event_id: str | None = None) -> bytes:
+    """Koduje jedno zdarzenie SSE (kompaktowy JSON w jednej linii data:)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), ensure_ascii=False)}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class Subscriber:
+    """
+    Jedno połączenie SSE: kategoria (None - wszystkie) i kolejka gotowych zdarzeń
+    w postaci (id kategorii, których dotyczy zdarzenie; zakodowane zdarzenie).
+    """
+
+    def __init__(self, category_id: int | None, queue_size: int):
+        self.category_id = category_id
+        self.queue: asyncio.Queue[tuple[tuple[int, ...], bytes]] = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, category_id: int) -> bool:
+        return self.category_id is None or self.category_id == category_id
+
+    def push(self, category_id: int, message: bytes) -> None:
+        try:
+            self.queue.put_nowait(((category_id,), message))
+        except asyncio.QueueFull:
+            # Klient nie nadąża - zamiast zaległych różnic dostaje polecenie pobrania pełnych tabel
+            # wszystkich kategorii, których zmiany wypadły z kolejki
+            changed_ids = {category_id}
+            while not self.queue.empty():
+                changed_ids.update(self.queue.get_nowait()[0])
+            changed_ids = tuple(sorted(changed_ids))
+            self.queue.put_nowait((changed_ids, format_sse({"category_ids": list(changed_ids)}, RESYNC_EVENT)))
+
+    async def next_message(self, timeout: float) -> bytes:
+        """Następne zdarzenie z kolejki; asyncio.TimeoutError, gdy przez `timeout` sekund nic nie przyszło."""
+        _category_ids, message = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        return message
+
+
+class LeaderboardBroadcaster:
+    """
+    Odpytuje rewizje migawek, gdy ktoś słucha, i rozsyła zmiany subskrybentom.
+
+    Stan (ostatnio rozesłane rewizje) zmienia się tylko w pętli zdarzeń, razem z rozesłaniem
+    zmian, a nowy subskrybent dostaje w zdarzeniu "ready" właśnie te rewizje - każde późniejsze
+    przeliczenie trafi do niego jako zdarzenie, również to z chwili przed pierwszym odczytem.
+    """
+
+    def __init__(self):
+        self._subscribers: set[Subscriber] = set()
+        self._task: asyncio.Task | None = None
+        # category_id -> rewizja, do której zmiany zostały już rozesłane
+        self._revisions: dict[int, int] = {}
+        self._primed = False
+        self._prime_lock: asyncio.Lock | None = None
+
+    async def subscribe(self, category_id: int | None) -> tuple[Subscriber, dict[int, int]]:
+        """Rejestruje subskrybenta; zwraca go razem z rewizjami, od których będzie dostawał zmiany."""
+        if self._prime_lock is None:
+            self._prime_lock = asyncio.Lock()
+        async with self._prime_lock:
+            if not self._primed:
+                # Punkt odniesienia czytany przed zdarzeniem "ready", a nie przy pierwszym odczycie pętli
+                self._revisions = await sync_to_async(self._read_revisions)()
+                self._primed = True
+        subscriber = Subscriber(category_id, getattr(settings, "LIVE_STREAM_QUEUE_SIZE", 100))
+        self._subscribers.add(subscriber)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        revisions = {
+            revision_category_id: revision
+            for revision_category_id, revision in self._revisions.items()
+            if subscriber.wants(revision_category_id)
+        }
+        return subscriber, revisions
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def _run(self) -> None:
+        interval = getattr(settings, "LIVE_STREAM_POLL_INTERVAL", 1.0)
+        try:
+            while self._subscribers:
+                try:
+                    revisions, events = await sync_to_async(self._poll)(dict(self._revisions))
+                except Exception:
+                    logger.exception("Błąd odczytu rewizji tabel wyników")
+                else:
+                    self._revisions = revisions
+                    for category_id, message in events:
+                        for subscriber in list(self._subscribers):
+                            if subscriber.wants(category_id):
+                                subscriber.push(category_id, message)
+                await asyncio.sleep(interval)
+        finally:
+            # Nikt nie słucha - stan zostanie odbudowany przy następnej subskrypcji
+            self._revisions = {}
+            self._primed = False
+
+    @staticmethod
+    def _read_revisions() -> dict[int, int]:
+        close_old_connections()
+        return dict(CategoryLeaderboardSnapshot.objects.values_list("category_id", "revision"))
+
+    def _poll(self, previous_revisions: dict[int, int]) -> tuple[dict[int, int], list[tuple[int, bytes]]]:
+        """
+        Synchronicznie (wątek ORM): rewizje wszystkich migawek i zdarzenia dla kategorii,
+        których rewizja wzrosła od `previous_revisions`. Zwraca (nowe rewizje, zdarzenia).
+        """
+        revisions = self._read_revisions()
+        events = []
+        for category_id, revision in revisions.items():
+            previous = previous_revisions.get(category_id)
+            if previous == revision:
+                continue
+            changes = get_leaderboard_changes(category_id, previous) if previous is not None else None
+            if changes is None:
+                # Nowa kategoria albo luka w historii zmian - klient pobiera pełną tabelę
+                message = format_sse({"category_id": category_id, "revision": revision}, RESYNC_EVENT)
+            else:
+                # Zmiany mogą sięgać nowszej rewizji niż odczytana przed chwilą - zapamiętujemy rewizję ze zmian
+                revisions[category_id] = changes["revision"]
+                event_id = f"{category_id}-{changes['revision']}"
+                message = format_sse({"category_id": category_id, **changes}, STANDINGS_EVENT, event_id)
+            events.append((category_id, message))
+        return revisions, events
+
+
+broadcaster = LeaderboardBroadcaster()
+
+
+async def standings_event_stream(category_id: int | None):
+    """
+    Generator odpowiedzi SSE: zdarzenie "ready" z aktualnymi rewizjami, potem zdarzenia
+    "standings" ze zmienionymi wierszami i komentarz-heartbeat co LIVE_STREAM_HEARTBEAT sekund
+    (proxy nie zamyka bezczynnego połączenia). Rozłączenie klienta przerywa generator.
+    """
+    heartbeat = getattr(settings, "LIVE_STREAM_HEARTBEAT", 15.0)
+    subscriber, revisions = await broadcaster.subscribe(category_id)
+    try:
+        revisions = {str(revision_category_id): revision for revision_category_id, revision in revisions.items()}
+        yield b"retry: 5000\n\n" + format_sse({"category_id": category_id, "revisions": revisions}, READY_EVENT)
+        while True:
+            try:
+                yield await subscriber.next_message(heartbeat)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+    finally:
+        broadcaster.unsubscribe(subscriber)
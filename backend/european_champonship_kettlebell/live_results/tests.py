@@ -1,2 +1,1365 @@
 """Tests for the live results app."""
-# Create your tests here.
+import asyncio
+import contextlib
+import datetime
+import decimal
+import gzip
+import io
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.template.loader import render_to_string
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from .exports import (
+    CATEGORY_EXPORT_TEMPLATE,
+    OVERALL_EXPORT_TEMPLATE,
+    category_export_context,
+    category_results_table,
+    export_static_site,
+    openpyxl,
+    overall_results_table,
+    stream_category_results_html,
+    stream_csv,
+    write_xlsx,
+)
+from .management.commands.populate_players import CATEGORY_NAMES, generate_event
+from .models import (
+    AttemptSubmission,
+    Category,
+    CategoryDisciplineResult,
+    CategoryLeaderboardDelta,
+    CategoryLeaderboardSnapshot,
+    CategoryOverallResult,
+    KBSquatResult,
+    Player,
+    RecalculationRequest,
+    SnatchResult,
+    SportClub,
+    TGUResult,
+)
+from .models.constants import KB_SQUAT, SNATCH, TGU
+from .ranking import TIEBREAK_POINTS, PlayerStanding, assign_competition_ranks, rank_category
+from .renderers import ORJSONRenderer, msgpack, orjson
+from .resources import PlayerExportResource
+from . import services, streams
+from .results_cache import _lock_key, get_cached_category_results
+from .streams import LeaderboardBroadcaster, Subscriber, format_sse
+from .services import (
+    DISCIPLINE_MODELS_MAP,
+    OVERALL_RESULT_FIELDS,
+    build_leaderboard_payload,
+    get_leaderboard_changes,
+    merge_leaderboard_deltas,
+    process_recalculation_queue,
+    recalculate_category,
+    update_overall_results_for_player,
+    update_results_after_result_change,
+)
+
+# Athletes in the query budget fixture. Large enough that one query per row blows every budget below.
+BUDGET_EVENT_SIZE = 30
+# Athletes in the query plan fixture.
+PLAN_EVENT_SIZE = 10_000
+# Tables small enough (one row per category) that a sequential scan is the right plan.
+SEQ_SCAN_ALLOWED_TABLES = {"live_results_category"}
+
+
+class QueryBudgetMixin:
+    """assertMaxQueries: like assertNumQueries, but fails only above the budget and lists the queries."""
+
+    @contextlib.contextmanager
+    def assertMaxQueries(self, budget: int, label: str):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = "\n".join(f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, 1))
+            self.fail(f"{label}: {executed} queries, budget is {budget}.\n{queries}")
+
+
+def _silently(func, *args, **kwargs):
+    """Runs func without the [Ranking]/[Signal] prints of the services."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+class RankedEventMixin:
+    """
+    setUpTestData: an event built by generate_event, every category recalculated once. Test classes set only
+    what differs (event_seed, event_category_names, ...); prepare_event changes results before the recalculation.
+    """
+
+    event_size = BUDGET_EVENT_SIZE
+    event_seed = 0
+    event_category_names = ("Open",)
+    event_all_disciplines = True
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.categories = generate_event(
+            cls.event_size,
+            seed=cls.event_seed,
+            category_names=list(cls.event_category_names),
+            all_disciplines=cls.event_all_disciplines,
+        )
+        cls.category = cls.categories[0]
+        cls.prepare_event()
+        for category in cls.categories:
+            _silently(recalculate_category, category)
+
+    @classmethod
+    def prepare_event(cls):
+        """Hook for edge cases that should already be part of the first standings."""
+
+
+class RankingEngineTests(SimpleTestCase):
+    """ranking.py: competition ranks, empty and zero scores, tiebreaks and name order - no database."""
+
+    @staticmethod
+    def _standing(player_id, surname, name="A", **scores):
+        return PlayerStanding(player_id=player_id, surname=surname, name=name, scores=scores)
+
+    def test_ties_share_a_place_and_skip_the_next(self):
+        ranks = assign_competition_ranks([(1, 10.0), (2, 8.0), (3, 8.0), (4, 5.0)])
+        self.assertEqual(ranks, {1: 1, 2: 2, 3: 2, 4: 4})
+        self.assertEqual(assign_competition_ranks([(1, 5.0), (2, None), (3, None)]), {1: 1, 2: 2, 3: 2})
+        self.assertEqual(assign_competition_ranks([]), {})
+
+    def test_zero_and_missing_scores(self):
+        standings = [
+            self._standing(1, "Nowak", snatch=0.0, tgu=0.5),
+            self._standing(2, "Kowal", snatch=0.0),
+            self._standing(3, "Wiśniewski", snatch=120.0, tgu=0.5),
+            self._standing(4, "Zieliński"),  # no result records at all
+        ]
+        ranked = rank_category(standings, [SNATCH, TGU])
+        by_id = {standing.player_id: standing for standing in ranked}
+        # Zero scores are still ranked (and tie); a missing result record gets no position
+        self.assertEqual(by_id[1].positions, {SNATCH: 2, TGU: 1})
+        self.assertEqual(by_id[2].positions, {SNATCH: 2})
+        self.assertEqual(by_id[3].positions, {SNATCH: 1, TGU: 1})
+        self.assertEqual(by_id[2].total_points, 2.0)
+        # No points at all: no total and last place, after every ranked athlete; equal totals share a place
+        self.assertIsNone(by_id[4].total_points)
+        self.assertEqual([standing.player_id for standing in ranked], [2, 3, 1, 4])
+        self.assertEqual([standing.final_position for standing in ranked], [1, 1, 3, 4])
+
+    def test_tiebreak_points_break_a_tie(self):
+        standings = [self._standing(1, "Adamczyk", snatch=100.0), self._standing(2, "Bąk", snatch=100.0)]
+        self.assertEqual([s.final_position for s in rank_category(standings, [SNATCH])], [1, 1])
+
+        standings = [self._standing(1, "Adamczyk", snatch=100.0), self._standing(2, "Bąk", snatch=100.0)]
+        standings[1].tiebreak_points = TIEBREAK_POINTS
+        ranked = rank_category(standings, [SNATCH])
+        self.assertEqual([(s.player_id, s.total_points, s.final_position) for s in ranked], [(2, 0.5, 1), (1, 1.0, 2)])
+
+    def test_equal_results_are_listed_by_surname_then_name(self):
+        standings = [
+            self._standing(1, "Nowak", "Zofia", snatch=50.0),
+            self._standing(2, "Kowalski", "Jan", snatch=50.0),
+            self._standing(3, "Nowak", "Anna", snatch=50.0),
+        ]
+        ranked = rank_category(standings, [SNATCH])
+        self.assertEqual([standing.player_id for standing in ranked], [2, 3, 1])
+        self.assertEqual({standing.final_position for standing in ranked}, {1})
+
+
+class RankingBackendParityTests(RankedEventMixin, TestCase):
+    """RANKING_BACKEND = "sql" (RANK() OVER in the database) must produce the same standings as the in-memory engine."""
+
+    event_seed = 17
+
+    @classmethod
+    def prepare_event(cls):
+        players = list(cls.category.players.order_by("id"))
+        # Ties and edge cases: equal snatch scores, equal TGU ratios, zero body weight, an empty result
+        SnatchResult.objects.filter(player__in=players[:4]).update(kettlebell_weight=24.0, repetitions=100)
+        Player.objects.filter(pk__in=[player.pk for player in players[4:7]]).update(weight=80.0)
+        TGUResult.objects.filter(player__in=players[4:7]).update(result_1=40.0, result_2=None, result_3=32.0)
+        Player.objects.filter(pk=players[7].pk).update(weight=0.0)
+        TGUResult.objects.filter(player=players[8]).delete()
+
+    def _standings(self):
+        positions = {
+            (player_id, discipline): (position, score)
+            for player_id, discipline, position, score in CategoryDisciplineResult.objects.filter(
+                category=self.category
+            ).values_list("player_id", "discipline", "position", "score")
+        }
+        overall = set(
+            CategoryOverallResult.objects.filter(category=self.category).values_list(
+                "player_id", "total_points", "final_position"
+            )
+        )
+        return positions, overall
+
+    def test_sql_backend_matches_memory_backend(self):
+        with self.settings(RANKING_BACKEND="memory"):
+            _silently(recalculate_category, self.category)
+        memory_positions, memory_overall = self._standings()
+        snatch_positions = [position for (_, discipline), (position, _) in memory_positions.items() if discipline == SNATCH]
+        self.assertLess(len(set(snatch_positions)), len(snatch_positions))  # the fixture has ties
+        CategoryDisciplineResult.objects.filter(category=self.category).delete()
+        CategoryOverallResult.objects.filter(category=self.category).delete()
+
+        with self.settings(RANKING_BACKEND="sql"):
+            _silently(recalculate_category, self.category)
+        sql_positions, sql_overall = self._standings()
+
+        self.assertEqual(sql_positions.keys(), memory_positions.keys())
+        for key, (position, score) in memory_positions.items():
+            self.assertEqual(sql_positions[key][0], position, key)
+            self.assertAlmostEqual(sql_positions[key][1], score, places=9, msg=key)
+        self.assertEqual(sql_overall, memory_overall)
+
+
+class IncrementalRankingTests(RankedEventMixin, TestCase):
+    """INCREMENTAL_RANKING: single result saves must leave the same standings as a full recalculation."""
+
+    class _Rollback(Exception):
+        pass
+
+    event_seed = 23
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.players = list(cls.category.players.order_by("id"))
+
+    def _standings(self):
+        positions = {
+            (player_id, discipline): (position, score)
+            for player_id, discipline, position, score in CategoryDisciplineResult.objects.filter(
+                category=self.category
+            ).values_list("player_id", "discipline", "position", "score")
+        }
+        overall = {
+            row[0]: row[1:]
+            for row in CategoryOverallResult.objects.filter(category=self.category).values_list(
+                "player_id", *OVERALL_RESULT_FIELDS
+            )
+        }
+        return positions, overall
+
+    def _recalculated_standings(self):
+        """Standings after a full recalculation, rolled back so the incremental state keeps accumulating."""
+        try:
+            with transaction.atomic():
+                _silently(recalculate_category, Category.objects.get(pk=self.category.pk))
+                standings = self._standings()
+                raise self._Rollback
+        except self._Rollback:
+            return standings
+
+    def _save(self, result):
+        with contextlib.redirect_stdout(io.StringIO()), self.captureOnCommitCallbacks(execute=True):
+            result.save()
+
+    @staticmethod
+    def _change_snatch(rng, result, other, change):
+        if change == "raise":
+            result.repetitions = (result.repetitions or 0) + rng.randint(1, 60)
+        elif change == "lower":
+            result.repetitions = max(1, (result.repetitions or 0) - rng.randint(1, 60))
+        elif change == "tie":
+            result.kettlebell_weight, result.repetitions = other.kettlebell_weight, other.repetitions
+        else:
+            result.repetitions = None
+
+    @staticmethod
+    def _change_tgu(rng, result, change):
+        best = max(result.result_1 or 0.0, result.result_2 or 0.0, result.result_3 or 0.0)
+        if change == "raise":
+            result.result_3 = best + rng.choice([4.0, 8.0, 16.0])
+        elif change == "lower":
+            result.result_1, result.result_2, result.result_3 = rng.choice([8.0, 12.0]), None, None
+        else:
+            result.result_1 = result.result_2 = result.result_3 = None
+
+    def test_random_changes_match_full_recalculation(self):
+        rng = random.Random(5)
+        changes = [(SNATCH, change) for change in ("raise", "lower", "tie", "clear") for _ in range(4)]
+        changes += [(TGU, change) for change in ("raise", "lower", "clear") for _ in range(3)]
+        rng.shuffle(changes)
+
+        with (
+            self.settings(INCREMENTAL_RANKING=True, RECALC_MODE="immediate"),
+            mock.patch("live_results.services.recalculate_category", wraps=recalculate_category) as full_recalc,
+            mock.patch(
+                "live_results.services.update_overall_results_for_player",
+                wraps=update_overall_results_for_player,
+            ) as player_recalc,
+        ):
+            for step, (discipline, change) in enumerate(changes):
+                player, other = rng.sample(self.players, 2)
+                model = DISCIPLINE_MODELS_MAP[discipline]
+                result = model.objects.get(player=player)
+                if discipline == SNATCH:
+                    self._change_snatch(rng, result, model.objects.get(player=other), change)
+                else:
+                    self._change_tgu(rng, result, change)
+                self._save(result)
+                message = f"step {step}: {discipline} {change}"
+                self.assertEqual(self._standings(), self._recalculated_standings(), message)
+
+            # Every change went through the incremental path, never through a full recalculation
+            self.assertEqual(full_recalc.call_count, 0)
+            self.assertEqual(player_recalc.call_count, 0)
+
+    def test_missing_stored_state_falls_back_to_full_recalculation(self):
+        player = self.players[0]
+        CategoryDisciplineResult.objects.filter(category=self.category, player=player, discipline=SNATCH).delete()
+        result = SnatchResult.objects.get(player=player)
+        result.repetitions = (result.repetitions or 0) + 50
+
+        with (
+            self.settings(INCREMENTAL_RANKING=True, RECALC_MODE="immediate"),
+            mock.patch("live_results.services.recalculate_category", wraps=recalculate_category) as full_recalc,
+        ):
+            self._save(result)
+
+        self.assertEqual(full_recalc.call_count, 1)
+        self.assertEqual(self._standings(), self._recalculated_standings())
+
+    def test_previous_score_is_not_read_without_incremental_ranking(self):
+        result = SnatchResult.objects.get(player=self.players[0])
+        result.repetitions = (result.repetitions or 0) + 1
+        table = SnatchResult._meta.db_table
+        for overrides in ({"RECALC_MODE": "queue"}, {"INCREMENTAL_RANKING": False, "RECALC_MODE": "immediate"}):
+            with self.subTest(**overrides), self.settings(**overrides):
+                with CaptureQueriesContext(connection) as context, contextlib.redirect_stdout(io.StringIO()):
+                    result.save()
+                self.assertIsNone(result._previous_score)
+                selects = [
+                    query["sql"]
+                    for query in context.captured_queries
+                    if query["sql"].startswith("SELECT") and table in query["sql"]
+                ]
+                self.assertEqual(selects, [])
+
+
+class RecalculationQueueTests(RankedEventMixin, TestCase):
+    """RECALC_MODE = "queue": saves only mark categories dirty, the worker recalculates each of them once."""
+
+    event_seed = 29
+    event_category_names = ("Open", "Masters")
+
+    def _save_results(self, count):
+        """Raises the snatch result of `count` athletes; returns the ids of their categories."""
+        results = SnatchResult.objects.select_related("player").order_by("id")[:count]
+        category_ids = set()
+        with self.settings(RECALC_MODE="queue"), contextlib.redirect_stdout(io.StringIO()):
+            for result in results:
+                result.repetitions = (result.repetitions or 0) + 10
+                result.save()
+                category_ids.update(result.player.categories.values_list("id", flat=True))
+        return category_ids
+
+    @staticmethod
+    def _standings():
+        return set(CategoryOverallResult.objects.values_list("category_id", "player_id", *OVERALL_RESULT_FIELDS))
+
+    def test_repeated_saves_coalesce_into_one_request_per_category(self):
+        category_ids = self._save_results(5)
+        first_requests = dict(RecalculationRequest.objects.values_list("category_id", "requested_at"))
+        self.assertEqual(set(first_requests), category_ids)
+
+        self._save_results(BUDGET_EVENT_SIZE)
+        requests = {request.category_id: request for request in RecalculationRequest.objects.all()}
+        self.assertEqual(set(requests), {category.id for category in self.categories})
+        for category_id, requested_at in first_requests.items():
+            # Waiting since the first save; later saves only move last_requested_at
+            self.assertEqual(requests[category_id].requested_at, requested_at)
+            self.assertGreaterEqual(requests[category_id].last_requested_at, requested_at)
+
+        with mock.patch("live_results.services.recalculate_category", wraps=recalculate_category) as recalc:
+            processed = _silently(process_recalculation_queue)
+        self.assertEqual(sorted(call.args[0].id for call in recalc.call_args_list), sorted(requests))
+        self.assertEqual(sorted(item["category_id"] for item in processed), sorted(requests))
+        self.assertFalse(RecalculationRequest.objects.exists())
+
+        # The queued recalculation picked up every saved result: recalculating again changes nothing
+        standings = self._standings()
+        for category in self.categories:
+            _silently(recalculate_category, category)
+        self.assertEqual(self._standings(), standings)
+
+    def test_claimed_request_is_deleted_before_recalculation(self):
+        first, second = self.categories
+        with self.settings(RECALC_MODE="queue"), contextlib.redirect_stdout(io.StringIO()):
+            services.mark_categories_dirty([first.id])
+            services.mark_categories_dirty([second.id])
+        seen = []
+
+        def recalculate(category):
+            # Claimed and deleted in the same transaction as the recalculation
+            self.assertTrue(connection.in_atomic_block)
+            self.assertFalse(RecalculationRequest.objects.filter(category=category).exists())
+            seen.append(category.id)
+            # Another worker claims the second request in the meantime
+            RecalculationRequest.objects.filter(category=second).delete()
+            return recalculate_category(category)
+
+        with mock.patch("live_results.services.recalculate_category", side_effect=recalculate):
+            processed = _silently(process_recalculation_queue)
+
+        self.assertEqual(seen, [first.id])
+        self.assertEqual([item["category_id"] for item in processed], [first.id])
+        self.assertFalse(RecalculationRequest.objects.exists())
+
+    def test_worker_drains_the_queue_once(self):
+        category_ids = self._save_results(BUDGET_EVENT_SIZE)
+        stdout = io.StringIO()
+        with (
+            mock.patch("live_results.services.recalculate_category", wraps=recalculate_category) as recalc,
+            # Would close the test transaction's connection
+            mock.patch("live_results.management.commands.run_recalc_worker.close_old_connections"),
+            contextlib.redirect_stdout(io.StringIO()),
+        ):
+            call_command("run_recalc_worker", "--once", stdout=stdout)
+
+        self.assertEqual(recalc.call_count, len(category_ids))
+        self.assertFalse(RecalculationRequest.objects.exists())
+        self.assertIn("Recalculation queue drained.", stdout.getvalue())
+
+    def test_failing_category_stays_queued_and_the_rest_drains(self):
+        first, second = self.categories
+        with self.settings(RECALC_MODE="queue"), contextlib.redirect_stdout(io.StringIO()):
+            services.mark_categories_dirty([first.id])
+            services.mark_categories_dirty([second.id])
+
+        def recalculate(category):
+            if category == first:
+                raise RuntimeError("broken category")
+            return recalculate_category(category)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with (
+            mock.patch("live_results.services.recalculate_category", side_effect=recalculate),
+            mock.patch("live_results.management.commands.run_recalc_worker.close_old_connections"),
+            self.assertLogs("live_results.services", "ERROR"),
+            contextlib.redirect_stdout(io.StringIO()),
+        ):
+            call_command("run_recalc_worker", "--once", stdout=stdout, stderr=stderr)
+
+        self.assertIn(f"(id={second.id})", stdout.getvalue())
+        self.assertEqual(list(RecalculationRequest.objects.values_list("category_id", flat=True)), [first.id])
+        self.assertIn("1 categories left in the queue.", stderr.getvalue())
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "advisory locks are PostgreSQL-only")
+class AdvisoryLockTests(TransactionTestCase):
+    """recalculate_category on PostgreSQL: the RUNNING/PENDING advisory lock handoff between connections."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Advisory", disciplines=[SNATCH])
+        # A second connection standing in for another worker process
+        self.other = connections.create_connection("default")
+        self.addCleanup(self.other.close)
+        patcher = mock.patch("live_results.services._recalculate_category")
+        self.recalculate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _other_lock(self, key, acquire=True):
+        function = "pg_advisory_lock" if acquire else "pg_advisory_unlock"
+        with self.other.cursor() as cursor:
+            cursor.execute(f"SELECT {function}(%s, %s)", [key, self.category.id])
+
+    def _lock_held(self, key):
+        with self.other.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND classid = %s AND objid = %s "
+                "AND objsubid = 2 AND granted",
+                [key, self.category.id],
+            )
+            return cursor.fetchone()[0] > 0
+
+    def _wait_until(self, condition, message):
+        deadline = time.monotonic() + 5
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail(message)
+            time.sleep(0.01)
+
+    def test_call_outside_atomic_block_is_skipped_while_another_waits(self):
+        self._other_lock(services.ADVISORY_LOCK_PENDING)
+        self.assertFalse(_silently(recalculate_category, self.category))
+        self.recalculate.assert_not_called()
+
+        self._other_lock(services.ADVISORY_LOCK_PENDING, acquire=False)
+        self.assertTrue(_silently(recalculate_category, self.category))
+        self.recalculate.assert_called_once()
+
+    def test_call_inside_atomic_block_waits_instead_of_skipping(self):
+        self._other_lock(services.ADVISORY_LOCK_PENDING)
+        with transaction.atomic():
+            self.assertTrue(_silently(recalculate_category, self.category))
+        self.recalculate.assert_called_once()
+
+    def test_pending_waiter_takes_over_running_lock(self):
+        self._other_lock(services.ADVISORY_LOCK_RUNNING)
+        results = []
+
+        def waiting_recalculation():
+            try:
+                results.append(_silently(recalculate_category, Category.objects.get(pk=self.category.pk)))
+            finally:
+                connection.close()
+
+        waiter = threading.Thread(target=waiting_recalculation)
+        waiter.start()
+        self.addCleanup(waiter.join, 5)
+        self._wait_until(lambda: self._lock_held(services.ADVISORY_LOCK_PENDING), "the waiter never took PENDING")
+
+        # The waiter will see this call's committed data, so this call is redundant
+        self.assertFalse(_silently(recalculate_category, self.category))
+        self.recalculate.assert_not_called()
+
+        self._other_lock(services.ADVISORY_LOCK_RUNNING, acquire=False)
+        waiter.join(5)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(results, [True])
+        self.recalculate.assert_called_once()
+        # PENDING is released once the waiter holds RUNNING, RUNNING with the end of its transaction
+        self.assertFalse(self._lock_held(services.ADVISORY_LOCK_PENDING))
+        self.assertFalse(self._lock_held(services.ADVISORY_LOCK_RUNNING))
+
+
+class ParallelRecalculationTests(TransactionTestCase):
+    """recalculate_all_categories: worker processes must leave the same standings as a sequential run."""
+
+    def setUp(self):
+        self.categories = generate_event(BUDGET_EVENT_SIZE, seed=31, category_names=["Open", "Masters", "Juniors"])
+
+    @staticmethod
+    def _standings():
+        positions = set(
+            CategoryDisciplineResult.objects.values_list("category_id", "player_id", "discipline", "position", "score")
+        )
+        overall = set(
+            CategoryOverallResult.objects.values_list("category_id", "player_id", *services.OVERALL_RESULT_FIELDS)
+        )
+        return positions, overall
+
+    def _recalculate_all(self, workers):
+        stdout = io.StringIO()
+        _silently(call_command, "recalculate_all_categories", "--workers", str(workers), stdout=stdout)
+        self.assertIn("All categories recalculated.", stdout.getvalue())
+
+    def test_parallel_run_matches_sequential_run(self):
+        if connection.vendor == "sqlite":
+            self.skipTest("SQLite takes one writer at a time, parallel workers need PostgreSQL")
+        self._recalculate_all(workers=1)
+        sequential = self._standings()
+        self.assertEqual({row[0] for row in sequential[1]}, {category.id for category in self.categories})
+
+        CategoryDisciplineResult.objects.all().delete()
+        CategoryOverallResult.objects.all().delete()
+        self._recalculate_all(workers=len(self.categories))
+        self.assertEqual(self._standings(), sequential)
+
+
+class HotPathQueryBudgetTests(RankedEventMixin, QueryBudgetMixin, TestCase):
+    """
+    Query budgets for the hot paths of the competition day. A budget must not depend on the number of
+    athletes - raising one needs a reason (a new feature), never an N+1.
+    """
+
+    event_seed = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.player = cls.category.players.order_by("id").first()
+        cls.superuser = get_user_model().objects.create_superuser("judge", "judge@example.com", "judge")
+
+    def setUp(self):
+        self.client.force_login(self.superuser)
+
+    def _post_result_change(self, model, data: dict):
+        result = model.objects.get(player=self.player)
+        url = reverse(f"admin:live_results_{model._meta.model_name}_change", args=[result.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = _silently(self.client.post, url, {"player": self.player.pk, "_save": "Save", **data})
+        self.assertEqual(response.status_code, 302, response.content[:2000])
+
+    def test_admin_result_save_budget(self):
+        # Save + signal (incremental update or full recalculation of the player's category, leaderboard
+        # snapshot refresh with its delta row, category revision bump) + attempt versions + admin log
+        for discipline, model in DISCIPLINE_MODELS_MAP.items():
+            with self.subTest(discipline=discipline):
+                if discipline == SNATCH:
+                    data = {"kettlebell_weight": 32.0, "repetitions": 200}
+                else:
+                    data = {"result_1": 60.0, "result_2": 0.0, "result_3": 0.0}
+                with self.assertMaxQueries(41, f"admin save {model.__name__}"):
+                    self._post_result_change(model, data)
+
+    def test_category_results_endpoint_budget(self):
+        # Spectators are anonymous - one primary key read of the leaderboard snapshot
+        url = reverse("category-results", args=[self.category.pk])
+        with self.assertMaxQueries(1, "GET category results"):
+            response = self.client_class().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), BUDGET_EVENT_SIZE)
+
+    def test_category_results_not_modified_budget(self):
+        # Polling with If-None-Match: revision read only, no leaderboard payload, no result tables
+        url = reverse("category-results", args=[self.category.pk])
+        client = self.client_class()
+        etag = client.get(url)["ETag"]
+        with self.assertMaxQueries(1, "conditional GET category results"):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("stale-while-revalidate", response["Cache-Control"])
+
+    def test_category_results_precompressed_budget(self):
+        # gzip form stored with the snapshot - still one primary key read, nothing compressed per request
+        url = reverse("category-results", args=[self.category.pk])
+        client = self.client_class()
+        plain = client.get(url)
+        with self.assertMaxQueries(1, "GET category results (gzip)"):
+            response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate, br;q=0")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertNotEqual(response["ETag"], plain["ETag"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        not_modified = client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_category_results_not_modified_without_compressed_form(self):
+        # A snapshot without the gzip form is sent uncompressed - the 304 check must use that ETag too
+        CategoryLeaderboardSnapshot.objects.filter(category=self.category).update(payload_gzip=None, payload_brotli=None)
+        url = reverse("category-results", args=[self.category.pk])
+        client = self.client_class()
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        with self.assertMaxQueries(1, "conditional GET category results (no gzip form)"):
+            not_modified = client.get(url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], response["ETag"])
+
+    def test_scoreboard_budget(self):
+        # Whole event in one query (snapshot payloads joined to the categories); 304 from the revision aggregate
+        url = reverse("scoreboard")
+        client = self.client_class()
+        with self.assertMaxQueries(1, "GET scoreboard"):
+            response = client.get(url)
+        results = client.get(reverse("category-results", args=[self.category.pk])).json()
+        self.assertEqual(response.json()["categories"][0]["results"], results)
+        top = client.get(url, {"top": 3, "category": self.category.pk}).json()["categories"]
+        self.assertEqual([entry["results"] for entry in top], [results[:3]])
+        with self.assertMaxQueries(1, "conditional GET scoreboard"):
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_scoreboard_budget_with_unranked_categories(self):
+        # Categories without a snapshot share one query for their tables, however many there are
+        CategoryLeaderboardSnapshot.objects.filter(category=self.category).delete()
+        Category.objects.bulk_create([Category(name=f"Unranked {index}", disciplines=[SNATCH]) for index in range(5)])
+        client = self.client_class()
+        with self.assertMaxQueries(2, "GET scoreboard with unranked categories"):
+            response = client.get(reverse("scoreboard"))
+        tables = {entry["id"]: entry["results"] for entry in response.json()["categories"]}
+        self.assertEqual(len(tables), 6)
+        results = client.get(reverse("category-results", args=[self.category.pk])).json()
+        self.assertEqual(tables.pop(self.category.pk), results)
+        self.assertEqual(list(tables.values()), [[]] * 5)
+
+    def test_player_changelist_budget(self):
+        with self.assertMaxQueries(10, "Player changelist"):
+            response = self.client.get(reverse("admin:live_results_player_changelist"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_result_changelists_budget(self):
+        for model in DISCIPLINE_MODELS_MAP.values():
+            with self.subTest(model=model.__name__):
+                with self.assertMaxQueries(10, f"{model.__name__} changelist"):
+                    response = self.client.get(reverse(f"admin:live_results_{model._meta.model_name}_changelist"))
+                self.assertEqual(response.status_code, 200)
+
+    def test_overall_results_export_budget(self):
+        selected = list(CategoryOverallResult.objects.filter(category=self.category).values_list("pk", flat=True))
+        with self.assertMaxQueries(9, "overall results HTML export"):
+            response = self.client.post(
+                reverse("admin:live_results_categoryoverallresult_changelist"),
+                {"action": "export_overall_results_as_html", "_selected_action": selected},
+            )
+            # The rows are read while the streamed body is consumed
+            body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body.count(b"<tr"), len(selected) + 1)
+        self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+
+    def test_start_list_budget(self):
+        with self.assertMaxQueries(2, "start list generation"):
+            response = self.client.post(
+                reverse("generate_start_list"),
+                {"categories": [self.category.name], "stations": 4, "distribute_evenly": "on"},
+            )
+        self.assertEqual(response.status_code, 200)
+
+
+class AttemptBatchTests(RankedEventMixin, QueryBudgetMixin, TestCase):
+    """Judges' batch entry: one transaction, one recalculation per affected category, whatever the batch size."""
+
+    event_seed = 9
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.players = list(cls.category.players.order_by("id")[:5])
+        cls.judge = get_user_model().objects.create_superuser("judge", "judge@example.com", "judge")
+
+    def setUp(self):
+        self.client.force_login(self.judge)
+
+    def _post(self, attempts, **extra):
+        body = attempts if isinstance(attempts, dict) else {"attempts": attempts}
+        with self.captureOnCommitCallbacks(execute=True):
+            return _silently(
+                self.client.post, reverse("attempt-batch"), body, content_type="application/json", **extra
+            )
+
+    def test_batch_recalculates_each_category_once(self):
+        attempts = [
+            {"player": player.pk, "discipline": discipline, "attempt": attempt, "value": 40.0 + index}
+            for index, player in enumerate(self.players)
+            for discipline in (TGU, KB_SQUAT)
+            for attempt in (1, 2)
+        ] + [{"player": player.pk, "discipline": SNATCH, "repetitions": 180} for player in self.players]
+        self.category.refresh_from_db()
+        revision = self.category.revision
+        # Session + batch validation, attempt versions, a locked read and a bulk UPDATE per discipline,
+        # affected categories, then one full recalculation with the snapshot refresh - not one per attempt
+        with mock.patch("live_results.services.recalculate_category", wraps=recalculate_category) as recalculate:
+            with self.assertMaxQueries(36, f"batch of {len(attempts)} attempts"):
+                response = self._post(attempts)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        self.assertEqual(
+            (data["created"], data["updated"], data["categories"]), (0, 15, [self.category.pk])
+        )
+        self.assertEqual(recalculate.call_count, 1)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.revision, revision + 1)
+        self.assertEqual(TGUResult.objects.get(player=self.players[4]).best_result, 44.0)
+        self.assertEqual(SnatchResult.objects.get(player=self.players[0]).repetitions, 180)
+
+    def test_invalid_batch_writes_nothing(self):
+        attempts = [
+            {"player": self.players[0].pk, "discipline": TGU, "attempt": 1, "value": 99.0},
+            {"player": 0, "discipline": TGU, "attempt": 4, "value": 10.0},
+        ]
+        response = self._post(attempts)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["attempts"][0], {})
+        self.assertNotEqual(TGUResult.objects.get(player=self.players[0]).result_1, 99.0)
+
+    def test_retried_submission_is_applied_once(self):
+        attempts = [{"player": self.players[0].pk, "discipline": TGU, "attempt": 1, "value": 77.0}]
+        first = self._post(attempts, HTTP_IDEMPOTENCY_KEY="device-1:0001")
+        self.assertEqual(first.json()["submissions"][0], {"key": "device-1:0001", "status": "applied", "applied": 1, "stale": 0})
+        TGUResult.objects.filter(player=self.players[0]).update(result_1=50.0)  # later correction by another judge
+        with mock.patch("live_results.services.recalculate_category") as recalculate:
+            retry = self._post(attempts, HTTP_IDEMPOTENCY_KEY="device-1:0001")
+        self.assertEqual(retry.status_code, 200, retry.content)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["submissions"][0], {"key": "device-1:0001", "status": "duplicate", "applied": 1, "stale": 0})
+        recalculate.assert_not_called()
+        self.assertEqual(TGUResult.objects.get(player=self.players[0]).result_1, 50.0)
+
+    def test_older_attempt_is_stale(self):
+        player = self.players[1].pk
+        newer = {"player": player, "discipline": TGU, "attempt": 2, "value": 60.0, "recorded_at": "2025-05-01T10:05:00Z"}
+        older = {"player": player, "discipline": TGU, "attempt": 2, "value": 20.0, "recorded_at": "2025-05-01T10:00:00Z"}
+        self._post({"submissions": [{"key": "device-2:0002", "attempts": [newer]}]})
+        response = self._post({"submissions": [{"key": "device-3:0001", "attempts": [older]}]})
+        self.assertEqual(response.json()["submissions"][0]["stale"], 1)
+        self.assertEqual(TGUResult.objects.get(player=player).result_2, 60.0)
+
+    def test_offline_backlog_recalculates_once(self):
+        submissions = [
+            {
+                "key": f"device-4:{index:04d}",
+                "attempts": [
+                    {"player": player.pk, "discipline": KB_SQUAT, "attempt": 3, "value": 90.0 + index,
+                     "recorded_at": f"2025-05-01T11:{index:02d}:00Z"}
+                ],
+            }
+            for index, player in enumerate(self.players)
+        ]
+        submissions.append(dict(submissions[0]))  # the same queued entry flushed twice
+        with mock.patch("live_results.services.recalculate_category", wraps=recalculate_category) as recalculate:
+            response = self._post({"submissions": submissions})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(recalculate.call_count, 1)
+        self.assertEqual(
+            [submission["status"] for submission in response.json()["submissions"]], ["applied"] * 5 + ["duplicate"]
+        )
+        self.assertEqual(KBSquatResult.objects.get(player=self.players[4]).result_3, 94.0)
+
+    def test_admin_correction_wins_over_older_submission(self):
+        player = self.players[2]
+        result = TGUResult.objects.get(player=player)
+        form = {"player": player.pk, "result_1": result.result_1 or "", "result_2": 55.0, "result_3": ""}
+        with contextlib.redirect_stdout(io.StringIO()), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("admin:live_results_tguresult_change", args=[result.pk]), form)
+        self.assertEqual(response.status_code, 302)
+        # Recorded on a judge's device before the correction, sent after it
+        older = {
+            "player": player.pk, "discipline": TGU, "attempt": 2, "value": 20.0, "recorded_at": "2025-05-01T10:00:00Z"
+        }
+        response = self._post({"submissions": [{"key": "device-5:0001", "attempts": [older]}]})
+        self.assertEqual(
+            response.json()["submissions"][0], {"key": "device-5:0001", "status": "applied", "applied": 0, "stale": 1}
+        )
+        self.assertEqual(TGUResult.objects.get(player=player).result_2, 55.0)
+
+    def test_key_saved_by_concurrent_request_is_duplicate(self):
+        attempts = [{"player": self.players[3].pk, "discipline": TGU, "attempt": 3, "value": 66.0}]
+        AttemptSubmission.objects.create(key="device-6:0001", summary={"applied": 1, "stale": 0})
+        real_filter = AttemptSubmission.objects.filter
+        missed = []
+
+        def filter_submissions(*args, **kwargs):
+            # The first read misses the key: the other request commits it just after
+            if not missed:
+                missed.append(True)
+                return AttemptSubmission.objects.none()
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(AttemptSubmission.objects, "filter", side_effect=filter_submissions):
+            response = self._post(attempts, HTTP_IDEMPOTENCY_KEY="device-6:0001")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            response.json()["submissions"][0], {"key": "device-6:0001", "status": "duplicate", "applied": 1, "stale": 0}
+        )
+        self.assertNotEqual(TGUResult.objects.get(player=self.players[3]).result_3, 66.0)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "SELECT ... FOR UPDATE is a no-op on SQLite")
+    def test_snatch_batch_locks_only_result_rows(self):
+        # SnatchResult.Meta.ordering joins the player's categories: FOR UPDATE on the nullable side of that
+        # outer join is rejected by PostgreSQL, and a player in two categories would be read twice
+        player = self.players[0]
+        _silently(Category.objects.create(name="Second", disciplines=[SNATCH]).players.add, player)
+        attempts = [{"player_id": player.pk, "discipline": SNATCH, "fields": {"repetitions": 200}}]
+        with CaptureQueriesContext(connection) as context:
+            result = _silently(services.apply_attempt_batch, attempts)
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+        locked = [query["sql"] for query in context.captured_queries if "FOR UPDATE" in query["sql"]]
+        self.assertEqual(len(locked), 1)
+        self.assertIn("FOR UPDATE OF", locked[0])
+        self.assertNotIn("JOIN", locked[0])
+        self.assertEqual(SnatchResult.objects.get(player=player).repetitions, 200)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self._post([{"player": self.players[0].pk, "discipline": TGU, "attempt": 1, "value": 99.0}])
+        self.assertIn(response.status_code, (401, 403))
+
+
+class ResultsCacheTests(RankedEventMixin, QueryBudgetMixin, TestCase):
+    """Versioned results cache: one build per category revision, the previous version while another request builds."""
+
+    event_seed = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Live path: the category has no leaderboard snapshot yet
+        CategoryLeaderboardSnapshot.objects.filter(category=cls.category).delete()
+        cls.category.refresh_from_db()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_one_build_per_revision(self):
+        revision, payload = get_cached_category_results(self.category.pk, self.category.revision)
+        self.assertEqual(revision, self.category.revision)
+        with self.assertMaxQueries(0, "cached category results"):
+            self.assertEqual(get_cached_category_results(self.category.pk, revision), (revision, payload))
+
+    def test_previous_version_while_another_request_builds(self):
+        previous = get_cached_category_results(self.category.pk, self.category.revision)
+        next_revision = self.category.revision + 1
+        cache.add(_lock_key(self.category.pk, next_revision), True)
+        with self.assertMaxQueries(0, "category results during a rebuild"):
+            self.assertEqual(get_cached_category_results(self.category.pk, next_revision), previous)
+
+    def test_results_endpoint_without_snapshot(self):
+        url = reverse("category-results", args=[self.category.pk])
+        client = self.client_class()
+        self.assertEqual(len(client.get(url).json()), BUDGET_EVENT_SIZE)
+        # Snapshot miss + revision read - the table comes from the cache
+        with self.assertMaxQueries(2, "GET category results from the cache"):
+            response = client.get(url)
+        self.assertEqual(response["X-Leaderboard-Revision"], str(self.category.revision))
+        self.assertEqual(len(response.json()), BUDGET_EVENT_SIZE)
+
+
+class ResultsSerializationParityTests(RankedEventMixin, QueryBudgetMixin, TestCase):
+    """The values() fast path must produce byte-identical JSON to CategoryResultsSerializer."""
+
+    event_seed = 3
+
+    @classmethod
+    def prepare_event(cls):
+        players = list(cls.category.players.order_by("id"))
+        # Edge cases of the serializers: no club, no or zero body weight, missing result rows, empty attempts
+        Player.objects.filter(pk=players[0].pk).update(club=None)
+        Player.objects.filter(pk=players[1].pk).update(weight=None)
+        Player.objects.filter(pk=players[2].pk).update(weight=0.0)
+        TGUResult.objects.filter(player=players[3]).delete()
+        SnatchResult.objects.filter(player=players[4]).update(repetitions=0)
+        TGUResult.objects.filter(player=players[5]).update(result_1=None, result_2=0.0, result_3=None)
+
+    def test_fast_path_matches_serializer(self):
+        expected = build_leaderboard_payload(self.category.pk, fast=False)
+        with self.assertMaxQueries(1, "values() results rows"):
+            payload = build_leaderboard_payload(self.category.pk, fast=True)
+        self.assertEqual(payload, expected)
+
+    @unittest.skipIf(orjson is None, "orjson is not installed")
+    def test_orjson_renderer_matches_json_renderer(self):
+        rows = json.loads(build_leaderboard_payload(self.category.pk))
+        extras = {"at": datetime.datetime(2025, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.UTC), "kg": decimal.Decimal("32.5")}
+        for data in (rows, extras):
+            self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    @unittest.skipIf(msgpack is None, "msgpack is not installed")
+    def test_results_as_messagepack(self):
+        url = reverse("category-results", args=[self.category.pk])
+        response = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
+
+
+class KeysetPaginationTests(RankedEventMixin, QueryBudgetMixin, TestCase):
+    """Cursor pages of the results and clubs endpoints: every row exactly once, constant queries per page."""
+
+    event_seed = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        SportClub.objects.bulk_create([SportClub(name=f"Club {letter}") for letter in "EDCBA"])
+
+    def _walk(self, url: str, budget: int) -> list:
+        rows = []
+        while url:
+            with self.assertMaxQueries(budget, f"GET {url}"):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            rows += response.json()["results"]
+            url = response.json()["next"]
+        return rows
+
+    def test_results_pages_match_full_table(self):
+        url = reverse("category-results", args=[self.category.pk])
+        full = self.client.get(url).json()
+        # Category existence + one keyset query per page
+        rows = self._walk(f"{url}?page_size=7", 2)
+        self.assertEqual(rows, full)
+
+    def test_unranked_results_come_last(self):
+        unranked = CategoryOverallResult.objects.filter(category=self.category).order_by("id").first()
+        CategoryOverallResult.objects.filter(pk=unranked.pk).update(final_position=None)
+        rows = self._walk(reverse("category-results", args=[self.category.pk]) + "?page_size=4", 2)
+        self.assertEqual(len({row["player"]["id"] for row in rows}), BUDGET_EVENT_SIZE)
+        self.assertEqual(rows[-1]["player"]["id"], unranked.player_id)
+
+    def test_club_pages(self):
+        names = [club["name"] for club in self._walk(reverse("sportclub-list") + "?page_size=2", 1)]
+        self.assertEqual(names, list(SportClub.objects.order_by("name").values_list("name", flat=True)))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("category-results", args=[self.category.pk]) + "?cursor=bm90LWpzb24")
+        self.assertEqual(response.status_code, 404)
+
+
+def _parse_sse(chunk: bytes) -> tuple[str, dict]:
+    """(event, data) of the last event in a chunk of a text/event-stream response."""
+    block = chunk.decode("utf-8").strip().split("\n\n")[-1]
+    fields = dict(line.split(": ", 1) for line in block.split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+class StandingsStreamTests(RankedEventMixin, TestCase):
+    """SSE stream of leaderboard changes: ready event, changes after it, slow clients and WSGI."""
+
+    event_seed = 37
+
+    def setUp(self):
+        for patcher in (
+            mock.patch("live_results.streams.broadcaster", LeaderboardBroadcaster()),
+            # Would close the test transaction's connection
+            mock.patch("live_results.streams.close_old_connections"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _raise_last_athlete(self):
+        last = CategoryOverallResult.objects.filter(category=self.category).order_by("-final_position").first()
+        SnatchResult.objects.filter(player=last.player_id).update(kettlebell_weight=48.0, repetitions=300)
+        _silently(recalculate_category, Category.objects.get(pk=self.category.pk))
+        return last.player_id
+
+    async def test_change_before_first_poll_is_streamed(self):
+        recalculated = []
+        poll = streams.broadcaster._poll
+
+        def poll_after_recalculation(*args):
+            # A recalculation landing after the client got "ready", before the broadcaster's first poll
+            if not recalculated:
+                recalculated.append(self._raise_last_athlete())
+            return poll(*args)
+
+        url = reverse("category-standings-stream", args=[self.category.id])
+        with (
+            self.settings(LIVE_STREAM_POLL_INTERVAL=0.01, LIVE_STREAM_HEARTBEAT=5),
+            mock.patch.object(streams.broadcaster, "_poll", side_effect=poll_after_recalculation),
+        ):
+            response = await self.async_client.get(url)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            stream = aiter(response.streaming_content)
+            try:
+                event, ready = _parse_sse(await asyncio.wait_for(anext(stream), timeout=5))
+                event_after_ready, changes = _parse_sse(await asyncio.wait_for(anext(stream), timeout=5))
+            finally:
+                await stream.aclose()
+
+        self.assertEqual(event, "ready")
+        self.assertEqual(event_after_ready, "standings")
+        self.assertEqual(changes["category_id"], self.category.id)
+        self.assertGreater(changes["revision"], ready["revisions"][str(self.category.id)])
+        self.assertIn(recalculated[0], [row["player"]["id"] for row in changes["rows"]])
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get(reverse("standings-stream"))
+        self.assertEqual(response.status_code, 501)
+
+    def test_slow_client_resyncs_the_dropped_categories(self):
+        subscriber = Subscriber(category_id=None, queue_size=2)
+        for category_id in (3, 1, 2):
+            subscriber.push(category_id, format_sse({"category_id": category_id}, "standings"))
+
+        self.assertEqual(subscriber.queue.qsize(), 1)
+        message = asyncio.run(subscriber.next_message(timeout=1))
+        self.assertEqual(_parse_sse(message), ("resync", {"category_ids": [1, 2, 3]}))
+
+
+class LeaderboardDeltaTests(RankedEventMixin, TestCase):
+    """?since=<revision>: merged chains of stored changes, the current revision and full-table fallbacks."""
+
+    event_seed = 41
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.players = list(cls.category.players.order_by("id"))
+
+    def setUp(self):
+        self.url = reverse("category-results", args=[self.category.pk])
+
+    def _revision(self):
+        return CategoryLeaderboardSnapshot.objects.get(category=self.category).revision
+
+    def _change(self, players, repetitions=None):
+        """Changes the snatch result of `players` and recalculates; returns the new snapshot revision."""
+        results = SnatchResult.objects.filter(player__in=players)
+        results.update(repetitions=repetitions if repetitions is not None else F("repetitions") + 7)
+        _silently(recalculate_category, Category.objects.get(pk=self.category.pk))
+        return self._revision()
+
+    def _full_table(self):
+        return {row["player"]["id"]: row for row in self.client.get(self.url).json()}
+
+    def _since(self, revision):
+        response = self.client.get(self.url, {"since": revision})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_client_applying_changes_stays_equal_to_full_table(self):
+        rng = random.Random(11)
+        client_rows, revision = self._full_table(), self._revision()
+        for round_number in range(12):
+            self._change(rng.sample(self.players, rng.randint(1, 3)))
+            if round_number % 3 == 1:
+                continue  # A missed poll: the next response merges two stored changes
+            changes = self._since(revision)
+            self.assertFalse(changes["full"])
+            for player_id in changes["removed"]:
+                client_rows.pop(player_id, None)
+            client_rows.update({row["player"]["id"]: row for row in changes["rows"]})
+            revision = changes["revision"]
+            self.assertEqual(client_rows, self._full_table(), f"round {round_number}")
+        self.assertEqual(revision, self._revision())
+
+    def test_chained_changes_keep_the_latest_row(self):
+        player = self.players[0]
+        base = self._revision()
+        self._change([player], repetitions=10)
+        latest = self._change([player], repetitions=250)
+
+        changes = get_leaderboard_changes(self.category.pk, base)
+        self.assertEqual(changes["revision"], latest)
+        player_ids = [row["player"]["id"] for row in changes["rows"]]
+        self.assertEqual(len(player_ids), len(set(player_ids)))
+        player_row = next(row for row in changes["rows"] if row["player"]["id"] == player.pk)
+        self.assertEqual(player_row, self._full_table()[player.pk])
+
+        # Removed and added back, or added and then removed
+        merged = merge_leaderboard_deltas([
+            {"rows": [{"player": {"id": 1}, "total_points": 1.0}], "removed": [2]},
+            {
+                "rows": [{"player": {"id": 2}, "total_points": 2.0}, {"player": {"id": 1}, "total_points": 3.0}],
+                "removed": [],
+            },
+            {"rows": [], "removed": [1]},
+        ])
+        self.assertEqual(merged, {"rows": [{"player": {"id": 2}, "total_points": 2.0}], "removed": [1]})
+
+    def test_since_current_revision_is_empty(self):
+        revision = self._revision()
+        self.assertEqual(self._since(revision), {"revision": revision, "full": False, "rows": [], "removed": []})
+
+    def test_unknown_or_pruned_revision_gets_full_table(self):
+        with self.settings(LEADERBOARD_DELTA_HISTORY=2):
+            base = self._revision()
+            first = self._change(self.players[:1])
+            self._change(self.players[1:2])
+            latest = self._change(self.players[2:3])
+
+            full_table = list(self._full_table().values())
+            for since in (base, latest + 1):
+                with self.subTest(since=since):
+                    changes = self._since(since)
+                    self.assertEqual(changes, {"revision": latest, "full": True, "rows": full_table, "removed": []})
+            # The two stored changes reach back to `first`
+            self.assertFalse(self._since(first)["full"])
+
+    def test_history_keeps_newest_rows_whatever_the_revision_gaps(self):
+        with self.settings(LEADERBOARD_DELTA_HISTORY=3):
+            revisions = []
+            for index in range(5):
+                # Saving the category bumps its revision without storing a change
+                category = Category.objects.get(pk=self.category.pk)
+                _silently(category.save)
+                _silently(category.save)
+                revisions.append(self._change(self.players[index : index + 1]))
+
+        stored = CategoryLeaderboardDelta.objects.filter(category=self.category).order_by("revision")
+        self.assertEqual(list(stored.values_list("revision", flat=True)), revisions[-3:])
+
+
+class StaticExportTests(RankedEventMixin, TestCase):
+    """Static results copy: every category on the first run, afterwards only categories whose revision changed."""
+
+    event_seed = 11
+    event_category_names = ("Open", "Masters")
+
+    def setUp(self):
+        self.output_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def test_incremental_export(self):
+        first = _silently(export_static_site, self.output_dir)
+        self.assertCountEqual(first["exported"], [category.pk for category in self.categories])
+        category = self.categories[0]
+        results_file = self.output_dir / "categories" / str(category.pk) / "results.json"
+        payload = CategoryLeaderboardSnapshot.objects.get(category=category).payload
+        self.assertEqual(results_file.read_text(encoding="utf-8"), payload)
+        self.assertEqual(gzip.decompress(results_file.with_suffix(".json.gz").read_bytes()).decode("utf-8"), payload)
+        self.assertTrue((self.output_dir / "overall.html").exists())
+
+        self.assertEqual(_silently(export_static_site, self.output_dir)["exported"], [])
+
+        player = category.players.order_by("id").first()
+        SnatchResult.objects.filter(player=player).update(repetitions=250)
+        _silently(recalculate_category, category)
+        self.assertEqual(_silently(export_static_site, self.output_dir)["exported"], [category.pk])
+        self.assertNotEqual(results_file.read_text(encoding="utf-8"), payload)
+
+    def test_recalculation_does_not_export(self):
+        category = self.categories[1]
+        SnatchResult.objects.filter(player=category.players.order_by("id").first()).update(repetitions=250)
+        with self.settings(STATIC_EXPORT_DIR=str(self.output_dir)), contextlib.redirect_stdout(io.StringIO()):
+            with self.captureOnCommitCallbacks(execute=True):
+                recalculate_category(category)
+        self.assertFalse((self.output_dir / "manifest.json").exists())
+
+    def test_worker_exports_once_after_the_batch(self):
+        _silently(export_static_site, self.output_dir)
+        with self.settings(RECALC_MODE="queue"), contextlib.redirect_stdout(io.StringIO()):
+            for category in self.categories:
+                SnatchResult.objects.filter(player=category.players.order_by("id").first()).update(repetitions=250)
+                services.mark_categories_dirty([category.id])
+        with (
+            self.settings(STATIC_EXPORT_DIR=str(self.output_dir)),
+            mock.patch("live_results.exports.render_to_string", wraps=render_to_string) as render,
+            # Would close the test transaction's connection
+            mock.patch("live_results.management.commands.run_recalc_worker.close_old_connections"),
+            contextlib.redirect_stdout(io.StringIO()),
+        ):
+            call_command("run_recalc_worker", "--once", stdout=io.StringIO())
+        # overall.html rendered once for both recalculated categories
+        self.assertEqual([call.args[0] for call in render.call_args_list].count(OVERALL_EXPORT_TEMPLATE), 1)
+        manifest = json.loads((self.output_dir / "manifest.json").read_text(encoding="utf-8"))
+        revisions = Category.objects.filter(pk__in=[category.pk for category in self.categories]).values_list(
+            "pk", "revision"
+        )
+        self.assertEqual(manifest["revisions"], {str(pk): revision for pk, revision in revisions})
+
+
+class StreamingExportTests(RankedEventMixin, QueryBudgetMixin, TestCase):
+    """Admin exports: rows read in chunks and streamed, the HTML identical to the full-page template."""
+
+    event_seed = 13
+    event_category_names = ("Open", "Masters")
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "admin")
+
+    def test_csv_streams_header_before_rows(self):
+        headers, rows = category_results_table(Category.objects.order_by("name"))
+        stream = stream_csv(headers, rows)
+        with self.assertMaxQueries(0, "CSV header"):
+            self.assertEqual(next(stream), ",".join(headers) + "\r\n")
+        # One query per category chunk - not one per athlete or per discipline result
+        with self.assertMaxQueries(len(self.categories), "CSV rows"):
+            lines = "".join(stream).splitlines()
+        expected = CategoryOverallResult.objects.filter(category__in=self.categories).count()
+        self.assertEqual(len(lines), expected)
+
+    def test_streamed_html_matches_template(self):
+        category = self.categories[0]
+        streamed = "".join(stream_category_results_html(category))
+        rendered = render_to_string(CATEGORY_EXPORT_TEMPLATE, category_export_context(category))
+        generated = re.compile(r"Wygenerowano:[^<]*")
+        self.assertEqual(
+            re.sub(r"\s+", "", generated.sub("", streamed)), re.sub(r"\s+", "", generated.sub("", rendered))
+        )
+
+    def test_admin_actions_stream(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:live_results_category_changelist"),
+            {"action": "export_results_as_csv", "_selected_action": [category.pk for category in self.categories]},
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(len(lines), CategoryOverallResult.objects.filter(category__in=self.categories).count() + 1)
+
+        players = Player.objects.all()
+        response = self.client.post(
+            reverse("admin:live_results_player_changelist"),
+            {"action": "export_players_as_csv", "_selected_action": list(players.values_list("pk", flat=True))},
+        )
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(lines[0], ",".join(PlayerExportResource().get_export_headers()))
+        self.assertEqual(len(lines), players.count() + 1)
+
+        overall = self.categories[0].overall_results.first()
+        response = self.client.post(
+            reverse("admin:live_results_categoryoverallresult_changelist"),
+            {"action": "export_overall_results_as_html", "_selected_action": [overall.pk]},
+        )
+        self.assertTrue(response.streaming)
+        self.assertIn("</html>", b"".join(response.streaming_content).decode("utf-8"))
+
+    @unittest.skipIf(openpyxl is None, "openpyxl is not installed")
+    def test_xlsx_export(self):
+        headers, rows = overall_results_table(CategoryOverallResult.objects.all())
+        workbook = openpyxl.load_workbook(write_xlsx(headers, rows, "podsumowanie"), read_only=True)
+        self.assertEqual(len(list(workbook.active.rows)), CategoryOverallResult.objects.count() + 1)
+
+
+@tag("slow")
+class RankingQueryPlanTests(RankedEventMixin, TestCase):
+    """
+    EXPLAIN for the ranking queries on an event of PLAN_EVENT_SIZE athletes. A sequential scan of a results
+    table means a missing index - at this size it costs more than the whole rest of the recalculation.
+    Run with: manage.py test live_results --tag slow
+    """
+
+    event_size = PLAN_EVENT_SIZE
+    event_seed = 11
+    event_category_names = CATEGORY_NAMES
+    event_all_disciplines = False
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.largest = max(cls.categories, key=lambda category: category.players.count())
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def _explain(self, sql: str, params) -> list[str]:
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                return [row[-1] for row in cursor.fetchall()]
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _sequential_scans(self, plan: list[str]) -> list[str]:
+        """Scanned tables from a plan: 'Seq Scan on <table>' (PostgreSQL), 'SCAN <table>' without an index (SQLite)."""
+        if connection.vendor == "sqlite":
+            scans = [re.match(r"SCAN (\w+)(.*)", line) for line in plan]
+            tables = [match.group(1) for match in scans if match and "INDEX" not in match.group(2)]
+        else:
+            tables = re.findall(r"Seq Scan on (\w+)", "\n".join(plan))
+        return [table for table in tables if table not in SEQ_SCAN_ALLOWED_TABLES]
+
+    def _capture_ranking_queries(self) -> list[tuple[str, list]]:
+        """Parametrised SELECTs run by a recalculation, an incremental update and the discipline results read."""
+        captured = []
+
+        def record(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith("SELECT") and not many:
+                captured.append((sql, params))
+            return execute(sql, params, many, context)
+
+        player = self.largest.players.order_by("id").first()
+        snatch = SnatchResult.objects.get(player=player)
+        with connection.execute_wrapper(record):
+            _silently(recalculate_category, self.largest)
+            old_score = snatch.score
+            snatch.repetitions += 1
+            snatch.save()
+            _silently(update_results_after_result_change, player, SNATCH, old_score)
+            list(CategoryDisciplineResult.objects.filter(category=self.largest, discipline=SNATCH).order_by("position"))
+            list(Player.objects.filter(categories=self.largest).select_related("snatch_result"))
+        return captured
+
+    def test_ranking_queries_use_indexes(self):
+        queries = self._capture_ranking_queries()
+        self.assertTrue(queries)
+        offenders = []
+        for sql, params in queries:
+            plan = self._explain(sql, params)
+            tables = self._sequential_scans(plan)
+            if tables:
+                offenders.append(f"{', '.join(tables)}:\n  {sql}\n  " + "\n  ".join(plan))
+        self.assertFalse(offenders, "Sequential scans in ranking queries:\n" + "\n".join(offenders))
@@ -10,6 +10,11 @@ router.register(r'categories', views.CategoryViewSet, basename='category')
 
 router.register(r'sportclubs', views.SportClubViewSet, basename='sportclub')
 urlpatterns = [
+    # Strumienie SSE przed routerem - inaczej "stream" zostałby potraktowany jako pk kategorii
+    path('categories/stream/', views.standings_stream, name='standings-stream'),
+    path('categories/<int:category_id>/stream/', views.category_standings_stream, name='category-standings-stream'),
+    path('scoreboard/', views.ScoreboardView.as_view(), name='scoreboard'),
+    path('attempts/batch/', views.AttemptBatchView.as_view(), name='attempt-batch'),
     path('', include(router.urls)),
     path('lista-startowa/', views.generate_start_list, name='generate_start_list'),
 
@@ -1,15 +1,28 @@
 # Plik: views.py
 
-from rest_framework import viewsets, permissions
+import json
+from functools import wraps
+
+from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
-from django.db.models import Prefetch, Q # Q jest potrzebne dla generate_start_list
+from rest_framework.views import APIView
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+# Q jest potrzebne dla generate_start_list
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Prefetch, Q, Sum
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from django.views.decorators.http import require_GET
 from django.shortcuts import render, get_object_or_404 # Dodano get_object_or_404
 
 from .forms import StationForm # Upewnij się, że ścieżka jest poprawna
 # Importuj NOWY model CategoryOverallResult i inne potrzebne
-from .models import Category, CategoryOverallResult, Player, SportClub
+from .models import Category, CategoryLeaderboardSnapshot, CategoryOverallResult, Player, SportClub
 from .serializers import (
+    AttemptBatchSerializer,
     CategorySerializer,
     CategoryResultsSerializer, # Ten serializer też został zmodyfikowany
     SportClubSerializer,
@@ -18,6 +31,17 @@ from .serializers import (
     SportClubSerializer, # Add if you want an endpoint for clubs
     PlayerBasicInfoSerializer,
 )
+from .pagination import CategoryResultsPagination, SportClubPagination
+from .results_cache import get_cached_category_results
+from .services import (
+    DISCIPLINE_MODELS_MAP,
+    LEADERBOARD_ENCODINGS,
+    apply_attempt_submissions,
+    build_leaderboard_payloads,
+    get_category_results_queryset,
+    get_leaderboard_changes,
+)
+from .streams import standings_event_stream
 
 # Plik: views.py (fragment - CategoryResultsView)
 
@@ -54,69 +78,374 @@ class CategoryResultsView(generics.ListAPIView):
             'final_position', 'total_points', 'player__surname', 'player__name'
         )
         return queryset
+
+
+def revision_etag(*parts) -> str:
+    """Silny ETag z nazwy zasobu, rewizji i formatu odpowiedzi, np. "results-3-17-json"."""
+    return quote_etag("-".join(str(part) for part in parts))
+
+
+def snapshot_etag(category_id: int, revision: int, encoding: str | None) -> str:
+    """ETag migawki tabeli wyników w kodowaniu, w którym faktycznie zostanie wysłana (None - bez kompresji)."""
+    if encoding:
+        return revision_etag("results", category_id, revision, "json", encoding)
+    return revision_etag("results", category_id, revision, "json")
+
+
+def accepted_leaderboard_encodings(request) -> list[str]:
+    """Kodowania migawek (LEADERBOARD_ENCODINGS) akceptowane w Accept-Encoding (q > 0), w kolejności preferencji."""
+    accepted = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return [name for name in LEADERBOARD_ENCODINGS if accepted.get(name, accepted.get("*", 0.0)) > 0]
+
+
+def with_revalidation_headers(response, etag: str):
+    """ETag + Cache-Control: krótko świeże, potem stale-while-revalidate (proxy/przeglądarka odświeża w tle)."""
+    response["ETag"] = etag
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=getattr(settings, "RESULTS_CACHE_MAX_AGE", 2),
+        stale_while_revalidate=getattr(settings, "RESULTS_CACHE_STALE_WHILE_REVALIDATE", 30),
+    )
+    return response
+
+
 # --- ViewSet for Categories and their Results ---
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet dostarczający listę kategorii oraz (przez akcję)
     szczegółowe wyniki dla wybranej kategorii.
+
+    Odpowiedzi mają ETag oparty o Category.revision (rośnie przy każdej zmianie kategorii
+    i jej wyników), więc If-None-Match jest obsługiwany bez czytania tabel wyników (304).
     """
     queryset = Category.objects.order_by('name')
     serializer_class = CategorySerializer # Główny endpoint listy kategorii używa tego
     permission_classes = [permissions.AllowAny]
+    # Tabela wyników budowana na żywo: True - jedno zapytanie values(), False - CategoryResultsSerializer,
+    # None - wg RESULTS_FAST_SERIALIZATION (obie ścieżki dają ten sam JSON)
+    results_fast_serialization = None
+
+    def list(self, request, *args, **kwargs):
+        # Rewizje tylko rosną: suma zmienia się przy każdej edycji, liczba i max id - przy dodaniu/usunięciu
+        state = Category.objects.aggregate(count=Count("id"), last_id=Max("id"), revisions=Sum("revision"))
+        etag = revision_etag(
+            "categories",
+            state["count"],
+            state["last_id"] or 0,
+            state["revisions"] or 0,
+            request.accepted_renderer.format,
+        )
+        response = get_conditional_response(request, etag=etag) or super().list(request, *args, **kwargs)
+        return with_revalidation_headers(response, etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        revision = Category.objects.filter(pk=kwargs["pk"]).values_list("revision", flat=True).first()
+        if revision is None:
+            return super().retrieve(request, *args, **kwargs) # 404
+        etag = revision_etag("category", kwargs["pk"], revision, request.accepted_renderer.format)
+        response = get_conditional_response(request, etag=etag) or super().retrieve(request, *args, **kwargs)
+        return with_revalidation_headers(response, etag)
 
     # ZMIANA: serializer_class wskazuje na zmodyfikowany serializer
-    @action(detail=True, methods=['get'], url_path='results', serializer_class=CategoryResultsSerializer)
+    @action(
+        detail=True,
+        methods=['get'],
+        url_path='results',
+        serializer_class=CategoryResultsSerializer,
+        pagination_class=CategoryResultsPagination,
+    )
     def results(self, request, pk=None):
         """
         Zwraca posortowaną listę wyników ogólnych (CategoryOverallResult)
         dla graczy w danej kategorii (pk).
         Zawiera zagnieżdżone dane gracza i wyniki w dyscyplinach.
+
+        Z ?since=<rewizja> zwraca tylko wiersze zmienione od tej rewizji (patrz _results_since).
         """
-        # Pobierz obiekt kategorii lub zwróć 404
-        category = get_object_or_404(Category, pk=pk)
+        if "since" in request.query_params:
+            return self._results_since(request, pk)
 
-        # --- ZMIANA GŁÓWNA: Zapytanie do nowego modelu ---
-        # Budujemy queryset dla NOWEGO modelu CategoryOverallResult
-        queryset = CategoryOverallResult.objects.filter(
-            category=category # Filtrujemy bezpośrednio po kategorii
-        ).select_related(
-            # Optymalizacja: Pobierz powiązane obiekty jednym zapytaniem
-            'player',         # Pobierz obiekt Player powiązany z CategoryOverallResult
-            'player__club'    # Pobierz klub gracza przez relację z Player
-        ).prefetch_related(
-            # Optymalizacja: Pobierz wyniki dyscyplin dla graczy jednym zapytaniem per typ wyniku
-            # Użyj poprawnych related_name z modelu Player!
-            Prefetch('player__snatch_result'),
-            Prefetch('player__tgu_result'),
-            Prefetch('player__kb_squat_one_result'), # Sprawdź related_name!
-            Prefetch('player__one_kettlebell_press_result'),
-            Prefetch('player__two_kettlebell_press_one_result'), # Sprawdź related_name!
-        ).order_by(
-            # Sortuj wg miejsca końcowego w TEJ kategorii, potem punktów, potem nazwiska
-            'final_position',
-            'total_points',
-            'player__surname',
-            'player__name'
+        # Strona tabeli (?cursor= / ?page_size=): zapytanie po kursorze (keyset), stały koszt każdej strony
+        if self.paginator.is_requested(request):
+            if not Category.objects.filter(pk=pk).exists():
+                raise Http404("Kategoria nie istnieje.")
+            page = self.paginate_queryset(get_category_results_queryset(pk))
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+        # Gotowa tabela wyników zapisana przez przeliczenie rankingu - jeden odczyt po kluczu głównym,
+        # bez grafu ORM i serializerów. Migawka zawiera całą listę.
+        if request.accepted_renderer.format == "json":
+            response = self._snapshot_response(request, pk)
+            if response is not None:
+                return response
+
+        # Brak migawki (kategoria jeszcze nieprzeliczona) albo inny format - tabela z wersjonowanej
+        # pamięci podręcznej: po zmianie rewizji buduje ją jedno żądanie, a nie każdy widz naraz
+        revision = Category.objects.filter(pk=pk).values_list("revision", flat=True).first()
+        if revision is None:
+            raise Http404("Kategoria nie istnieje.")
+        etag = revision_etag("results", pk, revision, request.accepted_renderer.format)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return with_revalidation_headers(not_modified, etag)
+        revision, payload = get_cached_category_results(pk, revision, self.results_fast_serialization)
+
+        if request.accepted_renderer.format == "json":
+            response = HttpResponse(payload, content_type="application/json")
+        else:
+            response = Response(json.loads(payload))
+        response["X-Leaderboard-Revision"] = str(revision)
+        return with_revalidation_headers(response, revision_etag("results", pk, revision, request.accepted_renderer.format))
+
+    def _snapshot_response(self, request, pk):
+        """
+        Odpowiedź z migawki tabeli wyników (None - brak migawki). Dla Accept-Encoding z gzip/br wysyła
+        formę skompresowaną przy zapisie migawki, bez kompresji w żądaniu; ETag zależy od kodowania.
+        """
+        snapshots = CategoryLeaderboardSnapshot.objects.filter(category_id=pk)
+        encodings = accepted_leaderboard_encodings(request)
+        # Przy If-None-Match najpierw rewizja i to, które formy skompresowane istnieją (bez ich treści) -
+        # dla 304 tabela nie jest potrzebna, a ETag zależy od kodowania, w którym poszłaby odpowiedź
+        if "HTTP_IF_NONE_MATCH" in request.META:
+            stored_forms = (
+                ExpressionWrapper(Q(**{f"{LEADERBOARD_ENCODINGS[name]}__isnull": False}), output_field=BooleanField())
+                for name in encodings
+            )
+            stored = snapshots.values_list("revision", *stored_forms).first()
+            if stored is not None:
+                revision, *available = stored
+                encoding = next((name for name, exists in zip(encodings, available, strict=True) if exists), None)
+                etag = snapshot_etag(pk, revision, encoding)
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    patch_vary_headers(not_modified, ["Accept-Encoding"])
+                    return with_revalidation_headers(not_modified, etag)
+
+        encoding = content = None
+        if encodings:
+            snapshot = snapshots.values_list("revision", *(LEADERBOARD_ENCODINGS[name] for name in encodings)).first()
+            if snapshot is None:
+                return None
+            revision, *compressed = snapshot
+            encoding, content = next(
+                ((name, data) for name, data in zip(encodings, compressed, strict=True) if data is not None),
+                (None, None),
+            )
+        if content is None:
+            # Klient bez gzip/br albo migawka bez formy skompresowanej
+            snapshot = snapshots.values_list("payload", "revision").first()
+            if snapshot is None:
+                return None
+            content, revision = snapshot
+
+        response = HttpResponse(bytes(content) if encoding else content, content_type="application/json")
+        if encoding:
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ["Accept-Encoding"])
+        response["X-Leaderboard-Revision"] = str(revision)
+        return with_revalidation_headers(response, snapshot_etag(pk, revision, encoding))
+
+    def _results_since(self, request, pk):
+        """
+        Zmiany tabeli wyników od rewizji klienta: {"revision", "full": false, "rows", "removed"}.
+        Wiersze mają format endpointu wyników (wynik ogólny z zagnieżdżonymi wynikami dyscyplin).
+        Dla rewizji spoza historii zmian - pełna tabela: {"revision", "full": true, "rows": [...], "removed": []}.
+        """
+        try:
+            since = int(request.query_params["since"])
+            if since < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"since": "Rewizja musi być liczbą całkowitą nieujemną."})
+
+        changes = get_leaderboard_changes(pk, since)
+        if changes is not None:
+            response = Response({"full": False, **changes})
+            etag = revision_etag("results", pk, changes["revision"], "since", since, request.accepted_renderer.format)
+            return with_revalidation_headers(response, etag)
+
+        snapshot = CategoryLeaderboardSnapshot.objects.filter(category_id=pk).values_list("payload", "revision").first()
+        if snapshot is None:
+            revision = Category.objects.filter(pk=pk).values_list("revision", flat=True).first()
+            if revision is None:
+                raise Http404("Kategoria nie istnieje.")
+            revision, payload = get_cached_category_results(pk, revision, self.results_fast_serialization)
+        else:
+            payload, revision = snapshot
+        if request.accepted_renderer.format == "json":
+            # Gotowy JSON migawki wstawiony w odpowiedź bez ponownego parsowania
+            body = f'{{"revision":{json.dumps(revision)},"full":true,"rows":{payload},"removed":[]}}'
+            response = HttpResponse(body, content_type="application/json")
+        else:
+            response = Response({"revision": revision, "full": True, "rows": json.loads(payload), "removed": []})
+        etag = revision_etag("results", pk, revision, "since", since, request.accepted_renderer.format)
+        return with_revalidation_headers(response, etag)
+
+# --- Tablica całych zawodów: wszystkie kategorie i ich tabele wyników w jednym żądaniu ---
+class ScoreboardView(APIView):
+    """
+    GET /api/scoreboard/ - każda kategoria (id, nazwa, dyscypliny, rewizja) z tabelą wyników z migawki.
+    ?top=N - tylko N pierwszych wierszy każdej tabeli; ?category=<id> (można powtórzyć) - wybrane kategorie.
+    Jedno zapytanie (plus jedno wspólne dla wszystkich kategorii bez migawki); ETag z rewizji kategorii,
+    przy If-None-Match najpierw sam agregat rewizji (304 bez czytania tabel).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            top = int(request.query_params["top"]) if "top" in request.query_params else None
+            if top is not None and top < 0:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"top": "Liczba wierszy musi być liczbą całkowitą nieujemną."})
+        try:
+            category_ids = [int(value) for value in request.query_params.getlist("category")]
+        except ValueError:
+            raise ValidationError({"category": "Id kategorii musi być liczbą całkowitą."})
+
+        categories = Category.objects.order_by("name")
+        if category_ids:
+            categories = categories.filter(pk__in=category_ids)
+        etag_scope = ("all" if top is None else top, ".".join(map(str, sorted(set(category_ids)))) or "all")
+
+        if "HTTP_IF_NONE_MATCH" in request.META:
+            state = categories.aggregate(count=Count("id"), last_id=Max("id"), revisions=Sum("revision"))
+            etag = self._etag(request, state["count"], state["last_id"] or 0, state["revisions"] or 0, etag_scope)
+            not_modified = get_conditional_response(request, etag=etag)
+            if not_modified is not None:
+                return with_revalidation_headers(not_modified, etag)
+
+        rows = list(categories.values_list("id", "name", "disciplines", "revision", "leaderboard_snapshot__payload"))
+        etag = self._etag(
+            request, len(rows), max((row[0] for row in rows), default=0), sum(row[3] for row in rows), etag_scope
+        )
+        # Kategorie jeszcze nieprzeliczone (bez migawki) - tabele zbudowane razem, nie osobno dla każdej
+        built = build_leaderboard_payloads([row[0] for row in rows if row[4] is None])
+        entries = [
+            (
+                {"id": category_id, "name": name, "disciplines": disciplines, "revision": revision},
+                built[category_id] if payload is None else payload,
+            )
+            for category_id, name, disciplines, revision, payload in rows
+        ]
+
+        if request.accepted_renderer.format == "json" and top is None:
+            # Gotowe JSON-y migawek wstawione w odpowiedź bez ponownego parsowania
+            parts = []
+            for meta, payload in entries:
+                encoded_meta = json.dumps(meta, separators=(",", ":"), ensure_ascii=False)
+                parts.append(f'{encoded_meta[:-1]},"results":{payload}}}')
+            response = HttpResponse('{"categories":[' + ",".join(parts) + "]}", content_type="application/json")
+        else:
+            response = Response(
+                {"categories": [{**meta, "results": json.loads(payload)[:top]} for meta, payload in entries]}
+            )
+        return with_revalidation_headers(response, etag)
+
+    def _etag(self, request, count, last_id, revisions, scope) -> str:
+        return revision_etag("scoreboard", count, last_id, revisions, *scope, request.accepted_renderer.format)
+
+
+# --- Wprowadzanie prób przez sędziów ---
+class AttemptBatchView(APIView):
+    """
+    POST /api/attempts/batch/ - paczka prób {"attempts": [{"player", "discipline", "attempt", "value"}, ...]}
+    (Snatch: "kettlebell_weight"/"repetitions" zamiast "attempt"/"value"). Walidacja całej paczki, zapis
+    w jednej transakcji i jedno przeliczenie na każdą dotkniętą kategorię (services.apply_attempt_submissions).
+    Wymaga zalogowanego użytkownika z uprawnieniem do zmiany wyników użytych dyscyplin (jak w adminie).
+
+    Urządzenia pracujące bez sieci wysyłają paczkę z nagłówkiem Idempotency-Key albo całą zaległą kolejkę
+    {"submissions": [{"key", "attempts"}, ...]}, a każda próba może nieść "recorded_at". Powtórzone
+    zgłoszenie nie jest stosowane drugi raz - odpowiedź ma wtedy status "duplicate" (dla pojedynczej
+    paczki także nagłówek Idempotent-Replayed: true).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = AttemptBatchSerializer(
+            data=request.data, context={"idempotency_key": request.headers.get("Idempotency-Key")}
         )
-        # --- KONIEC ZMIANY GŁÓWNEJ ---
+        serializer.is_valid(raise_exception=True)
+        submissions = serializer.validated_data["submissions"]
+        disciplines = {attempt["discipline"] for submission in submissions for attempt in submission["attempts"]}
+        for discipline in disciplines:
+            model = DISCIPLINE_MODELS_MAP[discipline]
+            if not request.user.has_perm(f"{model._meta.app_label}.change_{model._meta.model_name}"):
+                raise PermissionDenied(f"Brak uprawnień do zmiany wyników: {model._meta.verbose_name_plural}.")
+        try:
+            result = apply_attempt_submissions(submissions, user=request.user)
+        except IntegrityError:
+            # To samo zgłoszenie jest właśnie zapisywane przez równoległe żądanie - klient ponowi wysyłkę
+            return Response(
+                {"detail": "Zgłoszenie o tym kluczu jest właśnie przetwarzane, ponów wysyłkę."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        response = Response(result)
+        if "attempts" in request.data and result["submissions"][0]["status"] == "duplicate":
+            response["Idempotent-Replayed"] = "true"
+        return response
+
+
+# --- Server-Sent Events: zmiany tabel wyników na żywo (serwer ASGI) ---
+def _event_stream_response(stream) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no" # nginx: nie buforuj strumienia
+    return response
+
+
+def asgi_only(view):
+    """
+    Widok strumienia tylko pod serwerem ASGI (uvicorn) - pod WSGI każdy podłączony klient
+    zajmowałby worker do końca połączenia, więc zamiast strumienia zwracane jest 501.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(
+                "Strumień SSE wymaga serwera ASGI (uvicorn european_champonship_kettlebell.asgi:application).",
+                status=501,
+                content_type="text/plain; charset=utf-8",
+            )
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_GET
+@asgi_only
+async def category_standings_stream(request, category_id: int):
+    """Strumień SSE zmian tabeli wyników jednej kategorii."""
+    if not await Category.objects.filter(pk=category_id).aexists():
+        raise Http404("Kategoria nie istnieje.")
+    return _event_stream_response(standings_event_stream(category_id))
+
 
-        # Paginacja (bez zmian, ale upewnij się, że jest skonfigurowana)
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            # Użyj serializera zdefiniowanego w @action
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+@require_GET
+@asgi_only
+async def standings_stream(request):
+    """Strumień SSE zmian tabel wyników wszystkich kategorii."""
+    return _event_stream_response(standings_event_stream(None))
 
-        # Zwróć dane bez paginacji
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
 
 # --- Optional: ViewSet for Sport Clubs (bez zmian) ---
 class SportClubViewSet(viewsets.ReadOnlyModelViewSet):
-    """Prosty ViewSet do listowania klubów."""
+    """Prosty ViewSet do listowania klubów (strony po nazwie z ?page_size= / ?cursor=)."""
     queryset = SportClub.objects.order_by('name')
     serializer_class = SportClubSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = SportClubPagination
 
 # --- Funkcja generate_start_list (bez zmian) ---
 # Ta funkcja wydaje się niezwiązana z wyświetlaniem wyników i może pozostać bez zmian,
@@ -142,8 +471,9 @@ def generate_start_list(request):
             query = Q()
             for category_name in category_names:
                 query |= Q(categories__name=category_name)
-            players = Player.objects.filter(query).distinct().order_by("surname", "name")
-            player_count = players.count()
+            # Jedno zapytanie - lista jest potem cięta na stanowiska w pamięci (wycinek QuerySetu to osobne zapytanie)
+            players = list(Player.objects.filter(query).distinct().order_by("surname", "name"))
+            player_count = len(players)
 
             # Sprawdzenie czy są zawodnicy (bez zmian)
             if player_count == 0:
@@ -1,6 +1,6 @@
-import React, { useState, useMemo } from "react";
+import React, { useState, useMemo, useEffect } from "react";
 import { useParams } from "react-router-dom";
-import { useQuery } from "@tanstack/react-query";
+import { useQuery, useQueryClient } from "@tanstack/react-query";
 import { Table, Spin, Alert, Typography, Button, Input } from "antd";
 import type { TableProps } from "antd";
 import { ArrowLeftOutlined } from "@ant-design/icons";
@@ -15,6 +15,7 @@ import {
   KBSquatResultData,
   OneKettlebellPressResultData,
   TwoKettlebellPressResultData,
+  ScoreboardResponse,
 } from "../types";
 import styles from "./CategoryPage.module.css";
 
@@ -47,18 +48,19 @@ const fetchCategoryData = async (
 ): Promise<{ categoryInfo: Category; results: CategoryResultsResponse }> => {
   if (!categoryId) throw new Error("Category ID jest wymagane");
   try {
-    const [catInfoResponse, resultsResponse] = await Promise.all([
-      apiClient.get<Category>(`/categories/${categoryId}/`),
-      apiClient.get<CategoryResultsResponse>(
-        `/categories/${categoryId}/results/`
-      ),
-    ]);
+    // Jedno żądanie: dane kategorii i tabela wyników z /scoreboard/
+    const response = await apiClient.get<ScoreboardResponse>("/scoreboard/", {
+      params: { category: categoryId },
+    });
+    const entry = response.data.categories[0];
+    if (!entry) throw new Error("Nie znaleziono kategorii");
+    const { results, ...categoryInfo } = entry;
 
-    const sortedResults = resultsResponse.data.sort(
+    const sortedResults = results.sort(
       (a: OverallResult, b: OverallResult) =>
         (a.final_position ?? 999) - (b.final_position ?? 999)
     );
-    return { categoryInfo: catInfoResponse.data, results: sortedResults };
+    return { categoryInfo, results: sortedResults };
   } catch (error) {
     console.error(`Error fetching category data for ID ${categoryId}:`, error);
     throw error;
@@ -542,6 +544,7 @@ const disciplineMap: Record<string, DisciplineMapEntry> = {
 const CategoryPage: React.FC = () => {
   const { categoryId } = useParams<{ categoryId: string }>();
   const [filterTerm, setFilterTerm] = useState<string>("");
+  const queryClient = useQueryClient();
 
   const { data, isLoading, isError, error, isFetching } = useQuery<
     { categoryInfo: Category; results: CategoryResultsResponse },
@@ -554,6 +557,19 @@ const CategoryPage: React.FC = () => {
     staleTime: 60000,
   });
 
+  // Strumień SSE: odśwież dane dopiero, gdy ranking kategorii faktycznie się zmienił
+  useEffect(() => {
+    if (!categoryId || typeof EventSource === "undefined") return;
+    const source = new EventSource(
+      `${apiClient.defaults.baseURL}categories/${categoryId}/stream/`
+    );
+    const refresh = () =>
+      queryClient.invalidateQueries({ queryKey: ["categoryData", categoryId] });
+    source.addEventListener("standings", refresh);
+    source.addEventListener("resync", refresh);
+    return () => source.close();
+  }, [categoryId, queryClient]);
+
   const categoryInfo = data?.categoryInfo;
   const results = data?.results ?? [];
 
@@ -73,3 +73,13 @@ export interface OverallResult {
 }
 
 export type CategoryResultsResponse = OverallResult[];
+
+// GET /api/scoreboard/ - wszystkie (lub wybrane ?category=) kategorie z tabelami wyników w jednym żądaniu
+export interface ScoreboardCategory extends Category {
+  revision: number;
+  results: CategoryResultsResponse;
+}
+
+export interface ScoreboardResponse {
+  categories: ScoreboardCategory[];
+}